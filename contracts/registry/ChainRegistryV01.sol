@@ -83,7 +83,7 @@ contract ChainRegistryV01 is
     modifier onlyRegisteredToken(ChainId chain, address token) {
         NftId id = _contractObject[chain][token];
         require(NftId.unwrap(id) > 0, "ERROR:CRG-002:TOKEN_NOT_REGISTERED");
-        require(_info[id].objectType == TOKEN, "ERROR:CRG-003:ADDRESS_NOT_TOKEN");
+        require(_getObjectType(id) == TOKEN, "ERROR:CRG-003:ADDRESS_NOT_TOKEN");
         _;
     }
 
@@ -114,7 +114,7 @@ contract ChainRegistryV01 is
     modifier onlySameChain(bytes32 instanceId) {
         NftId id = _instance[instanceId];
         require(NftId.unwrap(id) > 0, "ERROR:CRG-020:INSTANCE_NOT_REGISTERED");
-        require(block.chainid == toInt(_info[id].chain), "ERROR:CRG-021:DIFFERENT_CHAIN_NOT_SUPPORTED");
+        require(block.chainid == toInt(_getChain(id)), "ERROR:CRG-021:DIFFERENT_CHAIN_NOT_SUPPORTED");
         _;
     }
 
@@ -359,7 +359,7 @@ contract ChainRegistryV01 is
         require(staker != address(0), "ERROR:CRG-090:STAKER_WITH_ZERO_ADDRESS");
         (bytes memory data) = _getStakeData(
             target,
-            _info[target].objectType);
+            _getObjectType(target));
 
         // mint new stake nft
         id = _safeMintObject(
@@ -499,7 +499,7 @@ contract ChainRegistryV01 is
     {
         id = _contractObject[chain][token];
         require(exists(id), "ERROR:CRG-133:TOKEN_NOT_REGISTERED");
-        require(_info[id].objectType == TOKEN, "ERROR:CRG-134:OBJECT_NOT_TOKEN");
+        require(_getObjectType(id) == TOKEN, "ERROR:CRG-134:OBJECT_NOT_TOKEN");
     }
 
 
@@ -1082,19 +1082,7 @@ contract ChainRegistryV01 is
         id = toNftId(_nft.mint(to, uri));
 
         // store nft meta data
-        NftInfo storage info = _info[id];
-        info.id = id;
-        info.chain = chain;
-        info.objectType = objectType;
-        info.mintedIn = blockNumber();
-        info.version = version();
-
-        _setObjectState(id, state);
-
-        // store data if provided        
-        if(data.length > 0) {
-            info.data = data;
-        }
+        _storeObjectInfo(id, chain, objectType, state, data);
 
         // general object book keeping
         _object[chain][objectType].push(id);
@@ -1128,6 +1116,52 @@ contract ChainRegistryV01 is
     }
 
 
+    function _storeObjectInfo(
+        NftId id,
+        ChainId chain,
+        ObjectType objectType,
+        ObjectState state,
+        bytes memory data
+    )
+        internal
+        virtual
+    {
+        NftInfo storage info = _info[id];
+        info.id = id;
+        info.chain = chain;
+        info.objectType = objectType;
+        info.mintedIn = blockNumber();
+        info.version = version();
+
+        _setObjectState(id, state);
+
+        // store data if provided        
+        if(data.length > 0) {
+            info.data = data;
+        }
+    }
+
+
+    function _getObjectType(NftId id)
+        internal
+        virtual
+        view
+        returns(ObjectType objectType)
+    {
+        return _info[id].objectType;
+    }
+
+
+    function _getChain(NftId id)
+        internal
+        virtual
+        view
+        returns(ChainId chain)
+    {
+        return _info[id].chain;
+    }
+
+
     function _getContractSize(address contractAddress)
         internal
         view
@@ -51,8 +51,7 @@ contract ChainRegistryV02 is
         virtual override
     {
         // check id exists and refers to bundle
-        NftInfo memory info = _info[id];
-        require(info.objectType == BUNDLE, "ERROR:CRG-400:NOT_BUNDLE");
+        require(_getObjectType(id) == BUNDLE, "ERROR:CRG-400:NOT_BUNDLE");
 
         // check that call is made from associated riskpool
         (
@@ -62,7 +61,7 @@ contract ChainRegistryV02 is
             address token,
             string memory displayName,
             uint256 expiryAt
-        ) = _decodeBundleData(info.data);
+        ) = _decodeBundleData(_info[id].data);
 
         IInstanceServiceFacade instanceService = getInstanceServiceFacade(instanceId);
         IComponent component = instanceService.getComponent(riskpoolId);
@@ -0,0 +1,877 @@
+// SPDX-License-Identifier: Apache-2.0
+pragma solidity ^0.8.19;
+
+import {SafeCastUpgradeable} from "@openzeppelin-upgradeable/contracts/utils/math/SafeCastUpgradeable.sol";
+
+import {Version, toVersion, toVersionPart, zeroVersion} from "../shared/IVersionType.sol";
+import {IVersionable} from "../shared/IVersionable.sol";
+import {Versionable} from "../shared/Versionable.sol";
+import {VersionedOwnable} from "../shared/VersionedOwnable.sol";
+
+import {ChainId, Blocknumber, thisChainId} from "../shared/IBaseTypes.sol";
+
+import {ChainRegistryV02} from "./ChainRegistryV02.sol";
+import {IInstanceServiceFacade} from "./IInstanceServiceFacade.sol";
+import {ObjectType} from "./IChainRegistry.sol";
+import {NftId, toNftId} from "./IChainNft.sol";
+
+contract ChainRegistryV03 is
+    ChainRegistryV02
+{
+    using SafeCastUpgradeable for uint256;
+
+    // objects registered with this or later versions use the compact data encoding
+    Version public constant COMPACT_DATA_VERSION = Version.wrap(uint48((1 << 32) + (2 << 16)));
+
+    // fixed width bundle data fields (head words of the abi encoding)
+    uint256 public constant BUNDLE_DATA_INSTANCE_ID = 0;
+    uint256 public constant BUNDLE_DATA_RISKPOOL_ID = 1;
+    uint256 public constant BUNDLE_DATA_BUNDLE_ID = 2;
+    uint256 public constant BUNDLE_DATA_TOKEN = 3;
+    uint256 public constant BUNDLE_DATA_EXPIRY_AT = 4;
+
+    // fixed width nft info fields packed into a single slot (21 bytes)
+    struct PackedInfo {
+        ChainId chain;
+        ObjectType objectType;
+        ObjectState state;
+        Blocknumber mintedIn;
+        Blocknumber updatedIn;
+        Version version;
+    }
+
+    // did prefix per chain: "did:nft:eip155:<chain>_erc721:<registry address>_"
+    mapping(ChainId chain => string didPrefix) internal _didPrefix;
+
+    // nft info of objects registered with this or later versions
+    // uri and data remain in _info, objects registered with previous versions remain in _info entirely
+    mapping(NftId id => PackedInfo info) internal _packedInfo;
+
+    // instance service resolved at registration of the instance or via refreshInstanceService
+    mapping(bytes32 instanceId => IInstanceServiceFacade instanceService) internal _instanceService;
+
+
+    event LogChainRegistryInstanceServiceUpdated(bytes32 instanceId, address instanceServiceOld, address instanceServiceNew);
+
+
+    // IMPORTANT 1. version needed for upgradable versions
+    // _activate is using this to check if this is a new version
+    // and if this version is higher than the last activated version
+    function version()
+        public
+        virtual override
+        pure
+        returns(Version)
+    {
+        return toVersion(
+            toVersionPart(1),
+            toVersionPart(2),
+            toVersionPart(0));
+    }
+
+    // IMPORTANT 2. activate implementation needed
+    // is used by proxy admin in its upgrade function
+    function activate(address implementation, address activatedBy)
+        external
+        virtual override(IVersionable, VersionedOwnable)
+    {
+        // keep track of version history
+        // do some upgrade checks
+        _activate(implementation, activatedBy);
+
+        // upgrade version
+        _version = version();
+
+        // cache did prefix for registries registered with previous versions
+        for(uint256 i = 0; i < _chainIds.length; i++) {
+            ChainId chain = _chainIds[i];
+            if(_object[chain][REGISTRY].length > 0) {
+                _didPrefix[chain] = _getDidPrefix(chain);
+            }
+        }
+    }
+
+
+    // permissionless, did prefix is derived from registry data only
+    function updateDidPrefix(ChainId chain)
+        external
+        virtual
+    {
+        require(_object[chain][REGISTRY].length > 0, "ERROR:CRG-410:REGISTRY_NOT_REGISTERED");
+        _didPrefix[chain] = _getDidPrefix(chain);
+    }
+
+
+    function getDidPrefix(ChainId chain)
+        external
+        virtual
+        view
+        returns(string memory didPrefix)
+    {
+        didPrefix = _didPrefix[chain];
+
+        if(bytes(didPrefix).length == 0) {
+            require(_object[chain][REGISTRY].length > 0, "ERROR:CRG-411:REGISTRY_NOT_REGISTERED");
+            didPrefix = _getDidPrefix(chain);
+        }
+    }
+
+
+    // permissionless, instance service is resolved via the registered instance registry
+    // needs to be called after an upgrade of the instance service and for instances registered with previous versions
+    function refreshInstanceService(bytes32 instanceId)
+        external
+        virtual
+        onlyRegisteredInstance(instanceId)
+    {
+        _cacheInstanceService(instanceId);
+    }
+
+
+    function getInstanceServiceFacade(bytes32 instanceId)
+        public
+        virtual override
+        view
+        returns(IInstanceServiceFacade instanceService)
+    {
+        instanceService = _instanceService[instanceId];
+
+        // fallback for instances not yet cached
+        if(address(instanceService) == address(0)) {
+            return super.getInstanceServiceFacade(instanceId);
+        }
+    }
+
+
+    function exists(NftId id)
+        public
+        virtual override
+        view
+        returns(bool)
+    {
+        return _isPacked(id) || super.exists(id);
+    }
+
+
+    function getNftInfo(NftId id)
+        external
+        virtual override
+        view
+        returns(NftInfo memory)
+    {
+        require(exists(id), "ERROR:CRG-430:NFT_ID_INVALID");
+
+        if(!_isPacked(id)) {
+            return _info[id];
+        }
+
+        PackedInfo memory packed = _packedInfo[id];
+        NftInfo storage info = _info[id];
+
+        return NftInfo(
+            id,
+            packed.chain,
+            packed.objectType,
+            packed.state,
+            info.uri,
+            info.data,
+            packed.mintedIn,
+            packed.updatedIn,
+            packed.version);
+    }
+
+
+    // single slot read, avoids copying uri and data of the full nft info
+    function getObjectInfo(NftId id)
+        external
+        virtual
+        view
+        returns(
+            ChainId chain,
+            ObjectType objectType,
+            ObjectState state
+        )
+    {
+        if(_isPacked(id)) {
+            PackedInfo storage packed = _packedInfo[id];
+            return (packed.chain, packed.objectType, packed.state);
+        }
+
+        NftInfo storage info = _info[id];
+        return (info.chain, info.objectType, info.state);
+    }
+
+
+    function getBundleInstance(NftId id)
+        external
+        virtual
+        view
+        returns(
+            bytes32 instanceId,
+            uint256 riskpoolId,
+            uint256 bundleId
+        )
+    {
+        instanceId = bytes32(_getBundleField(id, BUNDLE_DATA_INSTANCE_ID));
+        riskpoolId = _getBundleField(id, BUNDLE_DATA_RISKPOOL_ID);
+        bundleId = _getBundleField(id, BUNDLE_DATA_BUNDLE_ID);
+    }
+
+
+    function getBundleToken(NftId id)
+        external
+        virtual
+        view
+        returns(address token)
+    {
+        return address(uint160(_getBundleField(id, BUNDLE_DATA_TOKEN)));
+    }
+
+
+    function getBundleExpiryAt(NftId id)
+        external
+        virtual
+        view
+        returns(uint256 expiryAt)
+    {
+        return _getBundleField(id, BUNDLE_DATA_EXPIRY_AT);
+    }
+
+
+    function extendBundleLifetime(NftId id, uint256 lifetimeExtension)
+        external
+        virtual override
+    {
+        // check id exists and refers to bundle
+        require(_getObjectType(id) == BUNDLE, "ERROR:CRG-450:NOT_BUNDLE");
+
+        // check that call is made from associated riskpool
+        bytes32 instanceId = bytes32(_getBundleField(id, BUNDLE_DATA_INSTANCE_ID));
+        uint256 riskpoolId = _getBundleField(id, BUNDLE_DATA_RISKPOOL_ID);
+
+        IInstanceServiceFacade instanceService = getInstanceServiceFacade(instanceId);
+        require(msg.sender == address(instanceService.getComponent(riskpoolId)), "ERROR:CRG-451:CALLER_NOT_RISKPOOL");
+
+        _updateObjectData(id, _getExtendedBundleData(id, lifetimeExtension));
+    }
+
+
+    function decodeRegistryData(NftId id)
+        public
+        virtual override
+        view
+        returns(address registry)
+    {
+        return _getRegistryDataOf(id);
+    }
+
+
+    function decodeTokenData(NftId id)
+        public
+        virtual override
+        view
+        returns(address token)
+    {
+        if(_hasCompactData(id)) {
+            return _decodeTokenData(_info[id].data);
+        }
+
+        return super._decodeTokenData(_info[id].data);
+    }
+
+
+    function decodeInstanceData(NftId id)
+        public
+        virtual override
+        view
+        returns(
+            bytes32 instanceId,
+            address registry,
+            string memory displayName
+        )
+    {
+        if(_hasCompactData(id)) {
+            return _decodeInstanceData(_info[id].data);
+        }
+
+        return super._decodeInstanceData(_info[id].data);
+    }
+
+
+    function decodeComponentData(NftId id)
+        external
+        virtual override
+        view
+        returns(
+            bytes32 instanceId,
+            uint256 componentId,
+            address token
+        )
+    {
+        if(_hasCompactData(id)) {
+            return _decodeComponentData(_info[id].data);
+        }
+
+        return super._decodeComponentData(_info[id].data);
+    }
+
+
+    function decodeBundleData(NftId id)
+        external
+        virtual override
+        view
+        returns(
+            bytes32 instanceId,
+            uint256 riskpoolId,
+            uint256 bundleId,
+            address token,
+            string memory displayName,
+            uint256 expiryAt
+        )
+    {
+        return _getBundleDataOf(id);
+    }
+
+
+    function decodeStakeData(NftId id)
+        external
+        view
+        virtual override
+        returns(
+            NftId target,
+            ObjectType targetType
+        )
+    {
+        if(_hasCompactData(id)) {
+            return _decodeStakeData(_info[id].data);
+        }
+
+        return super._decodeStakeData(_info[id].data);
+    }
+
+
+    function tokenDID(uint256 tokenId)
+        public
+        view
+        virtual override
+        returns(string memory)
+    {
+        NftId id = toNftId(tokenId);
+        require(exists(id), "ERROR:CRG-412:TOKEN_ID_INVALID");
+
+        // only read the chain from storage instead of copying the full nft info
+        ChainId chain = _getChain(id);
+        string memory didPrefix = _didPrefix[chain];
+
+        // fallback for chains with registries not yet cached
+        if(bytes(didPrefix).length == 0) {
+            didPrefix = _getDidPrefix(chain);
+        }
+
+        return string(
+            abi.encodePacked(
+                didPrefix,
+                toString(tokenId)));
+    }
+
+
+    function _safeMintObject(
+        address to,
+        ChainId chain,
+        ObjectType objectType,
+        ObjectState state,
+        string memory uri,
+        bytes memory data
+    )
+        internal
+        virtual override
+        returns(NftId id)
+    {
+        id = super._safeMintObject(to, chain, objectType, state, uri, data);
+
+        // first registry of a chain defines the did prefix of the chain
+        if(objectType == REGISTRY && _object[chain][REGISTRY].length == 1) {
+            _didPrefix[chain] = _getDidPrefix(chain);
+        }
+
+        // instance service is only reachable for instances on this chain
+        if(objectType == INSTANCE && chain == thisChainId()) {
+            (bytes32 instanceId, , ) = _decodeInstanceData(data);
+            _cacheInstanceService(instanceId);
+        }
+    }
+
+
+    function _cacheInstanceService(bytes32 instanceId)
+        internal
+        virtual
+    {
+        (, address registry, ) = decodeInstanceData(_instance[instanceId]);
+        (,,,, bool isValidId, IInstanceServiceFacade instanceService) = probeInstance(registry);
+
+        // invalid instances are not cached, lookups then fall back to probing the instance registry
+        if(!isValidId) {
+            instanceService = IInstanceServiceFacade(address(0));
+        }
+
+        address instanceServiceOld = address(_instanceService[instanceId]);
+        _instanceService[instanceId] = instanceService;
+
+        emit LogChainRegistryInstanceServiceUpdated(instanceId, instanceServiceOld, address(instanceService));
+    }
+
+
+    // single sstore for all fixed width fields instead of writing nft info slots 0 and 3
+    function _storeObjectInfo(
+        NftId id,
+        ChainId chain,
+        ObjectType objectType,
+        ObjectState state,
+        bytes memory data
+    )
+        internal
+        virtual override
+    {
+        Blocknumber mintedIn = blockNumber();
+        _packedInfo[id] = PackedInfo(
+            chain,
+            objectType,
+            state,
+            mintedIn,
+            mintedIn,
+            version());
+
+        // store data if provided
+        if(data.length > 0) {
+            _info[id].data = data;
+        }
+
+        emit LogChainRegistryObjectStateSet(id, ObjectState.Undefined, state, msg.sender);
+    }
+
+
+    function _setObjectState(NftId id, ObjectState stateNew)
+        internal
+        virtual override
+    {
+        if(!_isPacked(id)) {
+            super._setObjectState(id, stateNew);
+            return;
+        }
+
+        PackedInfo storage info = _packedInfo[id];
+        ObjectState stateOld = info.state;
+
+        info.state = stateNew;
+        info.updatedIn = blockNumber();
+
+        emit LogChainRegistryObjectStateSet(id, stateOld, stateNew, msg.sender);
+    }
+
+
+    function _updateObjectData(NftId id, bytes memory newData)
+        internal
+        virtual override
+    {
+        if(!_isPacked(id)) {
+            super._updateObjectData(id, newData);
+            return;
+        }
+
+        _info[id].data = newData;
+        _packedInfo[id].updatedIn = blockNumber();
+
+        emit LogChainRegistryObjectDataUpdated(id, msg.sender);
+    }
+
+
+    function _getObjectType(NftId id)
+        internal
+        virtual override
+        view
+        returns(ObjectType objectType)
+    {
+        PackedInfo storage info = _packedInfo[id];
+        if(info.version > zeroVersion()) {
+            return info.objectType;
+        }
+
+        return super._getObjectType(id);
+    }
+
+
+    function _getChain(NftId id)
+        internal
+        virtual override
+        view
+        returns(ChainId chain)
+    {
+        PackedInfo storage info = _packedInfo[id];
+        if(info.version > zeroVersion()) {
+            return info.chain;
+        }
+
+        return super._getChain(id);
+    }
+
+
+    // packed info is written for all objects registered with this or later versions
+    function _isPacked(NftId id)
+        internal
+        virtual
+        view
+        returns(bool)
+    {
+        return _packedInfo[id].version > zeroVersion();
+    }
+
+
+    function _hasCompactData(NftId id)
+        internal
+        virtual
+        view
+        returns(bool)
+    {
+        return _packedInfo[id].version >= COMPACT_DATA_VERSION;
+    }
+
+
+    function _getRegistryDataOf(NftId id)
+        internal
+        virtual
+        view
+        returns(address registry)
+    {
+        if(_hasCompactData(id)) {
+            return _decodeRegistryData(_info[id].data);
+        }
+
+        return super._decodeRegistryData(_info[id].data);
+    }
+
+
+    function _getBundleDataOf(NftId id)
+        internal
+        virtual
+        view
+        returns(
+            bytes32 instanceId,
+            uint256 riskpoolId,
+            uint256 bundleId,
+            address token,
+            string memory displayName,
+            uint256 expiryAt
+        )
+    {
+        if(_hasCompactData(id)) {
+            return _decodeBundleData(_info[id].data);
+        }
+
+        return super._decodeBundleData(_info[id].data);
+    }
+
+
+    // keeps the data encoding the bundle was registered with
+    function _getExtendedBundleData(NftId id, uint256 lifetimeExtension)
+        internal
+        virtual
+        view
+        returns(bytes memory data)
+    {
+        (
+            bytes32 instanceId,
+            uint256 riskpoolId,
+            uint256 bundleId,
+            address token,
+            string memory displayName,
+            uint256 expiryAt
+        ) = _getBundleDataOf(id);
+
+        if(_hasCompactData(id)) {
+            return _encodeBundleData(instanceId, riskpoolId, bundleId, token, displayName, expiryAt + lifetimeExtension);
+        }
+
+        return super._encodeBundleData(instanceId, riskpoolId, bundleId, token, displayName, expiryAt + lifetimeExtension);
+    }
+
+
+    // reads a single fixed width field of the bundle data directly from storage
+    function _getBundleField(NftId id, uint256 field)
+        internal
+        virtual
+        view
+        returns(uint256 value)
+    {
+        require(_getObjectType(id) == BUNDLE, "ERROR:CRG-420:NOT_BUNDLE");
+
+        if(!_hasCompactData(id)) {
+            return _readData(id, 32 * field, 32);
+        }
+
+        // abi.encodePacked(instanceId, uint64 riskpoolId, uint64 bundleId, token, uint40 expiryAt, displayName)
+        if(field == BUNDLE_DATA_INSTANCE_ID) { return _readData(id, 0, 32); }
+        if(field == BUNDLE_DATA_RISKPOOL_ID) { return _readData(id, 32, 8); }
+        if(field == BUNDLE_DATA_BUNDLE_ID) { return _readData(id, 40, 8); }
+        if(field == BUNDLE_DATA_TOKEN) { return _readData(id, 48, 20); }
+
+        return _readData(id, 68, 5);
+    }
+
+
+    // reads size bytes at offset of the object data directly from storage
+    // only works for data longer than 31 bytes, its content is then stored starting at slot keccak256(data.slot)
+    function _readData(NftId id, uint256 offset, uint256 size)
+        internal
+        virtual
+        view
+        returns(uint256 value)
+    {
+        bytes storage data = _info[id].data;
+        require(data.length > 31 && data.length >= offset + size, "ERROR:CRG-421:DATA_TOO_SHORT");
+
+        uint256 word0;
+        uint256 word1;
+
+        // solhint-disable-next-line no-inline-assembly
+        assembly ("memory-safe") {
+            mstore(0x00, data.slot)
+            let start := add(keccak256(0x00, 0x20), div(offset, 32))
+            word0 := sload(start)
+
+            // field continues in next slot
+            if gt(add(mod(offset, 32), size), 32) {
+                word1 := sload(add(start, 1))
+            }
+        }
+
+        uint256 shift = 8 * (offset % 32);
+        value = ((word0 << shift) | (word1 >> (256 - shift))) >> (8 * (32 - size));
+    }
+
+
+    function _encodeRegistryData(address registry)
+        internal
+        virtual override
+        view
+        returns(bytes memory data)
+    {
+        return abi.encodePacked(registry);
+    }
+
+
+    function _decodeRegistryData(bytes memory data)
+        internal
+        virtual override
+        view
+        returns(address registry)
+    {
+        return _toAddress(data, 0);
+    }
+
+
+    function _encodeTokenData(address token)
+        internal
+        virtual override
+        view
+        returns(bytes memory data)
+    {
+        return abi.encodePacked(token);
+    }
+
+
+    function _decodeTokenData(bytes memory data)
+        internal
+        virtual override
+        view
+        returns(address token)
+    {
+        return _toAddress(data, 0);
+    }
+
+
+    function _encodeInstanceData(
+        bytes32 instanceId,
+        address registry,
+        string memory displayName
+    )
+        internal
+        virtual override
+        view
+        returns(bytes memory data)
+    {
+        return abi.encodePacked(instanceId, registry, displayName);
+    }
+
+
+    function _decodeInstanceData(bytes memory data)
+        internal
+        virtual override
+        view
+        returns(
+            bytes32 instanceId,
+            address registry,
+            string memory displayName
+        )
+    {
+        instanceId = bytes32(_toUint(data, 0, 32));
+        registry = _toAddress(data, 32);
+        displayName = _toString(data, 52);
+    }
+
+
+    function _encodeComponentData(
+        bytes32 instanceId,
+        uint256 componentId,
+        address token
+    )
+        internal
+        virtual override
+        pure
+        returns(bytes memory)
+    {
+        return abi.encodePacked(instanceId, componentId.toUint64(), token);
+    }
+
+
+    function _decodeComponentData(bytes memory data)
+        internal
+        virtual override
+        view
+        returns(
+            bytes32 instanceId,
+            uint256 componentId,
+            address token
+        )
+    {
+        instanceId = bytes32(_toUint(data, 0, 32));
+        componentId = _toUint(data, 32, 8);
+        token = _toAddress(data, 40);
+    }
+
+
+    function _encodeBundleData(
+        bytes32 instanceId,
+        uint256 riskpoolId,
+        uint256 bundleId,
+        address token,
+        string memory displayName,
+        uint256 expiryAt
+    )
+        internal
+        virtual override
+        pure
+        returns(bytes memory)
+    {
+        return abi.encodePacked(
+            instanceId,
+            riskpoolId.toUint64(),
+            bundleId.toUint64(),
+            token,
+            expiryAt.toUint40(),
+            displayName);
+    }
+
+
+    function _decodeBundleData(bytes memory data)
+        internal
+        virtual override
+        view
+        returns(
+            bytes32 instanceId,
+            uint256 riskpoolId,
+            uint256 bundleId,
+            address token,
+            string memory displayName,
+            uint256 expiryAt
+        )
+    {
+        instanceId = bytes32(_toUint(data, 0, 32));
+        riskpoolId = _toUint(data, 32, 8);
+        bundleId = _toUint(data, 40, 8);
+        token = _toAddress(data, 48);
+        expiryAt = _toUint(data, 68, 5);
+        displayName = _toString(data, 73);
+    }
+
+
+    function _encodeStakeData(NftId target, ObjectType targetType)
+        internal
+        virtual override
+        pure
+        returns(bytes memory)
+    {
+        return abi.encodePacked(NftId.unwrap(target), ObjectType.unwrap(targetType));
+    }
+
+
+    function _decodeStakeData(bytes memory data)
+        internal
+        virtual override
+        view
+        returns(
+            NftId target,
+            ObjectType targetType
+        )
+    {
+        target = NftId.wrap(uint96(_toUint(data, 0, 12)));
+        targetType = ObjectType.wrap(uint8(_toUint(data, 12, 1)));
+    }
+
+
+    function _toUint(bytes memory data, uint256 offset, uint256 size)
+        internal
+        pure
+        returns(uint256 value)
+    {
+        require(data.length >= offset + size, "ERROR:CRG-440:DATA_TOO_SHORT");
+
+        // solhint-disable-next-line no-inline-assembly
+        assembly ("memory-safe") {
+            value := shr(mul(8, sub(32, size)), mload(add(add(data, 0x20), offset)))
+        }
+    }
+
+
+    function _toAddress(bytes memory data, uint256 offset)
+        internal
+        pure
+        returns(address)
+    {
+        return address(uint160(_toUint(data, offset, 20)));
+    }
+
+
+    function _toString(bytes memory data, uint256 offset)
+        internal
+        pure
+        returns(string memory)
+    {
+        require(data.length >= offset, "ERROR:CRG-441:DATA_TOO_SHORT");
+
+        bytes memory result = new bytes(data.length - offset);
+        for(uint256 i = 0; i < result.length; i++) {
+            result[i] = data[offset + i];
+        }
+
+        return string(result);
+    }
+
+
+    function _getDidPrefix(ChainId chain)
+        internal
+        virtual
+        view
+        returns(string memory)
+    {
+        NftId registryId = _object[chain][REGISTRY][0];
+        address registryAt = _getRegistryDataOf(registryId);
+
+        return string(
+            abi.encodePacked(
+                BASE_DID,
+                toString(chain),
+                "_erc721:",
+                toString(registryAt),
+                "_"));
+    }
+}
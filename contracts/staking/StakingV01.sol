@@ -666,6 +666,7 @@ contract StakingV01 is
 
     function getBundleState(NftId target)
         public
+        virtual
         view
         onlySameChain(target)
         returns(
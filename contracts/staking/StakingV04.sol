@@ -0,0 +1,353 @@
+// SPDX-License-Identifier: Apache-2.0
+pragma solidity ^0.8.19;
+
+import {ChainId, Timestamp, blockTimestamp, thisChainId, toTimestamp, zeroTimestamp} from "../shared/IBaseTypes.sol";
+import {Version, toVersion, toVersionPart} from "../shared/IVersionType.sol";
+
+import {IInstanceServiceFacade} from "../registry/IInstanceServiceFacade.sol";
+import {IChainRegistry, ObjectType} from "../registry/ChainRegistryV01.sol";
+import {ChainRegistryV03} from "../registry/ChainRegistryV03.sol";
+import {NftId} from "../registry/IChainNft.sol";
+
+import {StakingV03} from "./StakingV03.sol";
+
+
+// requires the registry to be upgraded to ChainRegistryV03 (or later)
+contract StakingV04 is
+    StakingV03
+{
+
+    // bundle data from registry and instance, loaded once per bundle
+    struct BundleInfo {
+        NftId bundleNft;
+        bytes32 instanceId;
+        uint256 riskpoolId;
+        uint256 bundleId;
+        address token;
+        string displayName;
+        IChainRegistry.ObjectState objectState;
+        IInstanceServiceFacade.BundleState bundleState;
+        Timestamp expiryAt;
+        bool stakingSupported;
+        bool unstakingSupported;
+        uint256 stakeBalance;
+    }
+
+    // same value as ChainRegistryV01.BUNDLE, avoids external calls to the registry
+    ObjectType internal constant BUNDLE_OBJECT_TYPE = ObjectType.wrap(40);
+
+
+    // IMPORTANT 1. version needed for upgradable versions
+    // _activate is using this to check if this is a new version
+    // and if this version is higher than the last activated version
+    function version()
+        public
+        virtual override
+        pure
+        returns(Version)
+    {
+        return toVersion(
+            toVersionPart(1),
+            toVersionPart(2),
+            toVersionPart(0));
+    }
+
+
+    // IMPORTANT 2. activate implementation needed
+    // is used by proxy admin in its upgrade function
+    function activate(address implementation, address activatedBy)
+        external
+        virtual override
+    {
+        // keep track of version history
+        // do some upgrade checks
+        _activate(implementation, activatedBy);
+
+        // upgrade version
+        _version = version();
+    }
+
+
+    function isStakingSupported(NftId target)
+        public
+        virtual override
+        view
+        returns(bool isSupported)
+    {
+        (, ObjectType targetType, ) = _getRegistryV03().getObjectInfo(target);
+        if(!_stakingSupported[targetType]) {
+            return false;
+        }
+
+        // deal with special cases
+        if(targetType == BUNDLE_OBJECT_TYPE) {
+            return _isStakingSupportedForBundle(target);
+        }
+
+        return true;
+    }
+
+
+    function isUnstakingSupported(NftId target)
+        public
+        virtual override
+        view
+        returns(bool isSupported)
+    {
+        (, ObjectType targetType, ) = _getRegistryV03().getObjectInfo(target);
+        if(!_stakingSupported[targetType]) {
+            return false;
+        }
+
+        // deal with special cases
+        if(targetType == BUNDLE_OBJECT_TYPE) {
+            return _isUnstakingSupportedForBundle(target);
+        }
+
+        return true;
+    }
+
+
+    function capitalSupport(NftId target)
+        external
+        virtual override
+        view
+        returns(uint256 capitalAmount)
+    {
+        ChainRegistryV03 registry = _getRegistryV03();
+        (ChainId chain, ObjectType targetType, ) = registry.getObjectInfo(target);
+
+        // check target type staking support
+        require(_stakingSupported[targetType], "ERROR:STK-410:TARGET_TYPE_NOT_SUPPORTED");
+        require(targetType == BUNDLE_OBJECT_TYPE, "ERROR:STK-411:TARGET_TYPE_NOT_BUNDLE");
+
+        return calculateCapitalSupport(
+            chain,
+            registry.getBundleToken(target),
+            _targetStakeBalance[target]);
+    }
+
+
+    function calculateLockingUntil(NftId target)
+        public
+        virtual override
+        view
+        returns(Timestamp lockedUntil)
+    {
+        ChainRegistryV03 registry = _getRegistryV03();
+        (, ObjectType targetType, ) = registry.getObjectInfo(target);
+
+        if(targetType == BUNDLE_OBJECT_TYPE) {
+            return toTimestamp(registry.getBundleExpiryAt(target));
+        }
+
+        return zeroTimestamp();
+    }
+
+
+    function getBundleState(NftId target)
+        public
+        virtual override
+        view
+        returns(
+            IChainRegistry.ObjectState objectState,
+            IInstanceServiceFacade.BundleState bundleState,
+            Timestamp expiryAt
+        )
+    {
+        // single pass over registry and instance data
+        BundleInfo memory info = _loadBundleInfo(target);
+
+        return (
+            info.objectState,
+            info.bundleState,
+            info.expiryAt);
+    }
+
+
+    function getBundleInfo(NftId bundleNft)
+        external
+        virtual override
+        view
+        returns(
+            bytes32 instanceId,
+            uint256 riskpoolId,
+            uint256 bundleId,
+            address token,
+            string memory displayName,
+            IInstanceServiceFacade.BundleState bundleState,
+            Timestamp expiryAt,
+            bool stakingSupported,
+            bool unstakingSupported,
+            uint256 stakeAmount
+        )
+    {
+        BundleInfo memory info = _getBundleInfo(bundleNft);
+
+        return (
+            info.instanceId,
+            info.riskpoolId,
+            info.bundleId,
+            info.token,
+            info.displayName,
+            info.bundleState,
+            info.expiryAt,
+            info.stakingSupported,
+            info.unstakingSupported,
+            info.stakeBalance);
+    }
+
+
+    function getBundleInfos(NftId [] calldata bundleNfts)
+        external
+        virtual
+        view
+        returns(BundleInfo [] memory infos)
+    {
+        infos = new BundleInfo[](bundleNfts.length);
+
+        for(uint256 i = 0; i < bundleNfts.length; i++) {
+            infos[i] = _getBundleInfo(bundleNfts[i]);
+        }
+    }
+
+
+    function _getBundleInfo(NftId bundleNft)
+        internal
+        virtual
+        view
+        returns(BundleInfo memory info)
+    {
+        info = _loadBundleInfo(bundleNft);
+
+        // derived flags share the data loaded above
+        info.stakingSupported = _isStakingSupportedForState(info.bundleState, info.expiryAt);
+        info.unstakingSupported = _isUnstakingSupportedForState(info.bundleState, info.expiryAt);
+        info.stakeBalance = _targetStakeBalance[bundleNft];
+    }
+
+
+    function _loadBundleInfo(NftId bundleNft)
+        internal
+        virtual
+        view
+        returns(BundleInfo memory info)
+    {
+        ChainRegistryV03 registry = _getRegistryV03();
+
+        uint256 expiryAt;
+        info.bundleNft = bundleNft;
+        info.objectState = _getBundleObjectState(registry, bundleNft);
+
+        (
+            info.instanceId,
+            info.riskpoolId,
+            info.bundleId,
+            info.token,
+            info.displayName,
+            expiryAt
+        ) = registry.decodeBundleData(bundleNft);
+
+        info.expiryAt = toTimestamp(expiryAt);
+
+        IInstanceServiceFacade instanceService = _registry.getInstanceServiceFacade(info.instanceId);
+        info.bundleState = instanceService.getBundle(info.bundleId).state;
+    }
+
+
+    function _getBundleObjectState(ChainRegistryV03 registry, NftId bundleNft)
+        internal
+        virtual
+        view
+        returns(IChainRegistry.ObjectState state)
+    {
+        ChainId chain;
+        ObjectType targetType;
+        (chain, targetType, state) = registry.getObjectInfo(bundleNft);
+
+        require(chain == thisChainId(), "ERROR:STK-400:DIFFERENT_CHAIN_NOT_SUPPORTED");
+        require(targetType == BUNDLE_OBJECT_TYPE, "ERROR:STK-401:OBJECT_TYPE_NOT_BUNDLE");
+    }
+
+
+    function _isStakingSupportedForBundle(NftId target)
+        internal
+        virtual override
+        view
+        returns(bool isSupported)
+    {
+        (
+            , // not using IChainRegistry.ObjectState objectState
+            IInstanceServiceFacade.BundleState bundleState,
+            Timestamp expiryAt
+        ) = getBundleState(target);
+
+        return _isStakingSupportedForState(bundleState, expiryAt);
+    }
+
+
+    function _isUnstakingSupportedForBundle(NftId target)
+        internal
+        virtual override
+        view
+        returns(bool isSupported)
+    {
+        (
+            , // not using IChainRegistry.ObjectState objectState
+            IInstanceServiceFacade.BundleState bundleState,
+            Timestamp expiryAt
+        ) = getBundleState(target);
+
+        return _isUnstakingSupportedForState(bundleState, expiryAt);
+    }
+
+
+    function _isStakingSupportedForState(
+        IInstanceServiceFacade.BundleState bundleState,
+        Timestamp expiryAt
+    )
+        internal
+        virtual
+        view
+        returns(bool isSupported)
+    {
+        // only active and non-expired bundles are available for staking
+        return bundleState == IInstanceServiceFacade.BundleState.Active
+            && !_isExpired(expiryAt);
+    }
+
+
+    function _isUnstakingSupportedForState(
+        IInstanceServiceFacade.BundleState bundleState,
+        Timestamp expiryAt
+    )
+        internal
+        virtual
+        view
+        returns(bool isSupported)
+    {
+        // closed, burned and expired bundles are available for unstaking
+        return bundleState == IInstanceServiceFacade.BundleState.Closed
+            || bundleState == IInstanceServiceFacade.BundleState.Burned
+            || _isExpired(expiryAt);
+    }
+
+
+    function _isExpired(Timestamp expiryAt)
+        internal
+        view
+        returns(bool isExpired)
+    {
+        return expiryAt > zeroTimestamp() && expiryAt < blockTimestamp();
+    }
+
+
+    function _getRegistryV03()
+        internal
+        virtual
+        view
+        returns(ChainRegistryV03)
+    {
+        return ChainRegistryV03(address(_registry));
+    }
+}
@@ -0,0 +1,55 @@
+// SPDX-License-Identifier: Apache-2.0
+pragma solidity ^0.8.19;
+
+import {ChainId} from "../shared/IBaseTypes.sol";
+
+import {ChainRegistryV03} from "../registry/ChainRegistryV03.sol";
+import {ObjectType} from "../registry/IChainRegistry.sol";
+import {NftId} from "../registry/IChainNft.sol";
+
+// registry to seed test chains with objects exported from another registry
+// see scripts/registry_export.py, must not be used on mainnet
+contract ChainRegistryImport is
+    ChainRegistryV03
+{
+
+    struct ImportObject {
+        address owner;
+        ChainId chain;
+        ObjectType objectType;
+        ObjectState state;
+        string uri;
+        bytes data;
+    }
+
+
+    event LogChainRegistryObjectsImported(uint256 objects, address importedBy);
+
+
+    // mints objects without the checks of the register functions
+    // data needs to be in the compact encoding of ChainRegistryV03
+    function importObjects(ImportObject [] calldata objects)
+        external
+        virtual
+        onlyOwner
+        returns(NftId [] memory ids)
+    {
+        require(block.chainid != 1, "ERROR:CRG-900:MAINNET_NOT_SUPPORTED");
+        require(objects.length > 0, "ERROR:CRG-901:NO_OBJECTS");
+
+        ids = new NftId[](objects.length);
+
+        for(uint256 i = 0; i < objects.length; i++) {
+            ImportObject calldata object = objects[i];
+            ids[i] = _safeMintObject(
+                object.owner,
+                object.chain,
+                object.objectType,
+                object.state,
+                object.uri,
+                object.data);
+        }
+
+        emit LogChainRegistryObjectsImported(objects.length, msg.sender);
+    }
+}
@@ -0,0 +1,315 @@
+import csv
+import os
+import time
+
+from decimal import Decimal
+from functools import partial
+
+from brownie import (
+    web3,
+    ChainRegistryV01,
+    StakingV03,
+)
+
+# optional, exports fall back to csv without pyarrow
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from scripts.async_reads import AsyncReader
+from scripts.registry_data import (
+    decode_data,
+    OBJECT_TYPES,
+    STAKE,
+)
+from scripts.util import contract_from_address
+
+ENV_REGISTRY_ADDRESS = 'ANALYTICS_REGISTRY_ADDRESS'
+ENV_STAKING_ADDRESS = 'ANALYTICS_STAKING_ADDRESS'
+ENV_OUTPUT_DIR = 'ANALYTICS_OUTPUT_DIR'
+ENV_FORMAT = 'ANALYTICS_FORMAT'
+ENV_BATCH_SIZE = 'ANALYTICS_BATCH_SIZE'
+
+FORMAT_PARQUET = 'parquet'
+FORMAT_ARROW = 'arrow' # arrow ipc file
+FORMAT_CSV = 'csv'
+FORMATS = [FORMAT_PARQUET, FORMAT_ARROW, FORMAT_CSV]
+
+OBJECTS_FILE = 'registry_objects.{}'
+STAKES_FILE = 'staking_stakes.{}'
+
+BATCH_SIZE_DEFAULT = 1000 # rows per batch, bounds memory use
+MAX_CONCURRENCY_DEFAULT = 16
+
+COLUMN_INT = 'int'
+COLUMN_UINT256 = 'uint256'
+COLUMN_STR = 'str'
+COLUMN_HEX = 'hex'
+
+# nft info and decoded object data, data columns are empty for object types without the field
+OBJECT_COLUMNS = [
+    ('id', COLUMN_INT),
+    ('chain', COLUMN_HEX),
+    ('objectType', COLUMN_INT),
+    ('state', COLUMN_INT),
+    ('owner', COLUMN_STR),
+    ('uri', COLUMN_STR),
+    ('mintedIn', COLUMN_INT),
+    ('updatedIn', COLUMN_INT),
+    ('version', COLUMN_INT),
+    ('registry', COLUMN_STR),
+    ('token', COLUMN_STR),
+    ('instanceId', COLUMN_HEX),
+    ('displayName', COLUMN_STR),
+    ('componentId', COLUMN_INT),
+    ('riskpoolId', COLUMN_INT),
+    ('bundleId', COLUMN_INT),
+    ('expiryAt', COLUMN_INT),
+    ('target', COLUMN_INT),
+    ('targetType', COLUMN_INT),
+]
+
+STAKE_COLUMNS = [
+    ('id', COLUMN_INT),
+    ('target', COLUMN_INT),
+    ('stakeBalance', COLUMN_UINT256),
+    ('rewardBalance', COLUMN_UINT256),
+    ('createdAt', COLUMN_INT),
+    ('updatedAt', COLUMN_INT),
+    ('version', COLUMN_INT),
+    ('lockedUntil', COLUMN_INT),
+]
+
+
+def help():
+    print('from scripts.analytics_export import export_analytics, help')
+    print("export_analytics(registry, staking, 'analytics') # opt params file_format='{}', batch_size={}, max_concurrency={}"
+        .format(default_format(), BATCH_SIZE_DEFAULT, MAX_CONCURRENCY_DEFAULT))
+    print()
+    print('# from the command line (settings via env variables {}, {}, {}, {}, {})'
+        .format(ENV_REGISTRY_ADDRESS, ENV_STAKING_ADDRESS, ENV_OUTPUT_DIR, ENV_FORMAT, ENV_BATCH_SIZE))
+    print('brownie run scripts/analytics_export.py --network mainnet')
+
+
+def main():
+    registry_address = os.getenv(ENV_REGISTRY_ADDRESS)
+    assert registry_address, 'registry address missing, set env variable {}'.format(ENV_REGISTRY_ADDRESS)
+
+    registry = contract_from_address(ChainRegistryV01, registry_address)
+    staking_address = os.getenv(ENV_STAKING_ADDRESS) or registry.getStaking()
+
+    export_analytics(
+        registry,
+        contract_from_address(StakingV03, staking_address),
+        os.getenv(ENV_OUTPUT_DIR, '.'),
+        file_format=os.getenv(ENV_FORMAT),
+        batch_size=int(os.getenv(ENV_BATCH_SIZE, BATCH_SIZE_DEFAULT)))
+
+
+def default_format() -> str:
+    return FORMAT_PARQUET if pyarrow else FORMAT_CSV
+
+
+def export_analytics(
+    registry,
+    staking=None,
+    output_dir='.',
+    file_format=None,
+    batch_size=BATCH_SIZE_DEFAULT,
+    max_concurrency=MAX_CONCURRENCY_DEFAULT
+) -> dict:
+    # streams registry objects and stake infos in batches of batch_size rows, all reads are pinned to one block
+    start = time.perf_counter()
+    file_format = file_format or default_format()
+
+    assert file_format in FORMATS, 'unknown format {}, use one of {}'.format(file_format, FORMATS)
+    assert file_format == FORMAT_CSV or pyarrow, 'format {} requires pyarrow, use {}'.format(file_format, FORMAT_CSV)
+
+    block = web3.eth.block_number
+    this_chain = str(registry.toChain(web3.chain_id))
+
+    def at(fn, *args):
+        return partial(fn, *args, block_identifier=block)
+
+    os.makedirs(output_dir, exist_ok=True)
+    objects_file = os.path.join(output_dir, OBJECTS_FILE.format(file_format))
+    stakes_file = os.path.join(output_dir, STAKES_FILE.format(file_format))
+
+    objects_writer = open_writer(objects_file, OBJECT_COLUMNS, file_format)
+    stakes_writer = open_writer(stakes_file, STAKE_COLUMNS, file_format) if staking else None
+
+    objects = 0
+    stakes = 0
+    skipped = []
+
+    try:
+        with AsyncReader(max_concurrency) as reader:
+            for nft_ids in _nft_id_batches(reader, at, registry, block, batch_size):
+                infos = reader.read([at(registry.getNftInfo, nft_id) for nft_id in nft_ids])
+                owners = reader.read([at(registry.ownerOf, nft_id) for nft_id in nft_ids])
+
+                rows = [_object_row(info.dict(), owner, skipped) for (info, owner) in zip(infos, owners)]
+                objects_writer.write(rows)
+                objects += len(rows)
+
+                # stake infos are only available for stakes on this chain
+                stake_ids = [row['id'] for row in rows if row['objectType'] == STAKE and str(row['chain']) == this_chain]
+
+                if stakes_writer and stake_ids:
+                    stake_infos = reader.read([at(staking.getInfo, stake_id) for stake_id in stake_ids])
+                    stakes_writer.write([info.dict() for info in stake_infos])
+                    stakes += len(stake_ids)
+
+                print('exported {} objects, {} stakes'.format(objects, stakes))
+    finally:
+        objects_writer.close()
+
+        if stakes_writer:
+            stakes_writer.close()
+
+    summary = {
+        'block': block,
+        'format': file_format,
+        'objects': objects,
+        'stakes': stakes,
+        'skipped': len(skipped),
+        'files': [objects_file, stakes_file] if staking else [objects_file],
+        'elapsed': time.perf_counter() - start,
+    }
+
+    print('exported {} objects and {} stakes at block {} to {} in {:.1f}s'.format(
+        objects, stakes, block, ', '.join(summary['files']), summary['elapsed']))
+
+    if skipped:
+        print('WARNING data of {} objects not decoded: {}'.format(len(skipped), skipped))
+
+    return summary
+
+
+def open_writer(file_name, columns, file_format):
+    if file_format == FORMAT_CSV:
+        return CsvWriter(file_name, columns)
+
+    return ArrowWriter(file_name, columns, file_format)
+
+
+class CsvWriter:
+
+    def __init__(self, file_name, columns):
+        self.columns = columns
+        self.file = open(file_name, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for (name, _) in columns])
+
+    def write(self, rows):
+        for row in rows:
+            self.writer.writerow([
+                '' if row.get(name) is None else _to_value(row[name], kind)
+                for (name, kind) in self.columns])
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowWriter:
+
+    # uint256 amounts fit into decimal256 up to 10^76
+    TYPES = {
+        COLUMN_INT: lambda: pyarrow.int64(),
+        COLUMN_UINT256: lambda: pyarrow.decimal256(76, 0),
+        COLUMN_STR: lambda: pyarrow.string(),
+        COLUMN_HEX: lambda: pyarrow.string(),
+    }
+
+    def __init__(self, file_name, columns, file_format):
+        self.columns = columns
+        self.schema = pyarrow.schema([(name, self.TYPES[kind]()) for (name, kind) in columns])
+
+        if file_format == FORMAT_PARQUET:
+            self.writer = pyarrow.parquet.ParquetWriter(file_name, self.schema)
+        else:
+            self.writer = pyarrow.ipc.new_file(file_name, self.schema)
+
+    def write(self, rows):
+        # one row group/record batch per write
+        arrays = []
+
+        for (name, kind) in self.columns:
+            values = [None if row.get(name) is None else _to_value(row[name], kind) for row in rows]
+
+            if kind == COLUMN_UINT256:
+                values = [None if value is None else Decimal(value) for value in values]
+
+            arrays.append(pyarrow.array(values, type=self.TYPES[kind]()))
+
+        batch = pyarrow.record_batch(arrays, schema=self.schema)
+
+        if isinstance(self.writer, pyarrow.parquet.ParquetWriter):
+            self.writer.write_table(pyarrow.Table.from_batches([batch]))
+        else:
+            self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+
+
+def _nft_id_batches(reader, at, registry, block, batch_size):
+    # nft ids are read lazily, only one batch is held in memory
+    chains = reader.read([
+        at(registry.getChainId, idx)
+        for idx in range(registry.chains(block_identifier=block))])
+
+    chain_types = [(chain, t) for chain in chains for t in OBJECT_TYPES]
+    counts = reader.read([at(registry.objects, chain, t) for (chain, t) in chain_types])
+
+    calls = []
+
+    for ((chain, t), count) in zip(chain_types, counts):
+        for idx in range(count):
+            calls.append(at(registry.getNftId, chain, t, idx))
+
+            if len(calls) == batch_size:
+                yield reader.read(calls)
+                calls = []
+
+    if calls:
+        yield reader.read(calls)
+
+
+def _object_row(info, owner, skipped) -> dict:
+    # ids of objects with malformed data are added to skipped, their rows have no data columns
+    row = {
+        'id': info['id'],
+        'chain': info['chain'],
+        'objectType': info['objectType'],
+        'state': info['state'],
+        'owner': owner,
+        'uri': info['uri'],
+        'mintedIn': info['mintedIn'],
+        'updatedIn': info['updatedIn'],
+        'version': info['version'],
+    }
+
+    data = bytes(info['data'])
+
+    # protocol, chain and policy objects have no decodable data
+    if len(data) > 0:
+        try:
+            row.update(decode_data(info['objectType'], data, info['version']))
+        except ValueError as e:
+            print('WARNING skipping data of object {}: {}'.format(info['id'], e))
+            skipped.append(info['id'])
+
+    return row
+
+
+def _to_value(value, kind):
+    if kind == COLUMN_HEX:
+        return web3.toHex(value) if isinstance(value, bytes) else str(value)
+    elif kind == COLUMN_STR:
+        return str(value)
+
+    return int(value)
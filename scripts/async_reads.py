@@ -0,0 +1,73 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+
+# max number of eth_calls in flight at the same time
+MAX_CONCURRENCY_DEFAULT = 8
+
+
+class AsyncReader:
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY_DEFAULT):
+        self.max_concurrency = max_concurrency
+
+        # brownie/web3 calls are blocking, the pool size bounds the parallelism
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix='async-reads')
+
+
+    async def call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+
+    async def gather(self, calls, return_exceptions=False):
+        # calls: list of (fn, arg1, arg2, ...) tuples or zero-arg callables
+        return await asyncio.gather(
+            *[self.call(*_as_tuple(call)) for call in calls],
+            return_exceptions=return_exceptions)
+
+
+    def read(self, calls, return_exceptions=False) -> list:
+        return asyncio.run(self.gather(calls, return_exceptions))
+
+
+    def read_dict(self, calls, return_exceptions=False) -> dict:
+        keys = list(calls.keys())
+        results = self.read([calls[key] for key in keys], return_exceptions)
+
+        return dict(zip(keys, results))
+
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_all(calls, max_concurrency=MAX_CONCURRENCY_DEFAULT, return_exceptions=False) -> list:
+    with AsyncReader(max_concurrency) as reader:
+        return reader.read(calls, return_exceptions)
+
+
+def read_dict(calls, max_concurrency=MAX_CONCURRENCY_DEFAULT, return_exceptions=False) -> dict:
+    with AsyncReader(max_concurrency) as reader:
+        return reader.read_dict(calls, return_exceptions)
+
+
+def is_error(result) -> bool:
+    return isinstance(result, Exception)
+
+
+def _as_tuple(call):
+    if callable(call):
+        return (call,)
+
+    return tuple(call)
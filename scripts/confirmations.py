@@ -0,0 +1,126 @@
+import threading
+
+from concurrent.futures import Future, wait
+
+from brownie import web3
+
+from scripts.async_reads import AsyncReader, is_error
+
+POLL_INTERVAL_DEFAULT = 2.0 # seconds between block number polls
+TIMEOUT_DEFAULT = 600
+MAX_CONCURRENCY_DEFAULT = 8
+
+# shared tracker, see get_tracker
+_tracker = None
+
+
+class ConfirmationTracker:
+    # resolves pending transactions once they have the required number of confirmations
+    # a single polling thread checks the block number and fetches receipts for all pending transactions in parallel
+
+    def __init__(self, poll_interval=POLL_INTERVAL_DEFAULT, max_concurrency=MAX_CONCURRENCY_DEFAULT):
+        self.poll_interval = poll_interval
+        self.reader = AsyncReader(max_concurrency)
+
+        self._pending = {} # tx hash -> (required confirmations, future)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+
+    def track(self, tx, confirmations) -> Future:
+        # returns a future that resolves to the tx receipt, tx may be a brownie tx or a tx hash
+        txid = tx if isinstance(tx, str) else tx.txid
+
+        with self._lock:
+            if txid in self._pending:
+                (required, future) = self._pending[txid]
+                self._pending[txid] = (max(required, confirmations), future)
+            else:
+                future = Future()
+                self._pending[txid] = (confirmations, future)
+
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, name='confirmation-tracker', daemon=True)
+                self._thread.start()
+
+        # check right away, covers instant mining chains without new blocks
+        self._wakeup.set()
+
+        return future
+
+
+    def wait(self, txs, confirmations, timeout=TIMEOUT_DEFAULT) -> list:
+        futures = [self.track(tx, confirmations) for tx in txs]
+        (done, not_done) = wait(futures, timeout)
+
+        if not_done:
+            raise TimeoutError('{} of {} transactions not confirmed after {}s'.format(
+                len(not_done), len(futures), timeout))
+
+        return [future.result() for future in futures]
+
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+    def close(self):
+        self.reader.close()
+
+
+    def _run(self):
+        last_block = None
+
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+
+            forced = self._wakeup.is_set()
+            self._wakeup.clear()
+
+            try:
+                block = web3.eth.block_number
+
+                if forced or block != last_block:
+                    self._check(block)
+                    last_block = block
+            except Exception as e:
+                # transient rpc errors, pending transactions are checked again with the next poll
+                print('confirmation tracker: {}'.format(e))
+
+            self._wakeup.wait(self.poll_interval)
+
+
+    def _check(self, block):
+        with self._lock:
+            txids = list(self._pending.keys())
+
+        # receipts are fetched on every check, a reorg moves the tx to a different block
+        receipts = self.reader.read(
+            [(web3.eth.get_transaction_receipt, txid) for txid in txids],
+            return_exceptions=True)
+
+        with self._lock:
+            for txid, receipt in zip(txids, receipts):
+                # not yet mined
+                if is_error(receipt) or receipt is None:
+                    continue
+
+                (required, future) = self._pending[txid]
+                if block - receipt['blockNumber'] + 1 >= required:
+                    del self._pending[txid]
+                    future.set_result(receipt)
+
+
+def get_tracker() -> ConfirmationTracker:
+    global _tracker
+
+    if not _tracker:
+        _tracker = ConfirmationTracker()
+
+    return _tracker
+
@@ -15,12 +15,35 @@ from brownie import (
     ChainNft,
     ChainRegistryV01,
     StakingV03,
+    RewardHelper,
+    StakingMessageHelper,
 )
 
+from scripts.async_reads import (
+    is_error,
+    read_all,
+    read_dict,
+)
+
+from scripts.fee_oracle import (
+    URGENCY_DEFAULT,
+    apply_fees,
+    get_fee_oracle,
+)
+
+from scripts.telemetry import (
+    step,
+    timed_step,
+)
+
+from scripts.ufixed import UFixed
+
 from scripts.util import (
+    CHAIN_IDS_REQUIRING_CONFIRMATIONS,
     contract_from_address,
     get_package,
     unix_timestamp,
+    wait_for_all_confirmations,
     wait_for_confirmations,
 )
 
@@ -39,7 +62,8 @@ from scripts.const import (
     ZERO_ADDRESS,
 )
 
-GAS_PRICE_SAFETY_FACTOR = 1.25
+GAS_PRICE_SAFETY_FACTOR = 1.25 # legacy gas price
+MAX_FEE_SAFETY_FACTOR = 1.0 # max fee of the fee oracle includes the base fee headroom already
 
 GAS_0 = 0
 GAS_S = 1 * 10**6
@@ -51,7 +75,7 @@ GAS_REGISTRY = {
     INSTANCE_OPERATOR: GAS_SM, # dip,usdt token for testnets
     PROXY_ADMIN_OWNER: GAS_M, # proxy adins for registry, staking
     REGISTRY_OWNER: GAS_L, # registry contract, some wiring
-    STAKING_OWNER: GAS_M, # staking contract some wiring
+    STAKING_OWNER: GAS_L, # staking contract, reward/message helpers, some wiring
     STAKER1: GAS_S
 }
 
@@ -67,6 +91,8 @@ PROXY_ADMIN_CONTRACT = OwnableProxyAdmin
 NFT_CONTRACT = ChainNft
 REGISTRY_CONTRACT = ChainRegistryV01
 STAKING_CONTRACT = StakingV03
+REWARD_HELPER_CONTRACT = RewardHelper
+MESSAGE_HELPER_CONTRACT = StakingMessageHelper
 
 MOCK_INSTANCE_CONTRACT = MockInstance
 MOCK_REGISTRY_CONTRACT = MockInstanceRegistry
@@ -100,8 +126,11 @@ STATE_BUNDLE = {
     3: 'Burned'
 }
 
-# load openzeppelin contracts
-oz = get_package('OpenZeppelin')
+
+def get_oz():
+    # openzeppelin contracts are loaded on first use, not when importing this module
+    return get_package('OpenZeppelin')
+
 
 def help():
     print('from scripts.util import contract_from_address, new_accounts, get_package')
@@ -109,7 +138,7 @@ def help():
     print('a = get_accounts() # opt param mnemonic=None')
     print('(a, mnemonic) = new_accounts() # opt param count=20')
     print('stakeholder_accounts = get_stakeholder_accounts(a)')
-    print('check_funds(stakeholder_accounts)')
+    print("check_funds(stakeholder_accounts) # opt param urgency='medium' (low, medium, high)")
     print('# amend_funds(stakeholder_accounts)')
     print()
     print('(registry, staking, nft, nft_ids, dip, usdt, instance_service, instance_operator, registry_owner, staking_owner, proxy_admin) = all_in_1(stakeholder_accounts)')
@@ -117,8 +146,10 @@ def help():
     print("registry.getNftInfo(nft_ids['stake']).dict()")
     print("registry.decodeStakeData(nft_ids['stake']).dict()")
     print("staking.getInfo(nft_ids['stake']).dict()")
+    print('verify_deploy(stakeholder_accounts, registry, staking, dip)')
 
 
+@timed_step
 def link_to_product(
     staking_address, 
     product_address, 
@@ -128,8 +159,10 @@ def link_to_product(
     instance_name = None,
     reward_rate = 0.125,
     staking_rate = 0.100,
-    bundle_lifetime = 14 * 24 * 3600
+    bundle_lifetime = 14 * 24 * 3600,
+    urgency = URGENCY_DEFAULT
 ):
+    set_fees(urgency)
 
     print('1) obtaining staking and registry contracts')
     staking = contract_from_address(StakingV03, staking_address)
@@ -137,11 +170,18 @@ def link_to_product(
 
     print('2) obtaining product and token contracts')
     product = contract_from_address(interface.IProductFacade, product_address)
-    token = contract_from_address(interface.IERC20Metadata, product.getToken())
+    (
+        token_address,
+        registry_address,
+        riskpool_id
+    ) = read_all([
+        product.getToken,
+        product.getRegistry,
+        product.getRiskpoolId])
 
-    print('3) obtaining instance service')
-    registry_address = product.getRegistry()
+    token = contract_from_address(interface.IERC20Metadata, token_address)
 
+    print('3) obtaining instance service')
     (
         is_contract,
         contract_size,
@@ -163,84 +203,113 @@ def link_to_product(
     
     print('4) obtaining riskpool contract')
     instance_service = contract_from_address(interface.IInstanceServiceFacade, instance_service_address)
-    (riskpool, riskpool_id) = get_riskpool(instance_service, product)
-    instance_id = instance_service.getInstanceId()
+    riskpool = get_riskpool_for_id(instance_service, riskpool_id)
+
+    # pre-flight checks: independent reads are fetched concurrently
+    # nft id reads for objects that are not yet registered revert, these are returned as exceptions
+    r = read_dict({
+        'token_nft_id': (registry.getTokenNftId, chain_id, token),
+        'instance_nft_id': (registry.getInstanceNftId, instance_id),
+        'riskpool_nft_id': (registry.getComponentNftId, instance_id, riskpool_id),
+    }, return_exceptions=True)
+
+    # all other reads must succeed
+    r.update(read_dict({
+        'token_symbol': token.symbol,
+        'active_bundles': riskpool.activeBundles,
+        'reward_rate': staking.rewardRate,
+        'staking_rate': (staking.stakingRate, chain_id, token),
+        'riskpool_staking': riskpool.getStaking,
+    }))
 
     fro = {'from': registry_owner}
     fso = {'from': staking_owner}
     frk = {'from': riskpool_keeper}
 
-    print('5) token {} registration'.format(token.symbol()))
-    try:
-        nft_id = registry.getTokenNftId(chain_id, token)
-        print('   token already registered (nftId: {})'.format(nft_id))
-    except Exception as e:
-        tx = registry.registerToken(chain_id, token, '', fro)
+    print('5) token {} registration'.format(r['token_symbol']))
+    if not is_error(r['token_nft_id']):
+        print('   token already registered (nftId: {})'.format(r['token_nft_id']))
+    else:
+        with step('registerToken'):
+            tx = registry.registerToken(chain_id, token, '', fro)
         print_registry_tx_info(tx)
 
     print("6) instance '{}' registration (instance id: {})".format(instance_name, instance_id))
-    try:
-        nft_id = registry.getInstanceNftId(instance_id)
-        print('   instance already registered (nftId: {})'.format(nft_id))
-    except Exception as e:
-        tx = registry.registerInstance(registry_address, instance_name, '', fro)
-        wait_for_confirmations(tx)
+    if not is_error(r['instance_nft_id']):
+        print('   instance already registered (nftId: {})'.format(r['instance_nft_id']))
+    else:
+        with step('registerInstance'):
+            tx = registry.registerInstance(registry_address, instance_name, '', fro)
+            wait_for_confirmations(tx)
         print_registry_tx_info(tx)
 
     print('7) riskpool {} registration'.format(riskpool_id))
-    try:
-        nft_id = registry.getComponentNftId(instance_id, riskpool_id)
-        print('   token already registered (nftId: {})'.format(nft_id))
-    except Exception as e:
-        tx = registry.registerComponent(instance_id, riskpool_id, '', fro)
-        wait_for_confirmations(tx)
+    if not is_error(r['riskpool_nft_id']):
+        print('   token already registered (nftId: {})'.format(r['riskpool_nft_id']))
+    else:
+        with step('registerComponent'):
+            tx = registry.registerComponent(instance_id, riskpool_id, '', fro)
+            wait_for_confirmations(tx)
         print_registry_tx_info(tx)
 
-    active_bundles = riskpool.activeBundles()
+    active_bundles = r['active_bundles']
     if active_bundles > 0:
         print('8) bundle registration ({} bundles)'.format(active_bundles))
 
+        bundle_ids = read_all([(riskpool.getActiveBundleId, i) for i in range(active_bundles)])
+        bundle_nft_ids = read_all(
+            [(registry.getBundleNftId, instance_id, bundle_id) for bundle_id in bundle_ids],
+            return_exceptions=True)
+
+        bundle_txs = []
+
         for i in range(active_bundles):
-            bundle_id = riskpool.getActiveBundleId(i)
+            bundle_id = bundle_ids[i]
+            nft_id = bundle_nft_ids[i]
 
-            try:
-                nft_id = registry.getBundleNftId(instance_id, bundle_id)
+            if not is_error(nft_id):
                 print('   bundle {} already registered (bundleId: {}, nftId: {})'
                     .format(i+1, bundle_id, nft_id))
-            except Exception as e:
+            else:
                 bundle_name = 'bundle-{}'.format(i)
                 bundle_expiry_at = unix_timestamp() + bundle_lifetime
                 print('   register bundle {} (bundleId: {}, lifetime: {})'
                     .format(i+1, bundle_id, bundle_lifetime))
-                tx = registry.registerBundle(
-                    instance_id,
-                    riskpool_id,
-                    bundle_id,
-                    bundle_name,
-                    bundle_expiry_at,
-                    fro)
+                with step('registerBundle', bundleId=bundle_id):
+                    tx = registry.registerBundle(
+                        instance_id,
+                        riskpool_id,
+                        bundle_id,
+                        bundle_name,
+                        bundle_expiry_at,
+                        fro)
                 print_registry_tx_info(tx)
+                bundle_txs.append(tx)
+
+        # bundle registrations are confirmed together
+        if len(bundle_txs) > 0:
+            wait_for_all_confirmations(bundle_txs)
 
     print('9) checking reward rate (target: {:.3f})'.format(reward_rate))
-    current_rate = staking.rewardRate()
-    target_rate = staking.toRate(int(1000 * reward_rate), -3)
+    current_rate = r['reward_rate']
+    target_rate = UFixed.from_decimal(reward_rate).value
     if current_rate == target_rate:
         print('   reward rate already adjusting ')
     else:
-        print('   adjusting reward rate from {:.3f} to target'.format(current_rate/10**staking.rateDecimals()))
+        print('   adjusting reward rate from {} to target'.format(UFixed(current_rate)))
         staking.setRewardRate(target_rate, fso)
 
     print('10) checking dip/usdt staking rate (target: {:.3f})'.format(staking_rate))
-    current_rate = staking.stakingRate(chain_id, token)
-    target_rate = staking.toRate(int(1000 * staking_rate), -3)
+    current_rate = r['staking_rate']
+    target_rate = UFixed.from_decimal(staking_rate).value
     if current_rate == target_rate:
         print('   staking rate already adjusting ')
     else:
-        print('   adjusting staking rate from {:.3f} to target'.format(current_rate/10**staking.rateDecimals()))
+        print('   adjusting staking rate from {} to target'.format(UFixed(current_rate)))
         staking.setStakingRate(chain_id, token, target_rate, fso)
 
     print('11) link riskpool {} with staking {})'.format(riskpool_id, staking))
-    if riskpool.getStaking() == staking:
+    if r['riskpool_staking'] == staking:
         print('   riskpool and staking already linked')
     else:
         riskpool.setStakingAddress(staking, frk)
@@ -267,12 +336,16 @@ def print_registry_tx_info(tx):
 
 def get_riskpool(instance_service, product):
     riskpool_id = product.getRiskpoolId()
-    riskpool_address = instance_service.getComponent(riskpool_id)
-    riskpool = contract_from_address(interface.IRiskpoolFacade, riskpool_address)
+    riskpool = get_riskpool_for_id(instance_service, riskpool_id)
 
     return (riskpool, riskpool_id)
 
 
+def get_riskpool_for_id(instance_service, riskpool_id):
+    riskpool_address = instance_service.getComponent(riskpool_id)
+    return contract_from_address(interface.IRiskpoolFacade, riskpool_address)
+
+
 def get_stakeholder_accounts(accts):
     if len(accts) >= 10:
         return {
@@ -295,8 +368,32 @@ def get_accounts(mnemonic=None):
     return None
 
 
-def get_gas_price():
-    return web3.eth.gas_price
+def get_gas_price(urgency=URGENCY_DEFAULT):
+    # max fee per gas suggested for the urgency level, gas price on chains without eip-1559
+    return get_fee_oracle().get_max_fee(urgency)
+
+
+def get_safe_gas_price(gas_price=None, safety_factor=None, urgency=URGENCY_DEFAULT) -> tuple:
+    # returns gas price, safety factor and the price per gas used for funding requirements
+    if gas_price:
+        safety_factor = safety_factor or GAS_PRICE_SAFETY_FACTOR
+    else:
+        fees = get_fee_oracle().suggest(urgency)
+
+        if 'max_fee' in fees:
+            gas_price = fees['max_fee']
+            safety_factor = safety_factor or MAX_FEE_SAFETY_FACTOR
+        else:
+            gas_price = fees['gas_price']
+            safety_factor = safety_factor or GAS_PRICE_SAFETY_FACTOR
+
+    return (gas_price, safety_factor, int(safety_factor * gas_price))
+
+
+def set_fees(urgency=URGENCY_DEFAULT):
+    # local chains keep the gas price of the brownie network config
+    if web3.chain_id in CHAIN_IDS_REQUIRING_CONFIRMATIONS:
+        apply_fees(urgency)
 
 
 def _print_constants(gas_price, safety_factor, gp):
@@ -309,8 +406,9 @@ def _print_constants(gas_price, safety_factor, gp):
 def amend_funds(
     stakeholder_accounts,
     gas_price=None,
-    safety_factor=GAS_PRICE_SAFETY_FACTOR,
-    include_mock_setup=True
+    safety_factor=None,
+    include_mock_setup=True,
+    urgency=URGENCY_DEFAULT
 ):
     if web3.chain_id == 1:
         print('amend_funds not available on mainnet')
@@ -324,10 +422,7 @@ def amend_funds(
     assert STAKING_OWNER in a
     assert STAKER1 in a
 
-    if not gas_price:
-        gas_price = get_gas_price()
-
-    gp = int(safety_factor * gas_price)
+    (gas_price, safety_factor, gp) = get_safe_gas_price(gas_price, safety_factor, urgency)
 
     g = GAS_REGISTRY
     if include_mock_setup:
@@ -346,9 +441,10 @@ def amend_funds(
 def check_funds(
     stakeholder_accounts,
     gas_price=None,
-    safety_factor=GAS_PRICE_SAFETY_FACTOR,
+    safety_factor=None,
     include_mock_setup=True,
-    print_requirements=False
+    print_requirements=False,
+    urgency=URGENCY_DEFAULT
 ):
     # check stakeholder accounts
     a = stakeholder_accounts
@@ -358,10 +454,7 @@ def check_funds(
     assert STAKING_OWNER in a
     assert STAKER1 in a
 
-    if not gas_price:
-        gas_price = get_gas_price()
-
-    gp = int(safety_factor * gas_price)
+    (gas_price, safety_factor, gp) = get_safe_gas_price(gas_price, safety_factor, urgency)
 
     g = GAS_REGISTRY
     if include_mock_setup:
@@ -413,6 +506,7 @@ def check_funds(
     assert g_missing == 0, "ERROR missing funds/wrong fund distribution detected"
 
 
+@timed_step
 def all_in_1(
     stakeholder_accounts,
     dip_address=None,
@@ -421,7 +515,8 @@ def all_in_1(
     nft_address=None,
     registry_proxy_admin_address=None,
     staking_proxy_admin_address=None,
-    publish=False
+    publish=False,
+    urgency=URGENCY_DEFAULT
 ):
     if not stakeholder_accounts:
         if web3.chain_id == 1337:
@@ -433,8 +528,9 @@ def all_in_1(
     # check stakeholder accounts
     a = stakeholder_accounts
     balances_before = get_balances(a)
-    gas_price = get_gas_price()
-    check_funds(a, gas_price, include_mock_setup)
+    set_fees(urgency)
+    # no explicit gas price, the max fee of the oracle is used without safety factor
+    check_funds(a, include_mock_setup=include_mock_setup, urgency=urgency)
 
     dip = connect_to_dip(a, dip_address, publish)
     usdt = connect_to_usdt(a, usdt_address, publish)
@@ -492,11 +588,12 @@ def all_in_1(
         print('>>> register token {} for chain {}'
             .format(usdt.symbol(), chain_id))
 
-        token_tx = registry.registerToken(
-            registry.toChain(chain_id),
-            usdt,
-            '',
-            {'from': registry_owner})
+        with step('registerToken'):
+            token_tx = registry.registerToken(
+                registry.toChain(chain_id),
+                usdt,
+                '',
+                {'from': registry_owner})
         
         nft_ids[NFT_USDT] = extract_id(token_tx)
 
@@ -510,26 +607,28 @@ def all_in_1(
         print('>>> register instance "{}" via instance registry {}'
             .format(instance_name, mock_registry))
 
-        instance_tx = registry.registerInstance(
-            mock_registry,
-            instance_name,
-            '',
-            {'from': registry_owner})
-        
-        wait_for_confirmations(instance_tx)
+        with step('registerInstance'):
+            instance_tx = registry.registerInstance(
+                mock_registry,
+                instance_name,
+                '',
+                {'from': registry_owner})
+
+            wait_for_confirmations(instance_tx)
 
         nft_ids[NFT_INSTANCE] = extract_id(instance_tx)
 
         print('>>> register riskpool {}'
             .format(MOCK_RISKPOOL_ID))
 
-        riskpool_tx = registry.registerComponent(
-            mock_instance_service.getInstanceId(),
-            MOCK_RISKPOOL_ID,
-            '',
-            {'from': registry_owner})
+        with step('registerComponent'):
+            riskpool_tx = registry.registerComponent(
+                mock_instance_service.getInstanceId(),
+                MOCK_RISKPOOL_ID,
+                '',
+                {'from': registry_owner})
 
-        wait_for_confirmations(riskpool_tx)
+            wait_for_confirmations(riskpool_tx)
 
         nft_ids[NFT_RISKPOOL] = extract_id(riskpool_tx)
 
@@ -539,13 +638,14 @@ def all_in_1(
         print('>>> register bundle "{}"/{} for riskpool {}'
             .format(bundle_name, MOCK_BUNDLE_ID, MOCK_RISKPOOL_ID))
 
-        bundle_tx = registry.registerBundle(
-            mock_instance_service.getInstanceId(),
-            MOCK_RISKPOOL_ID,
-            MOCK_BUNDLE_ID,
-            bundle_name,
-            bundle_expiry_at,
-            {'from': registry_owner})
+        with step('registerBundle', bundleId=MOCK_BUNDLE_ID):
+            bundle_tx = registry.registerBundle(
+                mock_instance_service.getInstanceId(),
+                MOCK_RISKPOOL_ID,
+                MOCK_BUNDLE_ID,
+                bundle_name,
+                bundle_expiry_at,
+                {'from': registry_owner})
 
         nft_ids[NFT_BUNDLE] = extract_id(bundle_tx)
 
@@ -578,10 +678,11 @@ def all_in_1(
         print('>>> stake {} dip to bundle "{}"/{}'
             .format(staking_amount, bundle_name, MOCK_BUNDLE_ID))
 
-        stake_tx = staking.createStake(
-            nft_ids[NFT_BUNDLE],
-            staking_amount,
-            {'from': staker })
+        with step('createStake'):
+            stake_tx = staking.createStake(
+                nft_ids[NFT_BUNDLE],
+                staking_amount,
+                {'from': staker })
 
         nft_ids[NFT_STAKE] = extract_id(stake_tx)
 
@@ -610,6 +711,7 @@ def all_in_1(
     )
 
 
+@timed_step
 def deploy_registry(
     a, # stakeholder accounts
     nft_address=None,
@@ -685,6 +787,7 @@ def deploy_registry(
     )
 
 
+@timed_step
 def deploy_staking(
     a, # stakeholder accounts
     proxy_admin_address=None,
@@ -727,6 +830,8 @@ def deploy_staking(
         STAKING_CONTRACT, 
         proxy_admin.getProxy())
 
+    deploy_staking_helpers(staking, staking_owner, publish)
+
     print('>>> upgradaple staking at {} with owner {} and implementation {}'
         .format(staking, staking_owner, staking_impl))
     
@@ -737,6 +842,44 @@ def deploy_staking(
     )
 
 
+def deploy_staking_helpers(
+    staking,
+    staking_owner,
+    publish=False
+):
+    # reward helper is mandatory for staking v03, without it
+    # every reward calculation (and therefore every stake) reverts
+    print('>>> deploy reward helper contract {}'.format(REWARD_HELPER_CONTRACT._name))
+    reward_helper = REWARD_HELPER_CONTRACT.deploy(
+        {'from': staking_owner},
+        publish_source=publish)
+
+    reward_helper.transferOwnership(
+        staking,
+        {'from': staking_owner})
+
+    staking.setRewardHelper(
+        reward_helper,
+        {'from': staking_owner})
+
+    # message helper is needed for gasless (signature based) staking
+    print('>>> deploy message helper contract {}'.format(MESSAGE_HELPER_CONTRACT._name))
+    message_helper = MESSAGE_HELPER_CONTRACT.deploy(
+        {'from': staking_owner},
+        publish_source=publish)
+
+    tx = staking.setMessageHelper(
+        message_helper,
+        {'from': staking_owner})
+
+    wait_for_confirmations(tx)
+
+    return (
+        reward_helper,
+        message_helper
+    )
+
+
 def deploy_proxy(
     impl,
     impl_owner,
@@ -757,7 +900,7 @@ def deploy_proxy(
         proxy_admin_owner)
 
     print('--- (2/3) deploying contract oz TransparentUpgradeableProxy (=upgradable contract address)')
-    oz_proxy = oz.TransparentUpgradeableProxy.deploy(
+    oz_proxy = get_oz().TransparentUpgradeableProxy.deploy(
         impl,
         proxy_admin,
         oz_proxy_data,
@@ -819,6 +962,7 @@ def connect_to_usdt(a, token, publish=False):
     return usdt
 
 
+@timed_step
 def deploy_mock_instance(
     a,
     usdt, 
@@ -880,6 +1024,51 @@ def verify_deploy(
     # define stakeholder accounts
     a = stakeholder_accounts
 
+    registry = contract_from_address(REGISTRY_CONTRACT, registry_contract_address)
+    staking = contract_from_address(STAKING_CONTRACT, staking_contract_address)
+
+    # all reads are independent, fetch them concurrently
+    r = read_dict({
+        'registry_owner': registry.owner,
+        'registry_version': registry.version,
+        'registry_nft': registry.getNft,
+        'registry_staking': registry.getStaking,
+        'staking_owner': staking.owner,
+        'staking_version': staking.version,
+        'staking_registry': staking.getRegistry,
+        'staking_dip': staking.getDip,
+        'staking_wallet': staking.getStakingWallet,
+        'message_helper': staking.getMessageHelperAddress,
+        'reward_rate': staking.rewardRate,
+        'reward_reserves': staking.rewardReserves,
+    })
+
+    print('registry {} version {}, staking {} version {}'.format(
+        registry, r['registry_version'], staking, r['staking_version']))
+
+    checks = [
+        ('registry owner', r['registry_owner'], a[REGISTRY_OWNER]),
+        ('registry nft', r['registry_nft'] != ZERO_ADDRESS, True),
+        ('registry staking', r['registry_staking'], staking),
+        ('staking owner', r['staking_owner'], a[STAKING_OWNER]),
+        ('staking registry', r['staking_registry'], registry),
+        ('staking dip', r['staking_dip'], dip_address),
+        ('staking wallet', r['staking_wallet'] != ZERO_ADDRESS, True),
+        ('message helper', r['message_helper'] != ZERO_ADDRESS, True),
+    ]
+
+    failed = 0
+    for (name, actual, expected) in checks:
+        if actual == expected:
+            print('{} OK'.format(name))
+        else:
+            print('ERROR {}: {} expected {}'.format(name, actual, expected))
+            failed += 1
+
+    print('reward rate {:.3f}, reward reserves {:.2f} dip'.format(
+        r['reward_rate']/10**18, r['reward_reserves']/10**18))
+
+    assert failed == 0, "ERROR {} deploy verification checks failed".format(failed)
 
 def extract_id(tx):
     assert 'LogChainRegistryObjectRegistered' in tx.events
@@ -912,11 +1101,6 @@ def get_balance_delta(b1, b2):
 
 
 def get_balances(stakeholder_accounts):
-    b = {}
-
-    for a in stakeholder_accounts.keys():
-        b[a] = stakeholder_accounts[a].balance()
-    
-    return b
+    return read_dict({a: stakeholder_accounts[a].balance for a in stakeholder_accounts.keys()})
 
 
@@ -0,0 +1,142 @@
+from brownie import network, web3
+
+URGENCY_LOW = 'low'
+URGENCY_MEDIUM = 'medium'
+URGENCY_HIGH = 'high'
+URGENCY_DEFAULT = URGENCY_MEDIUM
+
+BLOCK_COUNT_DEFAULT = 20
+
+# priority fee percentile (of the rewards paid in recent blocks) per urgency level
+PRIORITY_PERCENTILE = {
+    URGENCY_LOW: 10,
+    URGENCY_MEDIUM: 50,
+    URGENCY_HIGH: 90,
+}
+
+# base fee may increase by 12.5% per full block, max fee covers this many full blocks in a row
+BASE_FEE_BLOCKS = {
+    URGENCY_LOW: 1,
+    URGENCY_MEDIUM: 3,
+    URGENCY_HIGH: 6,
+}
+
+BASE_FEE_MAX_INCREASE = 1.125
+
+# shared oracle, see get_fee_oracle
+_oracle = None
+
+
+class FeeOracle:
+    # fee suggestions from eth_feeHistory, fee history is fetched at most once per block
+
+    def __init__(self, block_count=BLOCK_COUNT_DEFAULT, fee_history=None):
+        self.block_count = block_count
+
+        # fee_history(block_count, percentiles) -> raw eth_feeHistory result, allows synthetic fee histories
+        self.fee_history = fee_history or _get_fee_history
+
+        self._block = None
+        self._stats = None
+
+
+    def get_stats(self, block=None) -> dict:
+        block = web3.eth.block_number if block is None else block
+
+        if block != self._block:
+            self._stats = self._compute_stats(block)
+            self._block = block
+
+        return self._stats
+
+
+    def suggest(self, urgency=URGENCY_DEFAULT, block=None) -> dict:
+        # returns brownie tx parameters, legacy gas price for chains without base fee
+        stats = self.get_stats(block)
+
+        if stats['baseFee'] is None:
+            return {'gas_price': stats['gasPrice']}
+
+        priority_fee = stats['priorityFee'][PRIORITY_PERCENTILE[urgency]]
+        max_base_fee = int(stats['baseFee'] * BASE_FEE_MAX_INCREASE ** BASE_FEE_BLOCKS[urgency])
+
+        return {
+            'max_fee': max_base_fee + priority_fee,
+            'priority_fee': priority_fee,
+        }
+
+
+    def get_max_fee(self, urgency=URGENCY_DEFAULT, block=None) -> int:
+        # upper bound of the price per gas, used to check funding requirements
+        fees = self.suggest(urgency, block)
+        return fees.get('max_fee', fees.get('gas_price'))
+
+
+    def _compute_stats(self, block) -> dict:
+        percentiles = sorted(set(PRIORITY_PERCENTILE.values()))
+
+        try:
+            history = self.fee_history(self.block_count, percentiles)
+        except (ValueError, AttributeError) as e:
+            print('eth_feeHistory not available ({}), using gas price'.format(e))
+            history = None
+
+        if not history or not history.get('baseFeePerGas'):
+            return {'block': block, 'baseFee': None, 'gasPrice': web3.eth.gas_price}
+
+        # last entry is the base fee of the next block
+        base_fee = _to_int(history['baseFeePerGas'][-1])
+        rewards = [[_to_int(value) for value in block_rewards] for block_rewards in history.get('reward', [])]
+
+        # median over blocks of each reward percentile, empty blocks are ignored
+        priority_fee = {}
+        for i, percentile in enumerate(percentiles):
+            values = sorted(block_rewards[i] for block_rewards in rewards if len(block_rewards) > i)
+            priority_fee[percentile] = values[len(values) // 2] if values else 0
+
+        ratios = history.get('gasUsedRatio', [])
+
+        return {
+            'block': block,
+            'baseFee': base_fee,
+            'priorityFee': priority_fee,
+            'gasUsedRatio': sum(ratios) / len(ratios) if ratios else 0.0,
+        }
+
+
+def get_fee_oracle() -> FeeOracle:
+    global _oracle
+
+    if not _oracle:
+        _oracle = FeeOracle()
+
+    return _oracle
+
+
+def apply_fees(urgency=URGENCY_DEFAULT) -> dict:
+    # sets brownie's default fees for subsequent transactions
+    fees = get_fee_oracle().suggest(urgency)
+
+    if 'max_fee' in fees:
+        network.max_fee(fees['max_fee'])
+        network.priority_fee(fees['priority_fee'])
+    else:
+        network.gas_price(fees['gas_price'])
+
+    print('fees ({}): {}'.format(urgency, ', '.join(
+        '{} {:.3f} gwei'.format(name, value / 10**9) for name, value in fees.items())))
+
+    return fees
+
+
+def _get_fee_history(block_count, percentiles):
+    response = web3.provider.make_request('eth_feeHistory', [hex(block_count), 'latest', percentiles])
+
+    if 'error' in response:
+        raise ValueError(response['error'])
+
+    return response['result']
+
+
+def _to_int(value) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
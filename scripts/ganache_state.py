@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from brownie import network, project
+
+ENV_STATE_DIR = 'GANACHE_STATE_DIR'
+ENV_GANACHE_CMD = 'GANACHE_CMD'
+
+STATE_DIR_DEFAULT = os.path.join('build', 'ganache_state')
+BUILD_DIR_DEFAULT = os.path.join('build', 'contracts')
+DUMP_DIR = 'db' # pristine database created by build_state
+WORK_DIR = 'db_work' # copy of the dump used by the running node
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_FORMAT = 1
+
+GANACHE_CMD_DEFAULT = 'ganache'
+PORT_DEFAULT = 8545 # port of brownie's development network, brownie attaches to the running node
+CHAIN_ID = 1337
+ACCOUNTS = 20
+MNEMONIC = 'brownie' # brownie default mnemonic, same accounts as for 'brownie test'
+STARTUP_TIMEOUT = 30
+
+# mock bundles expire 14 days after the build, dumps are rebuilt before
+MAX_AGE = 7 * 24 * 3600
+
+# contracts of the standard stack, see deploy_registry.all_in_1
+STACK_CONTRACTS = [
+    'DIP',
+    'USD1',
+    'USD2',
+    'OwnableProxyAdmin',
+    'ChainNft',
+    'ChainRegistryV01',
+    'StakingV03',
+    'RewardHelper',
+    'StakingMessageHelper',
+    'MockInstance',
+    'MockInstanceRegistry',
+]
+
+
+def help():
+    print('from scripts.ganache_state import start, build_state, check_state, load_stack, stop_ganache, help')
+    print('(proc, manifest) = start() # restores the dump, rebuilds stale dumps first')
+    print('stack = load_stack(manifest)')
+    print('stop_ganache(proc)')
+    print()
+    print('# from the command line (settings via env variables {}, {})'.format(ENV_STATE_DIR, ENV_GANACHE_CMD))
+    print('python -m scripts.ganache_state [start|build|check]')
+
+
+def bytecode_hashes(contract_names=STACK_CONTRACTS, build_dir=BUILD_DIR_DEFAULT) -> dict:
+    hashes = {}
+
+    for name in contract_names:
+        with open(os.path.join(build_dir, '{}.json'.format(name))) as f:
+            bytecode = json.load(f)['deployedBytecode']
+
+        hashes[name] = hashlib.sha256(bytecode.encode()).hexdigest()
+
+    return hashes
+
+
+def read_manifest(state_dir=STATE_DIR_DEFAULT):
+    file_name = os.path.join(state_dir, MANIFEST_FILE)
+
+    if not os.path.isfile(file_name):
+        return None
+
+    with open(file_name) as f:
+        return json.load(f)
+
+
+def check_state(state_dir=STATE_DIR_DEFAULT, build_dir=BUILD_DIR_DEFAULT) -> list:
+    # returns list of reasons why the dump needs to be rebuilt, empty list for a usable dump
+    manifest = read_manifest(state_dir)
+
+    if not manifest:
+        return ['manifest missing']
+
+    if manifest['format'] != MANIFEST_FORMAT:
+        return ['manifest format {} != {}'.format(manifest['format'], MANIFEST_FORMAT)]
+
+    if not os.path.isdir(os.path.join(state_dir, DUMP_DIR)):
+        return ['database dump missing']
+
+    reasons = []
+    hashes = bytecode_hashes(list(manifest['bytecode'].keys()), build_dir)
+
+    for name, bytecode_hash in manifest['bytecode'].items():
+        if hashes[name] != bytecode_hash:
+            reasons.append('bytecode of {} changed'.format(name))
+
+    if time.time() - manifest['builtAt'] > MAX_AGE:
+        reasons.append('dump older than {} days'.format(MAX_AGE // (24 * 3600)))
+
+    return reasons
+
+
+def launch_ganache(db_path, port=PORT_DEFAULT):
+    assert not _is_listening(port), 'port {} already in use'.format(port)
+
+    cmd = os.getenv(ENV_GANACHE_CMD, GANACHE_CMD_DEFAULT).split(' ') + [
+        '--database.dbPath', db_path,
+        '--server.port', str(port),
+        '--chain.chainId', str(CHAIN_ID),
+        '--wallet.mnemonic', MNEMONIC,
+        '--wallet.totalAccounts', str(ACCOUNTS),
+        '--logging.quiet']
+
+    proc = subprocess.Popen(cmd)
+    start = time.time()
+
+    while not _is_listening(port):
+        assert proc.poll() is None, 'ganache terminated with exit code {}'.format(proc.returncode)
+        assert time.time() - start < STARTUP_TIMEOUT, 'ganache not listening after {}s'.format(STARTUP_TIMEOUT)
+        time.sleep(0.1)
+
+    return proc
+
+
+def stop_ganache(proc):
+    if network.is_connected():
+        network.disconnect(kill_rpc=False)
+
+    # sigint lets ganache close its database cleanly
+    proc.send_signal(signal.SIGINT)
+    proc.wait(timeout=STARTUP_TIMEOUT)
+
+
+def build_state(state_dir=STATE_DIR_DEFAULT, port=PORT_DEFAULT) -> dict:
+    # deploys the standard stack into a fresh database and records the addresses in the manifest
+    from brownie import accounts, web3, USD1
+    from scripts.deploy_registry import all_in_1, get_stakeholder_accounts
+
+    start = time.perf_counter()
+    dump_dir = os.path.join(state_dir, DUMP_DIR)
+    manifest_file = os.path.join(state_dir, MANIFEST_FILE)
+
+    # invalidate old dump before touching the database
+    for path in [manifest_file, dump_dir]:
+        if os.path.isfile(path):
+            os.remove(path)
+        elif os.path.isdir(path):
+            shutil.rmtree(path)
+
+    os.makedirs(dump_dir)
+    proc = launch_ganache(dump_dir, port)
+
+    try:
+        network.connect('development')
+
+        a = get_stakeholder_accounts(accounts)
+        (
+            registry,
+            staking,
+            nft,
+            nft_ids,
+            dip,
+            usdt,
+            mock_instance_service,
+            instance_operator,
+            registry_owner,
+            staking_owner,
+            proxy_admin,
+        ) = all_in_1(a)
+
+        usd1 = USD1.deploy({'from': instance_operator})
+
+        manifest = {
+            'format': MANIFEST_FORMAT,
+            'builtAt': int(time.time()),
+            'chainId': CHAIN_ID,
+            'mnemonic': MNEMONIC,
+            'block': web3.eth.block_number,
+            'contracts': {
+                'DIP': str(dip),
+                'USD1': str(usd1),
+                'USD2': str(usdt),
+                'ChainNft': str(nft),
+                'ChainRegistryV01': str(registry),
+                'StakingV03': str(staking),
+                'OwnableProxyAdmin': str(proxy_admin),
+                'MockInstance': str(mock_instance_service),
+                'MockInstanceRegistry': str(mock_instance_service.getRegistry()),
+            },
+            'nftIds': nft_ids,
+            'bytecode': bytecode_hashes(),
+        }
+    finally:
+        stop_ganache(proc)
+
+    # manifest is written last, an interrupted build leaves no usable dump
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print('ganache state built in {} in {:.1f}s'.format(state_dir, time.perf_counter() - start))
+
+    return manifest
+
+
+def restore_state(state_dir=STATE_DIR_DEFAULT, port=PORT_DEFAULT):
+    # runs ganache on a copy of the dump, the dump itself stays untouched
+    start = time.perf_counter()
+    manifest = read_manifest(state_dir)
+    work_dir = os.path.join(state_dir, WORK_DIR)
+
+    if os.path.isdir(work_dir):
+        shutil.rmtree(work_dir)
+
+    shutil.copytree(os.path.join(state_dir, DUMP_DIR), work_dir)
+    proc = launch_ganache(work_dir, port)
+
+    print('ganache state restored from {} (block {}) in {:.1f}s'.format(
+        state_dir, manifest['block'], time.perf_counter() - start))
+
+    return (proc, manifest)
+
+
+def start(state_dir=STATE_DIR_DEFAULT, port=PORT_DEFAULT):
+    reasons = check_state(state_dir)
+
+    if reasons:
+        print('rebuilding ganache state: {}'.format(', '.join(reasons)))
+        build_state(state_dir, port)
+
+    return restore_state(state_dir, port)
+
+
+def load_stack(manifest) -> dict:
+    import brownie
+    from scripts.util import contract_from_address
+
+    if not network.is_connected():
+        network.connect('development')
+
+    return {
+        name: contract_from_address(getattr(brownie, name), address)
+        for name, address in manifest['contracts'].items()}
+
+
+def _is_listening(port) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        return s.connect_ex(('127.0.0.1', port)) == 0
+
+
+def _load_project():
+    # compiles changed contracts, keeps artifacts in sync with the bytecode check
+    if not project.get_loaded_projects():
+        project.load(os.getcwd()).load_config()
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'start'
+    state_dir = os.getenv(ENV_STATE_DIR, STATE_DIR_DEFAULT)
+
+    _load_project()
+
+    if command == 'check':
+        reasons = check_state(state_dir)
+        print('ganache state {}: {}'.format(state_dir, ', '.join(reasons) if reasons else 'ok'))
+        sys.exit(1 if reasons else 0)
+    elif command == 'build':
+        build_state(state_dir)
+    elif command == 'start':
+        (proc, manifest) = start(state_dir)
+        print(json.dumps(manifest['contracts'], indent=2))
+        print('ganache running on port {}, ctrl-c to stop'.format(PORT_DEFAULT))
+
+        try:
+            proc.wait()
+        except KeyboardInterrupt:
+            stop_ganache(proc)
+    else:
+        help()
+        sys.exit(1)
@@ -0,0 +1,507 @@
+import json
+import os
+
+from brownie import (
+    accounts,
+    chain,
+    web3,
+    ChainRegistryV03,
+    MockInstance,
+    MockInstanceRegistry,
+    OwnableProxyAdmin,
+    StakingV04,
+)
+
+from scripts.deploy_registry import (
+    all_in_1,
+    deploy_mock_instance,
+    get_stakeholder_accounts,
+    MOCK_RISKPOOL_ID,
+)
+
+from scripts.staking_signature import sign_stake
+
+from scripts.util import (
+    contract_from_address,
+    get_account,
+    s2b32,
+    unix_timestamp,
+)
+
+from scripts.const import (
+    ACCOUNTS_MNEMONIC,
+    GIF_ACTOR,
+    INSTANCE_OPERATOR,
+    PROXY_ADMIN_OWNER,
+    REGISTRY_OWNER,
+    STAKING_OWNER,
+    STAKER1,
+)
+
+# defaults may be overwritten via env variables (eg in .env)
+# scales are comma separated lists of integers, eg '1,10,100,1000'
+BASELINE_FILE_DEFAULT = 'gas_baseline.json'
+TOLERANCE_DEFAULT = 0.02 # 2% more gas than in baseline is tolerated
+
+STAKE_SCALES_DEFAULT = [1, 10, 100]
+OBJECT_SCALES_DEFAULT = [1, 10, 100]
+INSTANCE_SCALES_DEFAULT = [1, 10]
+
+ENV_BASELINE_FILE = 'GAS_BENCH_BASELINE'
+ENV_TOLERANCE = 'GAS_BENCH_TOLERANCE'
+ENV_UPDATE_BASELINE = 'GAS_BENCH_UPDATE'
+ENV_STAKE_SCALES = 'GAS_BENCH_STAKE_SCALES'
+ENV_OBJECT_SCALES = 'GAS_BENCH_OBJECT_SCALES'
+ENV_INSTANCE_SCALES = 'GAS_BENCH_INSTANCE_SCALES'
+ENV_REGISTRY_V03 = 'GAS_BENCH_REGISTRY_V03'
+ENV_STAKING_V04 = 'GAS_BENCH_STAKING_V04'
+ENV_COMPARE_REGISTRY = 'GAS_BENCH_COMPARE_REGISTRY'
+
+# eip-1967 admin slot of the transparent upgradeable proxy
+PROXY_ADMIN_SLOT = '0xb53127684a568b3173ae13b9f8a6016e243e63b6e8ee1178d6a717850b5d6103'
+
+# bundle ids 1..n are used for object scaling
+# bundle ids below are reserved for stake scaling
+STAKE_BUNDLE_ID = 1000001
+RESTAKE_BUNDLE_ID = 1000002
+
+BUNDLE_STATE_ACTIVE = 0
+BUNDLE_STATE_CLOSED = 2
+
+STAKER_FUNDING = '10 ether'
+STAKING_AMOUNT = 1000 * 10**18
+REWARD_RESERVES_AMOUNT = 10**6 * 10**18
+BUNDLE_LIFETIME = 365 * 24 * 3600
+REWARD_PERIOD = 24 * 3600
+
+OPERATIONS = [
+    'createStake',
+    'stake',
+    'restake',
+    'unstakeAndClaimRewards',
+    'claimRewards',
+    'createStakeWithSignature',
+    'registerToken',
+    'registerInstance',
+    'registerComponent',
+    'registerBundle',
+    'getBundleInfo',
+]
+
+REGISTER_OPERATIONS = [
+    'registerToken',
+    'registerInstance',
+    'registerComponent',
+    'registerBundle',
+]
+
+
+def help():
+    print('from scripts.gas_benchmark import run_benchmark, check_against_baseline, help')
+    print('results = run_benchmark() # opt params stake_scales=[1, 10, 100], object_scales=[1, 10, 100], instance_scales=[1, 10], registry_v03=False, staking_v04=False')
+    print("check_against_baseline(results) # opt params baseline_file='{}', tolerance={}, update=False"
+        .format(BASELINE_FILE_DEFAULT, TOLERANCE_DEFAULT))
+    print('comparison = compare_registry_versions() # register* gas of ChainRegistryV01 and ChainRegistryV03')
+    print()
+    print('# from the command line (settings via env variables {}, {}, {}, {}, {}, {}, {}, {}, {})'
+        .format(ENV_BASELINE_FILE, ENV_TOLERANCE, ENV_UPDATE_BASELINE, ENV_STAKE_SCALES, ENV_OBJECT_SCALES, ENV_INSTANCE_SCALES, ENV_REGISTRY_V03, ENV_STAKING_V04, ENV_COMPARE_REGISTRY))
+    print('brownie run scripts/gas_benchmark.py')
+    print('GAS_BENCH_COMPARE_REGISTRY=1 brownie run scripts/gas_benchmark.py')
+
+
+def main():
+    if _is_set(ENV_COMPARE_REGISTRY):
+        compare_registry_versions()
+        return
+
+    results = run_benchmark(
+        stake_scales=_get_scales(ENV_STAKE_SCALES, STAKE_SCALES_DEFAULT),
+        object_scales=_get_scales(ENV_OBJECT_SCALES, OBJECT_SCALES_DEFAULT),
+        instance_scales=_get_scales(ENV_INSTANCE_SCALES, INSTANCE_SCALES_DEFAULT),
+        registry_v03=_is_set(ENV_REGISTRY_V03),
+        staking_v04=_is_set(ENV_STAKING_V04))
+
+    check_against_baseline(
+        results,
+        baseline_file=os.getenv(ENV_BASELINE_FILE, BASELINE_FILE_DEFAULT),
+        tolerance=float(os.getenv(ENV_TOLERANCE, TOLERANCE_DEFAULT)),
+        update=_is_set(ENV_UPDATE_BASELINE))
+
+
+def run_benchmark(
+    stakeholder_accounts=None,
+    stake_scales=STAKE_SCALES_DEFAULT,
+    object_scales=OBJECT_SCALES_DEFAULT,
+    instance_scales=INSTANCE_SCALES_DEFAULT,
+    registry_v03=False,
+    staking_v04=False,
+):
+    if not stakeholder_accounts:
+        stakeholder_accounts = get_stakeholder_accounts(accounts)
+
+    setup = deploy_benchmark_setup(stakeholder_accounts, registry_v03, staking_v04)
+    results = {operation: {} for operation in OPERATIONS}
+
+    # single registrations done as part of the setup
+    results['registerToken']['1'] = setup['token_tx'].gas_used
+    results['registerComponent']['1'] = setup['component_tx'].gas_used
+
+    # object scaling first, scale n then refers to the n-th object of its type
+    benchmark_bundles(setup, sorted(object_scales), results)
+    benchmark_instances(setup, sorted(instance_scales), results)
+    benchmark_stakes(setup, sorted(stake_scales), results)
+
+    print_results(results)
+
+    return results
+
+
+def compare_registry_versions(stakeholder_accounts=None) -> dict:
+    # same registrations against a fresh v01 and a fresh v03 registry, first object of each type
+    # v03 includes the packed nft info slot and the compact data encoding
+    results = {operation: {} for operation in REGISTER_OPERATIONS}
+
+    for (label, registry_v03) in [('v01', False), ('v03', True)]:
+        measurements = run_benchmark(
+            stakeholder_accounts,
+            stake_scales=[],
+            object_scales=[1],
+            instance_scales=[1],
+            registry_v03=registry_v03)
+
+        for operation in REGISTER_OPERATIONS:
+            results[operation][label] = measurements[operation]['1']
+
+    print('--- register gas v01 vs v03 ---')
+    print('Operation;V01;V03;Delta')
+
+    for operation, gas in results.items():
+        print('{};{};{};{:+.2%}'.format(
+            operation,
+            gas['v01'],
+            gas['v03'],
+            (gas['v03'] - gas['v01']) / gas['v01']))
+
+    print('--- end of register gas ---')
+
+    return results
+
+
+def deploy_benchmark_setup(a, registry_v03=False, staking_v04=False):
+    (
+        registry,
+        staking,
+        nft,
+        nft_ids,
+        dip,
+        usdt,
+        mock_instance_service,
+        instance_operator,
+        registry_owner,
+        staking_owner,
+        proxy_admin,
+    ) = all_in_1(a, include_mock_setup=False)
+
+    fro = {'from': registry_owner}
+    fso = {'from': staking_owner}
+    fio = {'from': instance_operator}
+
+    # all registrations of the benchmark then use the packed nft info of v03
+    # staking v04 depends on the bundle getters of registry v03
+    if registry_v03 or staking_v04:
+        registry = upgrade_registry_v03(a, registry)
+
+    if staking_v04:
+        staking = upgrade_staking_v04(a, staking)
+
+    token_tx = registry.registerToken(registry.toChain(chain.id), usdt, '', fro)
+
+    (
+        instance_operator,
+        instance_service,
+        instance_registry
+    ) = deploy_mock_instance(a, usdt)
+
+    instance_tx = registry.registerInstance(instance_registry, 'benchmark instance', '', fro)
+    instance_id = instance_service.getInstanceId()
+    component_tx = registry.registerComponent(instance_id, MOCK_RISKPOOL_ID, '', fro)
+
+    # staking parameters
+    staking.setRewardRate(staking.toRate(125, -3), fso)
+    dip.approve(staking.getStakingWallet(), REWARD_RESERVES_AMOUNT, fio)
+    staking.refillRewardReserves(REWARD_RESERVES_AMOUNT, fio)
+
+    return {
+        'accounts': a,
+        'registry': registry,
+        'staking': staking,
+        'dip': dip,
+        'usdt': usdt,
+        'instance_service': instance_service,
+        'instance_id': instance_id,
+        'token_tx': token_tx,
+        'instance_tx': instance_tx,
+        'component_tx': component_tx,
+        'message_helper': str(staking.getMessageHelperAddress()),
+    }
+
+
+def upgrade_registry_v03(a, registry):
+    proxy_admin_owner = a[PROXY_ADMIN_OWNER]
+
+    print('>>> upgrading registry {} to {}'.format(registry, ChainRegistryV03._name))
+    implementation = ChainRegistryV03.deploy({'from': proxy_admin_owner})
+    get_proxy_admin(registry).upgrade(implementation, {'from': proxy_admin_owner})
+
+    return contract_from_address(ChainRegistryV03, registry)
+
+
+def upgrade_staking_v04(a, staking):
+    proxy_admin_owner = a[PROXY_ADMIN_OWNER]
+
+    print('>>> upgrading staking {} to {}'.format(staking, StakingV04._name))
+    implementation = StakingV04.deploy({'from': proxy_admin_owner})
+    get_proxy_admin(staking).upgrade(implementation, {'from': proxy_admin_owner})
+
+    return contract_from_address(StakingV04, staking)
+
+
+def get_proxy_admin(proxy):
+    # all_in_1 only returns the proxy admin of the staking contract
+    slot = web3.eth.get_storage_at(str(proxy), PROXY_ADMIN_SLOT)
+    return contract_from_address(OwnableProxyAdmin, '0x' + slot.hex()[-40:])
+
+
+def benchmark_stakes(setup, scales, results):
+    if len(scales) == 0:
+        return
+
+    a = setup['accounts']
+    staking = setup['staking']
+
+    # gasless staking needs a staker with access to its private key
+    staker = get_account(ACCOUNTS_MNEMONIC, GIF_ACTOR[STAKER1])
+    a[INSTANCE_OPERATOR].transfer(staker, STAKER_FUNDING)
+    fs = {'from': staker}
+
+    (_, target) = register_bundle(setup, STAKE_BUNDLE_ID)
+    (_, restake_target) = register_bundle(setup, RESTAKE_BUNDLE_ID)
+
+    # enough dips for the creation of all stakes and all measurements
+    max_stakes = max(scales)
+    fund_staker(setup, staker, 2 * (max_stakes + 4 * len(scales)) * STAKING_AMOUNT)
+
+    stake_ids = []
+    for i in range(1, max_stakes + 1):
+        tx = staking.createStake(target, STAKING_AMOUNT, fs)
+        stake_ids.append(extract_stake_id(tx))
+
+        if i not in scales:
+            continue
+
+        print('--- measuring staking operations with {} stakes on target'.format(i))
+        results['createStake'][str(i)] = tx.gas_used
+
+        # let some rewards accumulate
+        chain.sleep(REWARD_PERIOD)
+        chain.mine(1)
+
+        tx = staking.stake(stake_ids[-1], STAKING_AMOUNT, fs)
+        results['stake'][str(i)] = tx.gas_used
+
+        tx = staking.claimRewards(stake_ids[-1], fs)
+        results['claimRewards'][str(i)] = tx.gas_used
+
+        tx = create_stake_with_signature(setup, staker, target, STAKING_AMOUNT, 'bench-{}'.format(i))
+        stake_ids.append(extract_stake_id(tx))
+        results['createStakeWithSignature'][str(i)] = tx.gas_used
+
+        # unstaking/restaking is only possible for closed bundles
+        set_bundle_state(setup, STAKE_BUNDLE_ID, BUNDLE_STATE_CLOSED)
+
+        tx = staking.restake(stake_ids.pop(0), restake_target, fs)
+        results['restake'][str(i)] = tx.gas_used
+
+        tx = staking.unstakeAndClaimRewards(stake_ids.pop(0), fs)
+        results['unstakeAndClaimRewards'][str(i)] = tx.gas_used
+
+        set_bundle_state(setup, STAKE_BUNDLE_ID, BUNDLE_STATE_ACTIVE)
+
+
+def benchmark_bundles(setup, scales, results):
+    if len(scales) == 0:
+        return
+
+    staking = setup['staking']
+
+    for bundle_id in range(1, max(scales) + 1):
+        (tx, nft_id) = register_bundle(setup, bundle_id)
+
+        if bundle_id in scales:
+            print('--- measuring bundle registration with {} bundles'.format(bundle_id))
+            results['registerBundle'][str(bundle_id)] = tx.gas_used
+
+            # view used by the frontend for every bundle card
+            results['getBundleInfo'][str(bundle_id)] = staking.getBundleInfo.estimate_gas(nft_id)
+
+
+def benchmark_instances(setup, scales, results):
+    if len(scales) == 0:
+        return
+
+    a = setup['accounts']
+    registry = setup['registry']
+    fro = {'from': a[REGISTRY_OWNER]}
+
+    # the benchmark setup already registered the first instance
+    if 1 in scales:
+        results['registerInstance']['1'] = setup['instance_tx'].gas_used
+
+    for i in range(2, max(scales) + 1):
+        instance_service = MockInstance.deploy({'from': a[INSTANCE_OPERATOR]})
+        instance_registry = contract_from_address(
+            MockInstanceRegistry,
+            instance_service.getRegistry())
+
+        tx = registry.registerInstance(instance_registry, 'instance-{}'.format(i), '', fro)
+
+        if i in scales:
+            print('--- measuring instance registration with {} instances'.format(i))
+            results['registerInstance'][str(i)] = tx.gas_used
+
+
+def register_bundle(setup, bundle_id):
+    a = setup['accounts']
+    instance_service = setup['instance_service']
+    registry = setup['registry']
+
+    instance_service.setBundleInfo(
+        bundle_id,
+        MOCK_RISKPOOL_ID,
+        BUNDLE_STATE_ACTIVE,
+        10000 * 10**setup['usdt'].decimals(),
+        {'from': a[INSTANCE_OPERATOR]})
+
+    tx = registry.registerBundle(
+        setup['instance_id'],
+        MOCK_RISKPOOL_ID,
+        bundle_id,
+        'bundle-{}'.format(bundle_id),
+        unix_timestamp() + BUNDLE_LIFETIME,
+        {'from': a[REGISTRY_OWNER]})
+
+    return (tx, extract_nft_id(tx))
+
+
+def set_bundle_state(setup, bundle_id, state):
+    setup['instance_service'].setBundleInfo(
+        bundle_id,
+        MOCK_RISKPOOL_ID,
+        state,
+        10000 * 10**setup['usdt'].decimals(),
+        {'from': setup['accounts'][INSTANCE_OPERATOR]})
+
+
+def fund_staker(setup, staker, amount):
+    dip = setup['dip']
+    instance_operator = setup['accounts'][INSTANCE_OPERATOR]
+
+    dip.transfer(staker, amount, {'from': instance_operator})
+    dip.approve(setup['staking'].getStakingWallet(), amount, {'from': staker})
+
+
+def create_stake_with_signature(setup, owner, target, amount, signature_id_text):
+    staking = setup['staking']
+    signature_id = s2b32(signature_id_text)
+    signature = sign_stake(
+        target,
+        amount,
+        signature_id,
+        owner.private_key,
+        web3.chain_id,
+        setup['message_helper'])
+
+    # gasless staking: tx is paid by the staking owner not the staker
+    return staking.createStakeWithSignature(
+        owner,
+        target,
+        amount,
+        signature_id,
+        signature,
+        {'from': setup['accounts'][STAKING_OWNER]})
+
+
+def extract_nft_id(tx):
+    assert 'LogChainRegistryObjectRegistered' in tx.events
+    return tx.events['LogChainRegistryObjectRegistered']['id']
+
+
+def extract_stake_id(tx):
+    assert 'LogStakingNewStakeCreated' in tx.events
+    return tx.events['LogStakingNewStakeCreated']['id']
+
+
+def print_results(results):
+    print('--- gas usage ---')
+    print('Operation;Scale;Gas')
+
+    for operation, measurements in results.items():
+        for scale, gas in measurements.items():
+            print('{};{};{}'.format(operation, scale, gas))
+
+    print('--- end of gas usage ---')
+
+
+def check_against_baseline(
+    results,
+    baseline_file=BASELINE_FILE_DEFAULT,
+    tolerance=TOLERANCE_DEFAULT,
+    update=False
+):
+    if update or not os.path.isfile(baseline_file):
+        write_baseline(results, baseline_file)
+        return []
+
+    with open(baseline_file, 'r') as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+
+    for operation, measurements in results.items():
+        for scale, gas in measurements.items():
+            if scale not in baseline.get(operation, {}):
+                print('{}@{}: {} (no baseline)'.format(operation, scale, gas))
+                continue
+
+            gas_baseline = baseline[operation][scale]
+            delta = (gas - gas_baseline) / gas_baseline
+
+            if gas > gas_baseline * (1 + tolerance):
+                regressions.append((operation, scale, gas_baseline, gas))
+                print('{}@{}: {} baseline {} ({:+.2%}) REGRESSION'.format(operation, scale, gas, gas_baseline, delta))
+            else:
+                print('{}@{}: {} baseline {} ({:+.2%}) OK'.format(operation, scale, gas, gas_baseline, delta))
+
+    assert len(regressions) == 0, "ERROR gas regressions detected (tolerance {:.2%}): {}".format(
+        tolerance, regressions)
+
+    return regressions
+
+
+def write_baseline(results, baseline_file):
+    print('>>> writing gas baseline to {}'.format(baseline_file))
+
+    with open(baseline_file, 'w') as f:
+        json.dump({'chain_id': chain.id, 'results': results}, f, indent=4, sort_keys=True)
+
+
+def _is_set(env_name):
+    return os.getenv(env_name, '').lower() in ['1', 'true', 'yes']
+
+
+def _get_scales(env_name, default):
+    value = os.getenv(env_name)
+    if not value:
+        return default
+
+    return [int(scale) for scale in value.split(',')]
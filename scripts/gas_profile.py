@@ -0,0 +1,213 @@
+import os
+
+from brownie import (
+    chain,
+    project,
+    web3,
+)
+
+ENV_TX_HASH = 'GAS_PROFILE_TX'
+ENV_OUTPUT_FILE = 'GAS_PROFILE_FILE'
+
+# collapsed stack format as consumed by flamegraph.pl, inferno or speedscope
+OUTPUT_FILE_TEMPLATE = 'gas_profile_{}.folded'
+
+# memory is needed to extract the function selector of internal calls
+TRACE_OPTIONS = {'disableStorage': True, 'disableMemory': False, 'disableStack': False}
+
+CREATE_OPS = ['CREATE', 'CREATE2']
+
+INTRINSIC_FRAME = '[intrinsic]'
+UNKNOWN_FUNCTION = 'fallback'
+
+
+def help():
+    print('from scripts.gas_profile import profile_tx, print_profile, help')
+    print('profile = profile_tx(tx) # opt params contracts=[registry, staking], file_name=None')
+    print('print_profile(profile)')
+    print()
+    print('# from the command line (settings via env variables {}, {})'.format(ENV_TX_HASH, ENV_OUTPUT_FILE))
+    print('GAS_PROFILE_TX=0x... brownie run scripts/gas_profile.py --network ganache')
+
+
+def main():
+    tx_hash = os.getenv(ENV_TX_HASH)
+    assert tx_hash, 'tx hash missing, set env variable {}'.format(ENV_TX_HASH)
+
+    profile = profile_tx(tx_hash, file_name=os.getenv(ENV_OUTPUT_FILE))
+    print_profile(profile)
+
+
+def profile_tx(tx, contracts=None, file_name=None) -> dict:
+    # tx may be a transaction receipt or a tx hash, contracts adds labels for addresses not deployed via the project (eg proxies)
+    tx = chain.get_transaction(tx) if isinstance(tx, str) else tx
+    (labels, selectors) = get_labels(contracts)
+
+    response = web3.provider.make_request('debug_traceTransaction', [tx.txid, TRACE_OPTIONS])
+    assert 'result' in response, 'debug_traceTransaction failed: {}'.format(response.get('error'))
+
+    root = (
+        _label_address(labels, tx.receiver),
+        _label_function(selectors, tx.input[:10]))
+
+    stacks = profile_struct_logs(response['result']['structLogs'], root, labels, selectors)
+
+    # intrinsic gas (21000 + calldata) minus refunds is not part of the trace
+    stacks[(INTRINSIC_FRAME,)] = tx.gas_used - sum(stacks.values())
+
+    profile = aggregate(stacks)
+    profile['txHash'] = tx.txid
+    profile['gasUsed'] = tx.gas_used
+
+    file_name = file_name or OUTPUT_FILE_TEMPLATE.format(tx.txid[:10])
+    write_collapsed(stacks, file_name)
+    profile['file'] = file_name
+
+    return profile
+
+
+def profile_struct_logs(logs, root, labels, selectors) -> dict:
+    # returns self gas per call stack, frames are 'Contract.function' labels
+    stacks = {}
+    frames = [{'path': ('{}.{}'.format(*root),), 'inclusive': 0, 'call': None}]
+
+    for i, step in enumerate(logs):
+        frame = frames[-1]
+        next_step = logs[i + 1] if i + 1 < len(logs) else None
+
+        if next_step and next_step['depth'] > step['depth']:
+            # call or create entered, cost is settled when the child frame returns
+            (address, selector) = _get_call_target(step)
+            label = '{}.{}'.format(
+                _label_address(labels, address),
+                _label_function(selectors, selector))
+
+            frames.append({'path': frame['path'] + (label,), 'inclusive': 0, 'call': i})
+            continue
+
+        if next_step and next_step['depth'] == step['depth']:
+            cost = step['gas'] - next_step['gas']
+        else:
+            cost = step['gasCost']
+
+        _add(stacks, frame['path'], cost)
+        frame['inclusive'] += cost
+
+        # return to the calling frame
+        if next_step and next_step['depth'] < step['depth']:
+            child = frames.pop()
+            parent = frames[-1]
+            call_step = logs[child['call']]
+
+            # gas spent by the call op itself (gas forwarded minus gas returned)
+            call_total = call_step['gas'] - next_step['gas']
+            _add(stacks, parent['path'], call_total - child['inclusive'])
+            parent['inclusive'] += call_total
+
+    return stacks
+
+
+def aggregate(stacks) -> dict:
+    by_contract = {}
+    by_function = {}
+
+    for path, gas in stacks.items():
+        frame = path[-1]
+        contract = frame.split('.')[0]
+
+        by_contract[contract] = by_contract.get(contract, 0) + gas
+        by_function[frame] = by_function.get(frame, 0) + gas
+
+    return {
+        'total': sum(stacks.values()),
+        'byContract': _sorted(by_contract),
+        'byFunction': _sorted(by_function),
+    }
+
+
+def write_collapsed(stacks, file_name):
+    with open(file_name, 'w') as f:
+        for path, gas in sorted(stacks.items()):
+            if gas > 0:
+                f.write('{} {}\n'.format(';'.join(path), gas))
+
+
+def print_profile(profile):
+    total = profile['total']
+
+    print('--- gas profile {} (gas used {}) ---'.format(profile['txHash'], profile['gasUsed']))
+    print('Contract;SelfGas;Share')
+    for contract, gas in profile['byContract'].items():
+        print('{};{};{:.1f}%'.format(contract, gas, 100 * gas / total))
+
+    print('Function;SelfGas;Share')
+    for function, gas in profile['byFunction'].items():
+        print('{};{};{:.1f}%'.format(function, gas, 100 * gas / total))
+
+    print('--- collapsed stacks written to {} ---'.format(profile['file']))
+
+
+def get_labels(contracts=None):
+    # contract names per address and function names per selector of the loaded project
+    labels = {}
+    selectors = {}
+
+    for container in project.get_loaded_projects()[0]:
+        selectors.update(container.selectors)
+
+        for contract in container:
+            labels[contract.address.lower()] = container._name
+
+    for contract in contracts or []:
+        labels[contract.address.lower()] = contract._name
+        selectors.update(contract.selectors)
+
+    return (labels, selectors)
+
+
+def _get_call_target(step):
+    stack = step['stack']
+    op = step['op']
+
+    if op in CREATE_OPS:
+        return (None, None)
+
+    address = '0x{:040x}'.format(_word(stack[-2]) % 2**160)
+
+    # CALL and CALLCODE have an additional value argument
+    if op in ['CALL', 'CALLCODE']:
+        (offset, length) = (_word(stack[-4]), _word(stack[-5]))
+    else:
+        (offset, length) = (_word(stack[-3]), _word(stack[-4]))
+
+    if length < 4:
+        return (address, None)
+
+    memory = ''.join(step['memory'])
+    return (address, '0x' + memory[2 * offset:2 * offset + 8])
+
+
+def _label_address(labels, address) -> str:
+    if not address:
+        return 'create'
+
+    return labels.get(address.lower(), address[:10])
+
+
+def _label_function(selectors, selector) -> str:
+    if not selector or len(selector) < 10:
+        return UNKNOWN_FUNCTION
+
+    return selectors.get(selector, selector)
+
+
+def _word(value) -> int:
+    return int(value, 16)
+
+
+def _add(stacks, path, gas):
+    stacks[path] = stacks.get(path, 0) + gas
+
+
+def _sorted(values) -> dict:
+    return dict(sorted(values.items(), key=lambda item: item[1], reverse=True))
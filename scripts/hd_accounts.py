@@ -0,0 +1,93 @@
+import hashlib
+import hmac
+
+from multiprocessing import Pool
+
+from eth_account import Account as EthAccount
+from eth_account.hdaccount import seed_from_mnemonic
+from eth_keys import keys
+
+from brownie import accounts
+
+# bip-44 path used by brownie's accounts.from_mnemonic, account index is appended
+ACCOUNT_PATH = [44 + 2**31, 60 + 2**31, 0 + 2**31, 0]
+
+HARDENED = 2**31
+CURVE_ORDER = 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141
+
+CHUNK_SIZE = 500 # keys per worker task
+
+
+def help():
+    print('from scripts.hd_accounts import new_mnemonic, derive_private_keys, derive_addresses, load_accounts, help')
+    print('mnemonic = new_mnemonic() # opt param words=12')
+    print('keys = derive_private_keys(mnemonic, 5000) # opt params offset=0, passphrase=""')
+    print('addresses = derive_addresses(mnemonic, 5000) # opt param processes=None (cpu count)')
+    print('stakers = load_accounts(mnemonic, 1000) # brownie accounts, opt param offset=0')
+
+
+def new_mnemonic(words=12) -> str:
+    EthAccount.enable_unaudited_hdwallet_features()
+    (_, mnemonic) = EthAccount.create_with_mnemonic(num_words=words)
+    return mnemonic
+
+
+def derive_private_keys(mnemonic, count, offset=0, passphrase='') -> list:
+    # seed and parent key m/44'/60'/0'/0 are derived once, each account only adds one hmac
+    seed = seed_from_mnemonic(mnemonic, passphrase)
+    (key, chain_code) = _master_key(seed)
+
+    for index in ACCOUNT_PATH:
+        (key, chain_code) = _child_key(key, chain_code, index)
+
+    parent_public_key = _compressed_public_key(key)
+
+    return [
+        '0x{:064x}'.format(_child_key(key, chain_code, index, parent_public_key)[0])
+        for index in range(offset, offset + count)]
+
+
+def derive_addresses(mnemonic, count, offset=0, passphrase='', processes=None) -> list:
+    # returns (address, private key) tuples, public keys are computed in worker processes
+    private_keys = derive_private_keys(mnemonic, count, offset, passphrase)
+    chunks = [private_keys[i:i + CHUNK_SIZE] for i in range(0, len(private_keys), CHUNK_SIZE)]
+
+    if len(chunks) <= 1:
+        return _to_addresses(private_keys)
+
+    with Pool(processes) as pool:
+        addresses = pool.map(_to_addresses, chunks)
+
+    return [address for chunk in addresses for address in chunk]
+
+
+def load_accounts(mnemonic, count, offset=0, passphrase='') -> list:
+    # same accounts as accounts.from_mnemonic(mnemonic, count), without a seed derivation per account
+    return [accounts.add(private_key) for private_key in derive_private_keys(mnemonic, count, offset, passphrase)]
+
+
+def _to_addresses(private_keys) -> list:
+    return [
+        (keys.PrivateKey(bytes.fromhex(private_key[2:])).public_key.to_checksum_address(), private_key)
+        for private_key in private_keys]
+
+
+def _master_key(seed) -> tuple:
+    digest = hmac.new(b'Bitcoin seed', seed, hashlib.sha512).digest()
+    return (int.from_bytes(digest[:32], 'big'), digest[32:])
+
+
+def _child_key(key, chain_code, index, public_key=None) -> tuple:
+    if index >= HARDENED:
+        data = b'\x00' + key.to_bytes(32, 'big')
+    else:
+        data = public_key or _compressed_public_key(key)
+
+    digest = hmac.new(chain_code, data + index.to_bytes(4, 'big'), hashlib.sha512).digest()
+    child_key = (int.from_bytes(digest[:32], 'big') + key) % CURVE_ORDER
+
+    return (child_key, digest[32:])
+
+
+def _compressed_public_key(key) -> bytes:
+    return keys.PrivateKey(key.to_bytes(32, 'big')).public_key.to_compressed_bytes()
@@ -0,0 +1,356 @@
+import json
+import os
+import random
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from brownie import (
+    accounts,
+    chain,
+    web3,
+)
+
+from scripts.async_reads import read_all
+from scripts.const import (
+    INSTANCE_OPERATOR,
+    REGISTRY_OWNER,
+)
+from scripts.deploy_registry import (
+    get_stakeholder_accounts,
+    MOCK_RISKPOOL_ID,
+)
+from scripts.gas_benchmark import (
+    deploy_benchmark_setup,
+    extract_stake_id,
+    BUNDLE_LIFETIME,
+    BUNDLE_STATE_ACTIVE,
+    BUNDLE_STATE_CLOSED,
+    REWARD_PERIOD,
+)
+from scripts.hd_accounts import (
+    load_accounts,
+    new_mnemonic,
+)
+from scripts.util import (
+    percentile,
+    send_pipelined,
+    unix_timestamp,
+    wait_for_all_confirmations,
+)
+
+ENV_STAKERS = 'LOAD_STAKERS'
+ENV_BUNDLES = 'LOAD_BUNDLES'
+ENV_ROUNDS = 'LOAD_ROUNDS'
+ENV_OPS_PER_ROUND = 'LOAD_OPS_PER_ROUND'
+ENV_CONCURRENCY = 'LOAD_CONCURRENCY'
+ENV_MIX = 'LOAD_MIX'
+ENV_REPORT_FILE = 'LOAD_REPORT_FILE'
+
+STAKERS_DEFAULT = 100
+BUNDLES_DEFAULT = 10
+ROUNDS_DEFAULT = 5
+OPS_PER_ROUND_DEFAULT = 200
+CONCURRENCY_DEFAULT = 16
+SEED_DEFAULT = 42
+
+# relative weights of the operations
+MIX_DEFAULT = {
+    'createStake': 4,
+    'stake': 3,
+    'restake': 1,
+    'claimRewards': 2,
+}
+
+OPERATIONS = list(MIX_DEFAULT.keys())
+
+# bundle ids 1..n are stake targets, stakes of the closed bundle below are restake sources
+RESTAKE_SOURCE_BUNDLE_ID = 2000001
+
+STAKE_AMOUNT = 10 * 10**18
+STAKER_BALANCE = 10**18 # eth per staker
+FUNDING_MARGIN = 2 # operations are assigned randomly to stakers
+
+BUNDLE_CAPITAL = 10000
+
+
+def help():
+    print('from scripts.load_test import run_load_test, help')
+    print('reports = run_load_test() # opt params stakers={}, bundles={}, rounds={}, ops_per_round={}, concurrency={}, mix={}'
+        .format(STAKERS_DEFAULT, BUNDLES_DEFAULT, ROUNDS_DEFAULT, OPS_PER_ROUND_DEFAULT, CONCURRENCY_DEFAULT, MIX_DEFAULT))
+    print()
+    print('# from the command line (settings via env variables {}, {}, {}, {}, {}, {}, {})'
+        .format(ENV_STAKERS, ENV_BUNDLES, ENV_ROUNDS, ENV_OPS_PER_ROUND, ENV_CONCURRENCY, ENV_MIX, ENV_REPORT_FILE))
+    print('LOAD_STAKERS=10000 LOAD_BUNDLES=1000 LOAD_MIX=createStake=4,stake=3,restake=1,claimRewards=2 brownie run scripts/load_test.py')
+
+
+def main():
+    run_load_test(
+        stakers=int(os.getenv(ENV_STAKERS, STAKERS_DEFAULT)),
+        bundles=int(os.getenv(ENV_BUNDLES, BUNDLES_DEFAULT)),
+        rounds=int(os.getenv(ENV_ROUNDS, ROUNDS_DEFAULT)),
+        ops_per_round=int(os.getenv(ENV_OPS_PER_ROUND, OPS_PER_ROUND_DEFAULT)),
+        concurrency=int(os.getenv(ENV_CONCURRENCY, CONCURRENCY_DEFAULT)),
+        mix=_get_mix(os.getenv(ENV_MIX)),
+        report_file=os.getenv(ENV_REPORT_FILE))
+
+
+def run_load_test(
+    stakeholder_accounts=None,
+    stakers=STAKERS_DEFAULT,
+    bundles=BUNDLES_DEFAULT,
+    rounds=ROUNDS_DEFAULT,
+    ops_per_round=OPS_PER_ROUND_DEFAULT,
+    concurrency=CONCURRENCY_DEFAULT,
+    mix=MIX_DEFAULT,
+    seed=SEED_DEFAULT,
+    report_file=None
+) -> list:
+    # one report per round, state (stakes) grows from round to round
+    if not stakeholder_accounts:
+        stakeholder_accounts = get_stakeholder_accounts(accounts)
+
+    rnd = random.Random(seed)
+    operations = rounds * ops_per_round
+    # weights passed as floats still yield whole numbers of restakes
+    restakes = int(operations * mix.get('restake', 0) // sum(mix.values()))
+
+    setup = deploy_load_setup(stakeholder_accounts, stakers, bundles, operations, restakes, concurrency)
+    reports = []
+
+    for round_number in range(1, rounds + 1):
+        ops = rnd.choices(list(mix.keys()), weights=list(mix.values()), k=ops_per_round)
+        report = run_round(setup, ops, concurrency, rnd.randrange(2**32))
+        report['round'] = round_number
+
+        reports.append(report)
+        print_report(report)
+
+        # let rewards accumulate for claimRewards and restake
+        chain.sleep(REWARD_PERIOD)
+        chain.mine(1)
+
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(reports, f, indent=4)
+
+    return reports
+
+
+def deploy_load_setup(a, stakers, bundles, operations, restakes, concurrency) -> dict:
+    setup = deploy_benchmark_setup(a)
+    setup['targets'] = register_bundles(setup, range(1, bundles + 1))
+
+    print('>>> deriving and funding {} stakers'.format(stakers))
+    staker_accounts = load_accounts(new_mnemonic(), stakers)
+    restakes_per_staker = -(-restakes // stakers)
+    dips_per_staker = FUNDING_MARGIN * (-(-operations // stakers) + restakes_per_staker) * STAKE_AMOUNT
+
+    fund_stakers(setup, staker_accounts, dips_per_staker)
+
+    setup['stakers'] = [
+        {'account': account, 'stakes': [], 'restakeable': []}
+        for account in staker_accounts]
+
+    # restake sources are stakes on a bundle that is closed before the load starts
+    if restakes_per_staker > 0:
+        print('>>> creating {} restakeable stakes per staker'.format(restakes_per_staker))
+        [source] = register_bundles(setup, [RESTAKE_SOURCE_BUNDLE_ID])
+
+        def create_sources(staker):
+            for _ in range(restakes_per_staker):
+                tx = setup['staking'].createStake(source, STAKE_AMOUNT, {'from': staker['account']})
+                staker['restakeable'].append(extract_stake_id(tx))
+
+        _run_per_staker(setup['stakers'], create_sources, concurrency)
+
+        setup['instance_service'].setBundleInfo(
+            RESTAKE_SOURCE_BUNDLE_ID,
+            MOCK_RISKPOOL_ID,
+            BUNDLE_STATE_CLOSED,
+            BUNDLE_CAPITAL * 10**setup['usdt'].decimals(),
+            {'from': a[INSTANCE_OPERATOR]})
+
+    return setup
+
+
+def register_bundles(setup, bundle_ids) -> list:
+    # bundle infos and registrations are sent with consecutive nonces, returns the bundle nft ids
+    a = setup['accounts']
+    instance_service = setup['instance_service']
+    registry = setup['registry']
+    capital = BUNDLE_CAPITAL * 10**setup['usdt'].decimals()
+    expiry_at = unix_timestamp() + BUNDLE_LIFETIME
+
+    print('>>> registering {} bundles'.format(len(bundle_ids)))
+    wait_for_all_confirmations(send_pipelined(a[INSTANCE_OPERATOR], [
+        (instance_service.setBundleInfo, (bundle_id, MOCK_RISKPOOL_ID, BUNDLE_STATE_ACTIVE, capital))
+        for bundle_id in bundle_ids]))
+
+    wait_for_all_confirmations(send_pipelined(a[REGISTRY_OWNER], [
+        (registry.registerBundle, (setup['instance_id'], MOCK_RISKPOOL_ID, bundle_id, 'bundle-{}'.format(bundle_id), expiry_at))
+        for bundle_id in bundle_ids]))
+
+    return read_all([
+        (registry.getBundleNftId, setup['instance_id'], bundle_id)
+        for bundle_id in bundle_ids])
+
+
+def fund_stakers(setup, staker_accounts, dips_per_staker):
+    instance_operator = setup['accounts'][INSTANCE_OPERATOR]
+    staking_wallet = setup['staking'].getStakingWallet()
+
+    for account in staker_accounts:
+        _set_balance(instance_operator, account, STAKER_BALANCE)
+
+    wait_for_all_confirmations(send_pipelined(instance_operator, [
+        (setup['dip'].transfer, (account, dips_per_staker))
+        for account in staker_accounts]))
+
+    # each staker approves with its own nonce
+    wait_for_all_confirmations(
+        [setup['dip'].approve(staking_wallet, dips_per_staker, {'from': account, 'required_confs': 0})
+        for account in staker_accounts])
+
+
+def run_round(setup, ops, concurrency, seed) -> dict:
+    # worker k sends the operations k, k + concurrency, ... from its own stakers, nonces never collide
+    stakers = setup['stakers']
+    concurrency = min(concurrency, len(stakers))
+    groups = [stakers[k::concurrency] for k in range(concurrency)]
+    block_start = web3.eth.block_number
+
+    def worker(k):
+        rnd = random.Random(seed + k)
+        return [_execute(setup, op, rnd.choice(groups[k]), rnd) for op in ops[k::concurrency]]
+
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = [sample for result in executor.map(worker, range(concurrency)) for sample in result]
+
+    elapsed = time.perf_counter() - start
+    report = {
+        'elapsed': elapsed,
+        'txs': len(samples),
+        'tps': len(samples) / elapsed,
+        'blocks': web3.eth.block_number - block_start,
+        'stakes': sum(len(staker['stakes']) for staker in stakers),
+        'operations': {},
+    }
+
+    for operation in OPERATIONS:
+        latencies = [s['latency'] for s in samples if s['operation'] == operation and not s['error']]
+        gas = [s['gas'] for s in samples if s['operation'] == operation and not s['error']]
+        errors = [s['error'] for s in samples if s['operation'] == operation and s['error']]
+
+        report['operations'][operation] = {
+            'count': len(latencies),
+            'errors': len(errors),
+            'tps': len(latencies) / elapsed,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'gasAvg': sum(gas) // len(gas) if gas else None,
+            'gasMax': max(gas) if gas else None,
+        }
+
+        for error in sorted(set(errors)):
+            print('{} failed: {}'.format(operation, error))
+
+    return report
+
+
+def print_report(report):
+    print('--- load round {}: {} txs in {:.1f}s, {:.1f} tx/s, {} blocks, {} stakes ---'.format(
+        report['round'], report['txs'], report['elapsed'], report['tps'], report['blocks'], report['stakes']))
+    print('Operation;Count;Errors;Tps;P50;P95;P99;GasAvg;GasMax')
+
+    for operation, stats in report['operations'].items():
+        if stats['count'] == 0 and stats['errors'] == 0:
+            continue
+
+        print('{};{};{};{:.1f};{};{};{};{};{}'.format(
+            operation,
+            stats['count'],
+            stats['errors'],
+            stats['tps'],
+            _format_seconds(stats['p50']),
+            _format_seconds(stats['p95']),
+            _format_seconds(stats['p99']),
+            stats['gasAvg'],
+            stats['gasMax']))
+
+    print('--- end of load round {} ---'.format(report['round']))
+
+
+def _execute(setup, operation, staker, rnd) -> dict:
+    staking = setup['staking']
+    fs = {'from': staker['account']}
+
+    # stakers without (restakeable) stakes create a stake instead
+    if operation in ['stake', 'claimRewards'] and not staker['stakes']:
+        operation = 'createStake'
+    elif operation == 'restake' and not staker['restakeable']:
+        operation = 'createStake'
+
+    sample = {'operation': operation, 'latency': None, 'gas': None, 'error': None}
+    start = time.perf_counter()
+
+    try:
+        if operation == 'createStake':
+            tx = staking.createStake(rnd.choice(setup['targets']), STAKE_AMOUNT, fs)
+            staker['stakes'].append(extract_stake_id(tx))
+        elif operation == 'stake':
+            tx = staking.stake(rnd.choice(staker['stakes']), STAKE_AMOUNT, fs)
+        elif operation == 'claimRewards':
+            tx = staking.claimRewards(rnd.choice(staker['stakes']), fs)
+        else:
+            tx = staking.restake(staker['restakeable'].pop(), rnd.choice(setup['targets']), fs)
+            staker['stakes'].append(tx.events['LogStakingRestaked']['stakeId'])
+
+        sample['gas'] = tx.gas_used
+    except Exception as e:
+        sample['error'] = str(e).split('\n')[0]
+
+    sample['latency'] = time.perf_counter() - start
+
+    return sample
+
+
+def _run_per_staker(stakers, function, concurrency):
+    concurrency = min(concurrency, len(stakers))
+    groups = [stakers[k::concurrency] for k in range(concurrency)]
+
+    def worker(group):
+        for staker in group:
+            function(staker)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, groups))
+
+
+def _set_balance(funder, account, amount):
+    # ganache sets balances directly, other nodes get a transfer
+    response = web3.provider.make_request('evm_setAccountBalance', [str(account), hex(amount)])
+
+    if 'error' in response:
+        funder.transfer(account, amount)
+
+
+def _format_seconds(value) -> str:
+    return '' if value is None else '{:.3f}'.format(value)
+
+
+def _get_mix(value) -> dict:
+    # eg 'createStake=4,stake=3,restake=1,claimRewards=2'
+    if not value:
+        return MIX_DEFAULT
+
+    mix = {}
+    for part in value.split(','):
+        (operation, weight) = part.split('=')
+        assert operation in OPERATIONS, 'unknown operation {}, use one of {}'.format(operation, OPERATIONS)
+        mix[operation] = int(weight)
+
+    return mix
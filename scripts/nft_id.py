@@ -0,0 +1,112 @@
+from functools import lru_cache
+
+# nft ids as created by ChainNft._getNextTokenId
+# format: (index * 10 ** digits + chainId) * 100 + digits
+# where digits is the number of digits of chainId (1 <= digits < 100)
+DIGITS_BASE = 100
+MAX_CHAIN_ID_DIGITS = 99
+
+# on mainnet/goerli the index starts with 1 (reserved for protocol nft) on other chains with 2
+CHAIN_IDS_INDEX_FROM_1 = [1, 5]
+
+
+@lru_cache(maxsize=None)
+def chain_params(chain_id: int):
+    assert chain_id > 0, 'chain id must be positive'
+
+    digits = len(str(chain_id))
+    assert digits <= MAX_CHAIN_ID_DIGITS, 'chain id {} exceeds {} digits'.format(chain_id, MAX_CHAIN_ID_DIGITS)
+
+    multiplier = 10 ** digits
+    return (digits, multiplier, chain_id * DIGITS_BASE + digits)
+
+
+def encode(index: int, chain_id: int) -> int:
+    assert index > 0, 'index must be positive'
+    (digits, multiplier, offset) = chain_params(chain_id)
+
+    return index * multiplier * DIGITS_BASE + offset
+
+
+def decode(nft_id: int):
+    # returns (index, chain_id, digits)
+    (rest, digits) = divmod(nft_id, DIGITS_BASE)
+    if digits == 0:
+        raise ValueError('invalid nft id {}: chain id digits is 0'.format(nft_id))
+
+    (index, chain_id) = divmod(rest, 10 ** digits)
+    if index == 0 or chain_id < 10 ** (digits - 1):
+        raise ValueError('invalid nft id {}: no {}-digit chain id or index 0'.format(nft_id, digits))
+
+    return (index, chain_id, digits)
+
+
+def get_chain_id(nft_id: int) -> int:
+    return decode(nft_id)[1]
+
+
+def get_index(nft_id: int) -> int:
+    return decode(nft_id)[0]
+
+
+def is_valid(nft_id: int) -> bool:
+    try:
+        decode(nft_id)
+        return True
+    except ValueError:
+        return False
+
+
+def first_index(chain_id: int) -> int:
+    return 1 if chain_id in CHAIN_IDS_INDEX_FROM_1 else 2
+
+
+def next_id(chain_id: int, total_minted: int) -> int:
+    # id that ChainNft mints next, given the current value of totalMinted()
+    return encode(first_index(chain_id) + total_minted, chain_id)
+
+
+def next_ids(chain_id: int, total_minted: int, count: int) -> list:
+    start = first_index(chain_id) + total_minted
+    return encode_many(range(start, start + count), chain_id)
+
+
+def encode_many(indices, chain_id: int) -> list:
+    (digits, multiplier, offset) = chain_params(chain_id)
+    step = multiplier * DIGITS_BASE
+
+    return [index * step + offset for index in indices]
+
+
+def decode_many(nft_ids) -> list:
+    # caches divisor per digit count, ids of a batch usually share the few chains involved
+    divisors = {}
+    decoded = []
+
+    for nft_id in nft_ids:
+        (rest, digits) = divmod(nft_id, DIGITS_BASE)
+        if digits == 0:
+            raise ValueError('invalid nft id {}'.format(nft_id))
+
+        if digits not in divisors:
+            divisors[digits] = (10 ** digits, 10 ** (digits - 1))
+
+        (divisor, min_chain_id) = divisors[digits]
+        (index, chain_id) = divmod(rest, divisor)
+
+        if index == 0 or chain_id < min_chain_id:
+            raise ValueError('invalid nft id {}'.format(nft_id))
+
+        decoded.append((index, chain_id, digits))
+
+    return decoded
+
+
+def partition_by_chain(nft_ids) -> dict:
+    nft_ids = list(nft_ids)
+    partitions = {}
+
+    for (nft_id, (index, chain_id, digits)) in zip(nft_ids, decode_many(nft_ids)):
+        partitions.setdefault(chain_id, []).append(nft_id)
+
+    return partitions
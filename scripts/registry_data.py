@@ -0,0 +1,297 @@
+import math
+
+from eth_utils import to_checksum_address
+
+# data encodings of registry objects (NftInfo.data)
+# objects registered with ChainRegistryV03 (1.2.0) or later use the compact encoding (abi.encodePacked)
+# objects registered with previous versions use abi.encode
+COMPACT_DATA_VERSION = (1 << 32) + (2 << 16)
+
+# object types as defined in ChainRegistryV01
+PROTOCOL = 1
+CHAIN = 2
+REGISTRY = 3
+TOKEN = 4
+STAKE = 10
+INSTANCE = 20
+PRODUCT = 21
+ORACLE = 22
+RISKPOOL = 23
+POLICY = 30
+BUNDLE = 40
+
+OBJECT_TYPES = [PROTOCOL, CHAIN, REGISTRY, TOKEN, STAKE, INSTANCE, PRODUCT, ORACLE, RISKPOOL, POLICY, BUNDLE]
+
+WORD = 32
+SSTORE_GAS = 22100 # zero to non-zero sstore to a cold slot
+
+# field sizes of the compact encoding
+ADDRESS_SIZE = 20
+ID_SIZE = 8 # uint64 component, riskpool and bundle ids
+TIMESTAMP_SIZE = 5 # uint40
+NFT_ID_SIZE = 12 # uint96
+OBJECT_TYPE_SIZE = 1 # uint8
+
+
+def is_compact(version: int) -> bool:
+    return version >= COMPACT_DATA_VERSION
+
+
+def decode_data(object_type: int, data: bytes, version: int) -> dict:
+    decoder = _get_codec(object_type)[1]
+    return decoder(bytes(data), is_compact(version))
+
+
+def encode_data(object_type: int, values: dict, compact: bool) -> bytes:
+    encoder = _get_codec(object_type)[0]
+    return encoder(values, compact)
+
+
+def decode_registry_data(data: bytes, compact: bool) -> dict:
+    return {'registry': _address(data, 0 if compact else WORD - ADDRESS_SIZE)}
+
+
+def encode_registry_data(values: dict, compact: bool) -> bytes:
+    return _pack_address(values['registry'], compact)
+
+
+def decode_token_data(data: bytes, compact: bool) -> dict:
+    return {'token': _address(data, 0 if compact else WORD - ADDRESS_SIZE)}
+
+
+def encode_token_data(values: dict, compact: bool) -> bytes:
+    return _pack_address(values['token'], compact)
+
+
+def decode_instance_data(data: bytes, compact: bool) -> dict:
+    if compact:
+        return {
+            'instanceId': data[0:32],
+            'registry': _address(data, 32),
+            'displayName': data[52:].decode(),
+        }
+
+    return {
+        'instanceId': data[0:32],
+        'registry': _address(data, 44),
+        'displayName': _abi_string(data, 2),
+    }
+
+
+def encode_instance_data(values: dict, compact: bool) -> bytes:
+    instance_id = _bytes32(values['instanceId'])
+    registry = _pack_address(values['registry'], compact)
+    name = values['displayName'].encode()
+
+    if compact:
+        return instance_id + registry + name
+
+    return instance_id + registry + _uint(3 * WORD) + _abi_bytes(name)
+
+
+def decode_component_data(data: bytes, compact: bool) -> dict:
+    if compact:
+        return {
+            'instanceId': data[0:32],
+            'componentId': _int(data, 32, ID_SIZE),
+            'token': _address(data, 40),
+        }
+
+    return {
+        'instanceId': data[0:32],
+        'componentId': _int(data, 32, WORD),
+        'token': _address(data, 76),
+    }
+
+
+def encode_component_data(values: dict, compact: bool) -> bytes:
+    size = ID_SIZE if compact else WORD
+
+    return (
+        _bytes32(values['instanceId'])
+        + _uint(values['componentId'], size)
+        + _pack_address(values['token'], compact))
+
+
+def decode_bundle_data(data: bytes, compact: bool) -> dict:
+    if compact:
+        return {
+            'instanceId': data[0:32],
+            'riskpoolId': _int(data, 32, ID_SIZE),
+            'bundleId': _int(data, 40, ID_SIZE),
+            'token': _address(data, 48),
+            'displayName': data[73:].decode(),
+            'expiryAt': _int(data, 68, TIMESTAMP_SIZE),
+        }
+
+    # abi.encode(instanceId, riskpoolId, bundleId, token, expiryAt, displayName)
+    return {
+        'instanceId': data[0:32],
+        'riskpoolId': _int(data, 32, WORD),
+        'bundleId': _int(data, 64, WORD),
+        'token': _address(data, 108),
+        'displayName': _abi_string(data, 5),
+        'expiryAt': _int(data, 128, WORD),
+    }
+
+
+def encode_bundle_data(values: dict, compact: bool) -> bytes:
+    instance_id = _bytes32(values['instanceId'])
+    token = _pack_address(values['token'], compact)
+    name = values['displayName'].encode()
+
+    if compact:
+        return (
+            instance_id
+            + _uint(values['riskpoolId'], ID_SIZE)
+            + _uint(values['bundleId'], ID_SIZE)
+            + token
+            + _uint(values['expiryAt'], TIMESTAMP_SIZE)
+            + name)
+
+    return (
+        instance_id
+        + _uint(values['riskpoolId'])
+        + _uint(values['bundleId'])
+        + token
+        + _uint(values['expiryAt'])
+        + _uint(6 * WORD)
+        + _abi_bytes(name))
+
+
+def decode_stake_data(data: bytes, compact: bool) -> dict:
+    if compact:
+        return {
+            'target': _int(data, 0, NFT_ID_SIZE),
+            'targetType': _int(data, NFT_ID_SIZE, OBJECT_TYPE_SIZE),
+        }
+
+    return {
+        'target': _int(data, 0, WORD),
+        'targetType': _int(data, WORD, WORD),
+    }
+
+
+def encode_stake_data(values: dict, compact: bool) -> bytes:
+    if compact:
+        return _uint(values['target'], NFT_ID_SIZE) + _uint(values['targetType'], OBJECT_TYPE_SIZE)
+
+    return _uint(values['target']) + _uint(values['targetType'])
+
+
+def storage_slots(data: bytes) -> int:
+    # solidity bytes: up to 31 bytes are stored inline with the length, longer data needs a length slot plus content slots
+    if len(data) == 0:
+        return 0
+
+    if len(data) < WORD:
+        return 1
+
+    return 1 + math.ceil(len(data) / WORD)
+
+
+def compare_encodings(display_name='my test bundle') -> dict:
+    # storage slots and sstore gas per object type for the abi and the compact data encoding
+    instance_id = bytes(range(32))
+    address = '0x' + '11' * ADDRESS_SIZE
+
+    samples = {
+        REGISTRY: {'registry': address},
+        TOKEN: {'token': address},
+        INSTANCE: {'instanceId': instance_id, 'registry': address, 'displayName': display_name},
+        RISKPOOL: {'instanceId': instance_id, 'componentId': 1, 'token': address},
+        BUNDLE: {
+            'instanceId': instance_id,
+            'riskpoolId': 1,
+            'bundleId': 1,
+            'token': address,
+            'displayName': display_name,
+            'expiryAt': 2**32,
+        },
+        STAKE: {'target': 10**20, 'targetType': BUNDLE},
+    }
+
+    results = {}
+
+    print('--- data encoding (display name {} bytes) ---'.format(len(display_name.encode())))
+    print('ObjectType;AbiBytes;AbiSlots;CompactBytes;CompactSlots;SstoreGasSaved')
+
+    for object_type, values in samples.items():
+        abi_data = encode_data(object_type, values, False)
+        compact_data = encode_data(object_type, values, True)
+        saved = SSTORE_GAS * (storage_slots(abi_data) - storage_slots(compact_data))
+
+        results[object_type] = {
+            'abiBytes': len(abi_data),
+            'abiSlots': storage_slots(abi_data),
+            'compactBytes': len(compact_data),
+            'compactSlots': storage_slots(compact_data),
+            'sstoreGasSaved': saved,
+        }
+
+        print('{};{};{};{};{};{}'.format(
+            object_type,
+            len(abi_data),
+            storage_slots(abi_data),
+            len(compact_data),
+            storage_slots(compact_data),
+            saved))
+
+    print('--- end of data encoding ---')
+
+    return results
+
+
+def _get_codec(object_type):
+    if object_type == REGISTRY:
+        return (encode_registry_data, decode_registry_data)
+    elif object_type == TOKEN:
+        return (encode_token_data, decode_token_data)
+    elif object_type == INSTANCE:
+        return (encode_instance_data, decode_instance_data)
+    elif object_type in [PRODUCT, ORACLE, RISKPOOL]:
+        return (encode_component_data, decode_component_data)
+    elif object_type == BUNDLE:
+        return (encode_bundle_data, decode_bundle_data)
+    elif object_type == STAKE:
+        return (encode_stake_data, decode_stake_data)
+
+    raise ValueError('object type {} has no data encoding'.format(object_type))
+
+
+def _int(data, offset, size) -> int:
+    if len(data) < offset + size:
+        raise ValueError('data too short: {} bytes, field at {}+{}'.format(len(data), offset, size))
+
+    return int.from_bytes(data[offset:offset + size], 'big')
+
+
+def _address(data, offset) -> str:
+    return to_checksum_address(data[offset:offset + ADDRESS_SIZE].rjust(ADDRESS_SIZE, b'\x00'))
+
+
+def _abi_string(data, head_index) -> str:
+    offset = _int(data, WORD * head_index, WORD)
+    length = _int(data, offset, WORD)
+    return data[offset + WORD:offset + WORD + length].decode()
+
+
+def _uint(value, size=WORD) -> bytes:
+    return int(value).to_bytes(size, 'big')
+
+
+def _bytes32(value) -> bytes:
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith('0x') else value)
+
+    return bytes(value).rjust(WORD, b'\x00')
+
+
+def _pack_address(address, compact) -> bytes:
+    value = bytes.fromhex(str(address)[2:])
+    return value if compact else value.rjust(WORD, b'\x00')
+
+
+def _abi_bytes(value) -> bytes:
+    padding = (WORD - len(value) % WORD) % WORD
+    return _uint(len(value)) + value + b'\x00' * padding
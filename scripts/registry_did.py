@@ -0,0 +1,117 @@
+import time
+
+from eth_utils import event_abi_to_log_topic
+
+from brownie import (
+    web3,
+    ChainRegistryV03,
+)
+
+from scripts.util import contract_from_address
+
+# did format as implemented in ChainRegistryV01.tokenDID
+BASE_DID = 'did:nft:eip155:'
+
+OBJECT_REGISTERED = 'LogChainRegistryObjectRegistered'
+OBJECT_TYPE_REGISTRY = 3
+
+BLOCK_CHUNK_SIZE = 2000 # max block range per eth_getLogs call
+
+
+def fetch_registered_objects(registry, from_block=0, to_block=None, chunk_size=BLOCK_CHUNK_SIZE):
+    # returns list of {id, chain, objectType} for all objects registered in the block range
+    event_abi = [e for e in registry.abi if e['type'] == 'event' and e['name'] == OBJECT_REGISTERED][0]
+    process_log = web3.eth.contract(address=str(registry), abi=registry.abi).events[OBJECT_REGISTERED]().processLog
+    topic = web3.toHex(event_abi_to_log_topic(event_abi))
+
+    if to_block is None:
+        to_block = web3.eth.block_number
+
+    objects = []
+
+    for start in range(from_block, to_block + 1, chunk_size):
+        logs = web3.eth.get_logs({
+            'address': str(registry),
+            'fromBlock': start,
+            'toBlock': min(start + chunk_size - 1, to_block),
+            'topics': [topic],
+        })
+
+        for log in logs:
+            args = process_log(log)['args']
+            objects.append({
+                'id': args['id'],
+                'chain': chain_to_int(args['chain']),
+                'objectType': args['objectType'],
+            })
+
+    return objects
+
+
+def get_registry_addresses(registry, objects):
+    # tokenDID uses the first registry registered for a chain
+    registry_ids = {}
+
+    for obj in objects:
+        if obj['objectType'] == OBJECT_TYPE_REGISTRY and obj['chain'] not in registry_ids:
+            registry_ids[obj['chain']] = obj['id']
+
+    return {
+        chain: str(registry.decodeRegistryData(registry_id)).lower()
+        for chain, registry_id in registry_ids.items()}
+
+
+def build_dids(objects, registry_addresses) -> dict:
+    prefixes = {
+        chain: '{}{}_erc721:{}_'.format(BASE_DID, chain, address)
+        for chain, address in registry_addresses.items()}
+
+    return {obj['id']: '{}{}'.format(prefixes[obj['chain']], obj['id']) for obj in objects}
+
+
+def generate_dids(registry, from_block=0, to_block=None) -> dict:
+    objects = fetch_registered_objects(registry, from_block, to_block)
+    return build_dids(objects, get_registry_addresses(registry, objects))
+
+
+def benchmark(registry_address, from_block=0, sample_size=100):
+    registry = contract_from_address(ChainRegistryV03, registry_address)
+
+    start = time.perf_counter()
+    objects = fetch_registered_objects(registry, from_block)
+    registry_addresses = get_registry_addresses(registry, objects)
+    fetch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dids = build_dids(objects, registry_addresses)
+    build_time = time.perf_counter() - start
+
+    ids = [obj['id'] for obj in objects][:sample_size]
+    gas_used = 0
+
+    start = time.perf_counter()
+    for nft_id in ids:
+        assert registry.tokenDID(nft_id) == dids[nft_id], 'did mismatch for id {}'.format(nft_id)
+    onchain_time = time.perf_counter() - start
+
+    for nft_id in ids:
+        gas_used += web3.eth.estimate_gas({
+            'to': str(registry),
+            'data': registry.tokenDID.encode_input(nft_id)})
+
+    print('--- did generation ---')
+    print('offchain: {} dids, fetch {:.3f}s, build {:.6f}s ({:.1f} us/did)'.format(
+        len(dids), fetch_time, build_time, 1e6 * build_time / max(1, len(dids))))
+    print('onchain: {} dids, {:.3f}s ({:.1f} ms/did), avg gas {:.0f}'.format(
+        len(ids), onchain_time, 1e3 * onchain_time / max(1, len(ids)), gas_used / max(1, len(ids))))
+    print('--- end of did generation ---')
+
+    return dids
+
+
+def chain_to_int(chain) -> int:
+    # ChainId is bytes5
+    if isinstance(chain, int):
+        return chain
+
+    return int.from_bytes(bytes(chain), 'big')
@@ -0,0 +1,206 @@
+import gzip
+import json
+import os
+import time
+
+from functools import partial
+
+from brownie import (
+    web3,
+    ChainNft,
+    ChainRegistryImport,
+    ChainRegistryV01,
+)
+
+from scripts.async_reads import AsyncReader
+from scripts.deploy_registry import deploy_proxy
+from scripts.nft_id import get_index, next_ids
+
+from scripts.registry_data import (
+    decode_data,
+    encode_data,
+    CHAIN,
+    OBJECT_TYPES,
+    PROTOCOL,
+    REGISTRY,
+    STAKE,
+)
+
+from scripts.util import contract_from_address
+
+ENV_REGISTRY_ADDRESS = 'EXPORT_REGISTRY_ADDRESS'
+ENV_EXPORT_FILE = 'EXPORT_FILE'
+ENV_MAX_CONCURRENCY = 'EXPORT_MAX_CONCURRENCY'
+
+EXPORT_FILE_DEFAULT = 'registry_export.jsonl.gz'
+EXPORT_FORMAT = 1
+MAX_CONCURRENCY_DEFAULT = 16
+BATCH_SIZE_DEFAULT = 50 # objects per import transaction
+
+
+def help():
+    print('from scripts.registry_export import export_registry, import_registry, deploy_import_registry, help')
+    print("export_registry(registry, 'registry_export.jsonl.gz') # opt param max_concurrency={}".format(MAX_CONCURRENCY_DEFAULT))
+    print('(registry_import, nft) = deploy_import_registry(registry_owner, proxy_admin_owner)')
+    print("import_registry(registry_import, 'registry_export.jsonl.gz', registry_owner) # opt param batch_size={}".format(BATCH_SIZE_DEFAULT))
+    print()
+    print('# from the command line (settings via env variables {}, {}, {})'
+        .format(ENV_REGISTRY_ADDRESS, ENV_EXPORT_FILE, ENV_MAX_CONCURRENCY))
+    print('brownie run scripts/registry_export.py --network mainnet')
+
+
+def main():
+    registry_address = os.getenv(ENV_REGISTRY_ADDRESS)
+    assert registry_address, 'registry address missing, set env variable {}'.format(ENV_REGISTRY_ADDRESS)
+
+    export_registry(
+        contract_from_address(ChainRegistryV01, registry_address),
+        os.getenv(ENV_EXPORT_FILE, EXPORT_FILE_DEFAULT),
+        max_concurrency=int(os.getenv(ENV_MAX_CONCURRENCY, MAX_CONCURRENCY_DEFAULT)))
+
+
+def export_registry(registry, file_name=EXPORT_FILE_DEFAULT, max_concurrency=MAX_CONCURRENCY_DEFAULT) -> int:
+    start = time.perf_counter()
+    block = web3.eth.block_number
+    nft = contract_from_address(ChainNft, registry.getNft())
+
+    # pin all reads to the same block
+    def at(fn, *args):
+        return partial(fn, *args, block_identifier=block)
+
+    with AsyncReader(max_concurrency) as reader:
+        chains = reader.read([
+            at(registry.getChainId, idx)
+            for idx in range(registry.chains(block_identifier=block))])
+
+        chain_types = [(chain, t) for chain in chains for t in OBJECT_TYPES]
+        counts = reader.read([at(registry.objects, chain, t) for (chain, t) in chain_types])
+
+        nft_ids = reader.read([
+            at(registry.getNftId, chain, t, idx)
+            for ((chain, t), count) in zip(chain_types, counts)
+            for idx in range(count)])
+
+        # mint order, needed to remap stake targets on import
+        nft_ids = sorted(nft_ids, key=get_index)
+
+        infos = reader.read([at(registry.getNftInfo, nft_id) for nft_id in nft_ids])
+        owners = reader.read([at(registry.ownerOf, nft_id) for nft_id in nft_ids])
+        uris = reader.read([at(nft.tokenURI, nft_id) for nft_id in nft_ids])
+
+    with gzip.open(file_name, 'wt') as f:
+        f.write(json.dumps({
+            'format': EXPORT_FORMAT,
+            'registry': str(registry),
+            'chainId': web3.chain_id,
+            'block': block,
+            'objects': len(nft_ids),
+        }) + '\n')
+
+        for (info, owner, uri) in zip(infos, owners, uris):
+            info = info.dict()
+            f.write(json.dumps({
+                'id': info['id'],
+                'chain': str(info['chain']),
+                'objectType': info['objectType'],
+                'state': info['state'],
+                'owner': str(owner),
+                'uri': uri,
+                'data': web3.toHex(bytes(info['data'])),
+                'version': info['version'],
+            }, separators=(',', ':')) + '\n')
+
+    print('exported {} objects of registry {} at block {} to {} in {:.1f}s'.format(
+        len(nft_ids), registry, block, file_name, time.perf_counter() - start))
+
+    return len(nft_ids)
+
+
+def read_export(file_name=EXPORT_FILE_DEFAULT):
+    with gzip.open(file_name, 'rt') as f:
+        header = json.loads(f.readline())
+        assert header['format'] == EXPORT_FORMAT, 'unsupported export format {}'.format(header['format'])
+
+        objects = [json.loads(line) for line in f]
+
+    assert len(objects) == header['objects'], 'export incomplete: {} of {} objects'.format(
+        len(objects), header['objects'])
+
+    return (header, objects)
+
+
+def deploy_import_registry(registry_owner, proxy_admin_owner):
+    implementation = ChainRegistryImport.deploy({'from': registry_owner})
+    proxy_admin = deploy_proxy(implementation, registry_owner, proxy_admin_owner)
+
+    registry = contract_from_address(ChainRegistryImport, proxy_admin.getProxy())
+    nft = ChainNft.deploy(registry, {'from': registry_owner})
+    registry.setNftContract(nft, registry_owner, {'from': registry_owner})
+
+    return (registry, nft)
+
+
+def import_registry(registry, file_name, owner, batch_size=BATCH_SIZE_DEFAULT) -> dict:
+    # returns mapping of exported nft ids to ids in the target registry
+    start = time.perf_counter()
+    (header, objects) = read_export(file_name)
+    nft = contract_from_address(ChainNft, registry.getNft())
+
+    id_map = {}
+    pending = []
+
+    for obj in objects:
+        object_type = obj['objectType']
+
+        # protocol can not be minted on test chains, chains and registries already present are reused
+        if object_type == PROTOCOL:
+            continue
+
+        if object_type in [CHAIN, REGISTRY] and registry.objects(obj['chain'], object_type) > 0:
+            id_map[obj['id']] = registry.getNftId(obj['chain'], object_type, 0)
+            continue
+
+        pending.append(obj)
+
+    # ids are assigned in mint order, stake targets may be part of the same batch
+    new_ids = next_ids(web3.chain_id, nft.totalMinted(), len(pending))
+    id_map.update({obj['id']: new_id for (obj, new_id) in zip(pending, new_ids)})
+
+    for idx in range(0, len(pending), batch_size):
+        batch = pending[idx:idx + batch_size]
+        tx = registry.importObjects(
+            [_to_import_object(obj, id_map) for obj in batch],
+            {'from': owner})
+
+        minted = [evt['id'] for evt in tx.events['LogChainRegistryObjectRegistered']]
+        expected = [id_map[obj['id']] for obj in batch]
+        assert minted == expected, 'unexpected nft ids minted, other mints in parallel?'
+
+        print('imported {} of {} objects (gas {})'.format(idx + len(batch), len(pending), tx.gas_used))
+
+    print('imported {} objects from {} (chain {}, block {}) in {:.1f}s'.format(
+        len(pending), file_name, header['chainId'], header['block'], time.perf_counter() - start))
+
+    return id_map
+
+
+def _to_import_object(obj, id_map):
+    data = bytes.fromhex(obj['data'][2:])
+
+    # convert to compact encoding, chain objects have no data
+    if len(data) > 0:
+        values = decode_data(obj['objectType'], data, obj['version'])
+
+        if obj['objectType'] == STAKE:
+            values['target'] = id_map[values['target']]
+
+        data = encode_data(obj['objectType'], values, compact=True)
+
+    return (
+        obj['owner'],
+        obj['chain'],
+        obj['objectType'],
+        obj['state'],
+        obj['uri'],
+        data)
+
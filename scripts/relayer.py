@@ -0,0 +1,413 @@
+import asyncio
+import os
+import threading
+import time
+
+from collections import deque
+from dataclasses import dataclass
+
+from brownie import (
+    accounts,
+    web3,
+    StakingV03,
+)
+
+from scripts.const import ACCOUNTS_MNEMONIC
+from scripts.staking_signature import (
+    get_restake_digest,
+    get_stake_digest,
+    recover_signer,
+)
+from scripts.util import (
+    contract_from_address,
+    get_account,
+    percentile,
+)
+
+# relayer settings may be overwritten via env variables (eg in .env)
+ENV_STAKING_ADDRESS = 'RELAYER_STAKING_ADDRESS'
+ENV_ACCOUNT_MNEMONIC = 'RELAYER_MNEMONIC'
+ENV_ACCOUNT_OFFSET = 'RELAYER_ACCOUNT_OFFSET'
+ENV_HOST = 'RELAYER_HOST'
+ENV_PORT = 'RELAYER_PORT'
+ENV_BATCH_SIZE = 'RELAYER_BATCH_SIZE'
+ENV_BATCH_WAIT = 'RELAYER_BATCH_WAIT'
+
+HOST_DEFAULT = '127.0.0.1'
+PORT_DEFAULT = 8000
+BATCH_SIZE_DEFAULT = 20
+BATCH_WAIT_DEFAULT = 0.5 # seconds to wait for a batch to fill up
+QUEUE_SIZE_DEFAULT = 10000
+LATENCY_WINDOW = 10000 # number of latest requests used for latency metrics
+FINISHED_TTL_DEFAULT = 3600 # seconds mined and failed requests are kept for status queries
+
+REQUEST_STAKE = 'stake'
+REQUEST_RESTAKE = 'restake'
+
+STATUS_QUEUED = 'queued'
+STATUS_SUBMITTED = 'submitted'
+STATUS_MINED = 'mined'
+STATUS_FAILED = 'failed'
+
+
+# plain dataclasses, fastapi validates them as request bodies
+@dataclass
+class StakeRequest:
+    owner: str
+    target: int
+    dipAmount: int
+    signatureId: str
+    signature: str
+
+
+@dataclass
+class RestakeRequest:
+    owner: str
+    stakeId: int
+    newTarget: int
+    signatureId: str
+    signature: str
+
+
+class RelayerError(Exception):
+    pass
+
+
+class Relayer:
+
+    def __init__(
+        self,
+        staking,
+        relayer_account,
+        batch_size=BATCH_SIZE_DEFAULT,
+        batch_wait=BATCH_WAIT_DEFAULT,
+        queue_size=QUEUE_SIZE_DEFAULT,
+        finished_ttl=FINISHED_TTL_DEFAULT,
+        chain_id=None
+    ):
+        self.staking = staking
+        self.account = relayer_account
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.finished_ttl = finished_ttl
+        self.chain_id = chain_id or web3.chain_id
+        self.message_helper = str(staking.getMessageHelperAddress())
+
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+        # requests, counters and latencies are shared between the event loop and the batch sender thread
+        self._lock = threading.Lock()
+        self.requests = {} # signature id -> request status
+        self.finished = deque() # (finished at, request) in order of completion
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counters = {
+            'received': 0,
+            'rejected': 0,
+            'duplicates': 0,
+            'submitted': 0,
+            'mined': 0,
+            'failed': 0,
+            'batches': 0,
+        }
+
+
+    def submit_stake(self, request: StakeRequest) -> dict:
+        digest = get_stake_digest(
+            request.target,
+            request.dipAmount,
+            request.signatureId,
+            self.chain_id,
+            self.message_helper)
+
+        args = [request.owner, request.target, request.dipAmount, request.signatureId, request.signature]
+        return self._submit(REQUEST_STAKE, request.owner, request.signatureId, request.signature, digest, args)
+
+
+    def submit_restake(self, request: RestakeRequest) -> dict:
+        digest = get_restake_digest(
+            request.stakeId,
+            request.newTarget,
+            request.signatureId,
+            self.chain_id,
+            self.message_helper)
+
+        args = [request.owner, request.stakeId, request.newTarget, request.signatureId, request.signature]
+        return self._submit(REQUEST_RESTAKE, request.owner, request.signatureId, request.signature, digest, args)
+
+
+    def get_status(self, signature_id: str) -> dict:
+        key = _normalize_signature_id(signature_id)
+
+        with self._lock:
+            if key not in self.requests:
+                raise RelayerError('unknown signature id {}'.format(signature_id))
+
+            return self._public_status(self.requests[key])
+
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            queue_latencies = [entry['queue'] for entry in self.latencies]
+            total_latencies = [entry['total'] for entry in self.latencies]
+
+            metrics = {
+                'queueDepth': self.queue.qsize(),
+                'pending': sum(1 for r in self.requests.values() if r['status'] in [STATUS_QUEUED, STATUS_SUBMITTED]),
+            }
+
+            metrics.update(self.counters)
+
+        for pct in [50, 95, 99]:
+            metrics['queueLatencyP{}'.format(pct)] = percentile(queue_latencies, pct)
+            metrics['totalLatencyP{}'.format(pct)] = percentile(total_latencies, pct)
+
+        return metrics
+
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._next_batch()
+
+            # brownie calls are blocking, keep the event loop responsive
+            await loop.run_in_executor(None, self._send_batch, batch)
+
+
+    async def _next_batch(self) -> list:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+
+    def _submit(self, request_type, owner, signature_id, signature, digest, args) -> dict:
+        with self._lock:
+            self.counters['received'] += 1
+            key = _normalize_signature_id(signature_id)
+            self._prune()
+
+            # failed requests may be resubmitted with the same signature
+            if key in self.requests and self.requests[key]['status'] != STATUS_FAILED:
+                self.counters['duplicates'] += 1
+                raise RelayerError('duplicate signature id {}'.format(signature_id))
+
+            # same check as StakingMessageHelper.getSigner, saves gas for invalid requests
+            try:
+                signer = recover_signer(digest, signature)
+            except Exception as e:
+                self.counters['rejected'] += 1
+                raise RelayerError('invalid signature: {}'.format(e))
+
+            if signer.lower() != owner.lower():
+                self.counters['rejected'] += 1
+                raise RelayerError('signer {} does not match owner {}'.format(signer, owner))
+
+            if self.queue.full():
+                self.counters['rejected'] += 1
+                raise RelayerError('queue full')
+
+            request = {
+                'type': request_type,
+                'signatureId': key,
+                'args': args,
+                'status': STATUS_QUEUED,
+                'receivedAt': time.monotonic(),
+                'submittedAt': None,
+                'tx': None,
+                'error': None,
+            }
+
+            self.requests[key] = request
+            self.queue.put_nowait(request)
+
+            return self._public_status(request)
+
+
+    def _send_batch(self, batch):
+        # runs in an executor thread, the lock is only held for state updates, not for rpc calls
+        with self._lock:
+            self.counters['batches'] += 1
+
+        pending = []
+
+        # send all transactions of the batch without waiting for them to be mined
+        for request in batch:
+            with self._lock:
+                request['submittedAt'] = time.monotonic()
+
+            try:
+                tx = self._get_method(request['type'])(
+                    *request['args'],
+                    {'from': self.account, 'required_confs': 0})
+
+                with self._lock:
+                    request['status'] = STATUS_SUBMITTED
+                    request['tx'] = tx.txid
+                    self.counters['submitted'] += 1
+
+                pending.append((request, tx))
+            except Exception as e:
+                self._fail(request, e)
+
+        for (request, tx) in pending:
+            try:
+                tx.wait(1)
+
+                if tx.status == 1:
+                    with self._lock:
+                        request['status'] = STATUS_MINED
+                        self.counters['mined'] += 1
+                        self._finish(request)
+                else:
+                    self._fail(request, tx.revert_msg)
+            except Exception as e:
+                self._fail(request, e)
+
+            with self._lock:
+                now = time.monotonic()
+                self.latencies.append({
+                    'queue': request['submittedAt'] - request['receivedAt'],
+                    'total': now - request['receivedAt'],
+                })
+
+
+    def _get_method(self, request_type):
+        if request_type == REQUEST_STAKE:
+            return self.staking.createStakeWithSignature
+
+        return self.staking.restakeWithSignature
+
+
+    def _fail(self, request, error):
+        with self._lock:
+            request['status'] = STATUS_FAILED
+            request['error'] = str(error)
+            self.counters['failed'] += 1
+            self._finish(request)
+
+
+    def _finish(self, request):
+        # caller holds the lock
+        self.finished.append((time.monotonic(), request))
+
+
+    def _prune(self):
+        # drops mined and failed requests after finished_ttl seconds, caller holds the lock
+        expired_at = time.monotonic() - self.finished_ttl
+
+        while self.finished and self.finished[0][0] <= expired_at:
+            (_, request) = self.finished.popleft()
+            key = request['signatureId']
+
+            # a failed request may have been replaced by a resubmission
+            if self.requests.get(key) is request:
+                del self.requests[key]
+
+
+    def _public_status(self, request) -> dict:
+        return {
+            'type': request['type'],
+            'signatureId': request['signatureId'],
+            'status': request['status'],
+            'tx': request['tx'],
+            'error': request['error'],
+        }
+
+
+def create_app(relayer: Relayer):
+    # web server dependencies are only needed to run the service
+    from fastapi import FastAPI, HTTPException
+
+    app = FastAPI(title='Staking Relayer')
+
+    @app.on_event('startup')
+    async def startup():
+        app.state.worker = asyncio.create_task(relayer.run())
+
+    @app.on_event('shutdown')
+    async def shutdown():
+        app.state.worker.cancel()
+
+    def handle(submit, request):
+        try:
+            return submit(request)
+        except (RelayerError, ValueError, AssertionError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.post('/stake')
+    async def stake(request: StakeRequest):
+        return handle(relayer.submit_stake, request)
+
+    @app.post('/restake')
+    async def restake(request: RestakeRequest):
+        return handle(relayer.submit_restake, request)
+
+    @app.get('/status/{signature_id}')
+    async def status(signature_id: str):
+        try:
+            return relayer.get_status(signature_id)
+        except RelayerError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    @app.get('/metrics')
+    async def metrics():
+        return relayer.get_metrics()
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    staking_address = os.getenv(ENV_STAKING_ADDRESS)
+    assert staking_address, 'staking contract address missing, set env variable {}'.format(ENV_STAKING_ADDRESS)
+
+    staking = contract_from_address(StakingV03, staking_address)
+    relayer_account = get_relayer_account()
+
+    relayer = Relayer(
+        staking,
+        relayer_account,
+        batch_size=int(os.getenv(ENV_BATCH_SIZE, BATCH_SIZE_DEFAULT)),
+        batch_wait=float(os.getenv(ENV_BATCH_WAIT, BATCH_WAIT_DEFAULT)))
+
+    host = os.getenv(ENV_HOST, HOST_DEFAULT)
+    port = int(os.getenv(ENV_PORT, PORT_DEFAULT))
+
+    print('relayer {} for staking {} listening on {}:{}'.format(
+        relayer_account, staking, host, port))
+
+    uvicorn.run(create_app(relayer), host=host, port=port)
+
+
+def get_relayer_account():
+    mnemonic = os.getenv(ENV_ACCOUNT_MNEMONIC)
+    offset = int(os.getenv(ENV_ACCOUNT_OFFSET, 0))
+
+    # local ganache/development accounts are unlocked
+    if not mnemonic and web3.chain_id == 1337:
+        return accounts[offset]
+
+    return get_account(mnemonic or ACCOUNTS_MNEMONIC, offset)
+
+
+def _normalize_signature_id(signature_id) -> str:
+    if isinstance(signature_id, (bytes, bytearray)):
+        return '0x{}'.format(bytes(signature_id).hex().ljust(64, '0'))
+
+    value = str(signature_id).lower()
+    if value.startswith('0x'):
+        value = value[2:]
+
+    return '0x{}'.format(value.ljust(64, '0'))
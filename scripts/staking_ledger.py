@@ -0,0 +1,315 @@
+import json
+import os
+import random
+
+from eth_utils import event_abi_to_log_topic
+
+from brownie import (
+    web3,
+    StakingV03,
+)
+
+from scripts.util import contract_from_address
+
+# ledger settings may be overwritten via env variables (eg in .env)
+ENV_STAKING_ADDRESS = 'LEDGER_STAKING_ADDRESS'
+ENV_FROM_BLOCK = 'LEDGER_FROM_BLOCK'
+ENV_CHECKPOINT_FILE = 'LEDGER_CHECKPOINT'
+ENV_VERIFY_SAMPLE = 'LEDGER_VERIFY_SAMPLE'
+
+CHECKPOINT_FILE_DEFAULT = 'staking_ledger.json'
+BLOCK_CHUNK_SIZE = 2000 # max block range per eth_getLogs call
+VERIFY_SAMPLE_DEFAULT = 20
+
+# pseudo event emitted by the pipeline once all logs up to a block are processed
+BLOCK_PROCESSED = 'BlockProcessed'
+
+STAKED = 'LogStakingStaked'
+UNSTAKED = 'LogStakingUnstaked'
+RESTAKED = 'LogStakingRestaked'
+REWARDS_UPDATED = 'LogStakingRewardsUpdated'
+REWARDS_CLAIMED = 'LogStakingRewardsClaimed'
+RESERVES_INCREASED = 'LogStakingRewardReservesIncreased'
+RESERVES_DECREASED = 'LogStakingRewardReservesDecreased'
+
+LEDGER_EVENTS = [
+    STAKED,
+    UNSTAKED,
+    RESTAKED,
+    REWARDS_UPDATED,
+    REWARDS_CLAIMED,
+    RESERVES_INCREASED,
+    RESERVES_DECREASED,
+]
+
+
+class StakingLedger:
+
+    def __init__(self, staking_address, from_block=0):
+        self.staking_address = str(staking_address)
+        self.block = from_block - 1 # last fully processed block
+        self.stake_balance = 0
+        self.reward_balance = 0
+        self.reward_reserves = 0
+        self.stakes = {} # stake id -> {target, stakeBalance, rewardBalance}
+        self.targets = {} # target id -> staked dip amount
+
+        # restake events do not include the old stake id, it is taken from
+        # the rewards update that precedes the restake in the same tx
+        self._last_rewards_update = (None, None)
+
+
+    def apply(self, event):
+        name = event['event']
+
+        if name == BLOCK_PROCESSED:
+            self.block = event['blockNumber']
+            return
+
+        args = event['args']
+
+        if name == REWARDS_UPDATED:
+            info = self._get_stake(args['id'])
+            info['rewardBalance'] = args['newBalance']
+            self.reward_balance += args['amount']
+            self._last_rewards_update = (event['transactionHash'], args['id'])
+
+        elif name == STAKED:
+            info = self._get_stake(args['id'])
+            info['target'] = args['target']
+            info['stakeBalance'] = args['newBalance']
+            self._add_target(args['target'], args['amount'])
+            self.stake_balance += args['amount']
+
+        elif name == UNSTAKED:
+            info = self._get_stake(args['id'])
+            info['stakeBalance'] = args['newBalance']
+            self._add_target(args['target'], -args['amount'])
+            self.stake_balance -= args['amount']
+
+        elif name == REWARDS_CLAIMED:
+            info = self._get_stake(args['id'])
+            info['rewardBalance'] = args['newBalance']
+            self.reward_balance -= args['amount']
+            self.reward_reserves -= args['amount']
+
+        elif name == RESTAKED:
+            self._apply_restake(event)
+
+        elif name in [RESERVES_INCREASED, RESERVES_DECREASED]:
+            self.reward_reserves = args['newBalance']
+
+
+    def _apply_restake(self, event):
+        args = event['args']
+        (tx_hash, old_stake_id) = self._last_rewards_update
+        assert tx_hash == event['transactionHash'], 'restake without rewards update in tx {}'.format(event['transactionHash'])
+
+        old_info = self._get_stake(old_stake_id)
+        rewards = old_info['rewardBalance']
+
+        # accumulated rewards are moved from reserves to the new stake
+        self._add_target(old_info['target'], -old_info['stakeBalance'])
+        self.reward_reserves -= rewards
+        self.reward_balance -= rewards
+        self.stake_balance += rewards
+        old_info['stakeBalance'] = 0
+        old_info['rewardBalance'] = 0
+
+        new_info = self._get_stake(args['stakeId'])
+        new_info['target'] = args['newTrget']
+        new_info['stakeBalance'] = args['stakingAmount']
+        self._add_target(args['newTrget'], args['stakingAmount'])
+
+
+    def _get_stake(self, stake_id):
+        if stake_id not in self.stakes:
+            self.stakes[stake_id] = {
+                'target': None,
+                'stakeBalance': 0,
+                'rewardBalance': 0,
+            }
+
+        return self.stakes[stake_id]
+
+
+    def _add_target(self, target, amount):
+        self.targets[target] = self.targets.get(target, 0) + amount
+
+
+    def to_dict(self):
+        return {
+            'stakingAddress': self.staking_address,
+            'block': self.block,
+            'stakeBalance': self.stake_balance,
+            'rewardBalance': self.reward_balance,
+            'rewardReserves': self.reward_reserves,
+            'stakes': {str(stake_id): info for stake_id, info in self.stakes.items()},
+            'targets': {str(target): amount for target, amount in self.targets.items()},
+        }
+
+
+    @classmethod
+    def from_dict(cls, data):
+        ledger = cls(data['stakingAddress'])
+        ledger.block = data['block']
+        ledger.stake_balance = data['stakeBalance']
+        ledger.reward_balance = data['rewardBalance']
+        ledger.reward_reserves = data['rewardReserves']
+        ledger.stakes = {int(stake_id): info for stake_id, info in data['stakes'].items()}
+        ledger.targets = {int(target): amount for target, amount in data['targets'].items()}
+
+        return ledger
+
+
+def save_checkpoint(ledger, checkpoint_file=CHECKPOINT_FILE_DEFAULT):
+    # write to temp file first to never leave a truncated checkpoint behind
+    tmp_file = '{}.tmp'.format(checkpoint_file)
+    with open(tmp_file, 'w') as f:
+        json.dump(ledger.to_dict(), f)
+
+    os.replace(tmp_file, checkpoint_file)
+
+
+def load_checkpoint(staking_address, checkpoint_file=CHECKPOINT_FILE_DEFAULT, from_block=0):
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return StakingLedger(staking_address, from_block)
+
+    with open(checkpoint_file) as f:
+        ledger = StakingLedger.from_dict(json.load(f))
+
+    assert ledger.staking_address.lower() == str(staking_address).lower(), 'checkpoint {} is for staking {}'.format(
+        checkpoint_file, ledger.staking_address)
+
+    return ledger
+
+
+def fetch_logs(staking, from_block, to_block, chunk_size=BLOCK_CHUNK_SIZE):
+    topics = [[web3.toHex(topic) for topic in get_event_topics(staking).keys()]]
+
+    for start in range(from_block, to_block + 1, chunk_size):
+        end = min(start + chunk_size - 1, to_block)
+        logs = web3.eth.get_logs({
+            'address': str(staking),
+            'fromBlock': start,
+            'toBlock': end,
+            'topics': topics,
+        })
+
+        for log in logs:
+            yield log
+
+        yield {BLOCK_PROCESSED: end}
+
+
+def decode_logs(staking, logs):
+    decoders = get_event_topics(staking)
+
+    for log in logs:
+        if BLOCK_PROCESSED in log:
+            yield {'event': BLOCK_PROCESSED, 'blockNumber': log[BLOCK_PROCESSED]}
+            continue
+
+        decoded = decoders[bytes(log['topics'][0])](log)
+        yield {
+            'event': decoded['event'],
+            'args': dict(decoded['args']),
+            'blockNumber': decoded['blockNumber'],
+            'transactionHash': web3.toHex(decoded['transactionHash']),
+            'logIndex': decoded['logIndex'],
+        }
+
+
+def apply_events(ledger, events, checkpoint_file=None):
+    for event in events:
+        ledger.apply(event)
+
+        if event['event'] == BLOCK_PROCESSED and checkpoint_file:
+            save_checkpoint(ledger, checkpoint_file)
+
+        yield event
+
+
+def sync_ledger(
+    staking,
+    ledger=None,
+    to_block=None,
+    checkpoint_file=None,
+    chunk_size=BLOCK_CHUNK_SIZE
+):
+    if not ledger:
+        ledger = load_checkpoint(staking, checkpoint_file)
+
+    if to_block is None:
+        to_block = web3.eth.block_number
+
+    pipeline = apply_events(
+        ledger,
+        decode_logs(staking, fetch_logs(staking, ledger.block + 1, to_block, chunk_size)),
+        checkpoint_file)
+
+    events = sum(1 for event in pipeline if event['event'] != BLOCK_PROCESSED)
+    print('ledger synced to block {} ({} events processed)'.format(ledger.block, events))
+
+    return ledger
+
+
+def verify_ledger(ledger, staking, sample_size=VERIFY_SAMPLE_DEFAULT, seed=None):
+    # compares ledger against chain state at the last processed block
+    block = ledger.block
+    mismatches = []
+
+    def check(name, expected, actual):
+        if expected != actual:
+            mismatches.append((name, expected, actual))
+
+    check('stakeBalance', ledger.stake_balance, staking.stakeBalance(block_identifier=block))
+    check('rewardBalance', ledger.reward_balance, staking.rewardBalance(block_identifier=block))
+    check('rewardReserves', ledger.reward_reserves, staking.rewardReserves(block_identifier=block))
+
+    rng = random.Random(seed)
+    stake_ids = rng.sample(sorted(ledger.stakes.keys()), min(sample_size, len(ledger.stakes)))
+    targets = rng.sample(sorted(ledger.targets.keys()), min(sample_size, len(ledger.targets)))
+
+    for stake_id in stake_ids:
+        info = staking.getInfo(stake_id, block_identifier=block).dict()
+        check('stake {} stakeBalance'.format(stake_id), ledger.stakes[stake_id]['stakeBalance'], info['stakeBalance'])
+        check('stake {} rewardBalance'.format(stake_id), ledger.stakes[stake_id]['rewardBalance'], info['rewardBalance'])
+
+    for target in targets:
+        check('target {} stakes'.format(target), ledger.targets[target], staking.stakes(target, block_identifier=block))
+
+    print('ledger verified at block {}: {} stakes, {} targets sampled, {} mismatches'.format(
+        block, len(stake_ids), len(targets), len(mismatches)))
+
+    for (name, expected, actual) in mismatches:
+        print('- {}: ledger {} chain {}'.format(name, expected, actual))
+
+    return mismatches
+
+
+def get_event_topics(staking):
+    contract = web3.eth.contract(address=str(staking), abi=staking.abi)
+    decoders = {}
+
+    for element in staking.abi:
+        if element['type'] == 'event' and element['name'] in LEDGER_EVENTS:
+            decoders[event_abi_to_log_topic(element)] = contract.events[element['name']]().processLog
+
+    return decoders
+
+
+def main():
+    staking_address = os.getenv(ENV_STAKING_ADDRESS)
+    assert staking_address, 'staking contract address missing, set env variable {}'.format(ENV_STAKING_ADDRESS)
+
+    staking = contract_from_address(StakingV03, staking_address)
+    checkpoint_file = os.getenv(ENV_CHECKPOINT_FILE, CHECKPOINT_FILE_DEFAULT)
+    from_block = int(os.getenv(ENV_FROM_BLOCK, 0))
+
+    ledger = load_checkpoint(staking, checkpoint_file, from_block)
+    sync_ledger(staking, ledger, checkpoint_file=checkpoint_file)
+
+    sample_size = int(os.getenv(ENV_VERIFY_SAMPLE, 0))
+    if sample_size > 0:
+        verify_ledger(ledger, staking, sample_size)
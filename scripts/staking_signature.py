@@ -0,0 +1,232 @@
+import argparse
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from coincurve import PrivateKey, PublicKey
+from eth_utils import keccak, to_checksum_address
+
+# eip-712 domain and message types as defined in contracts/staking/StakingMessageHelper.sol
+EIP712_DOMAIN_NAME = 'EtheriscStaking'
+EIP712_DOMAIN_VERSION = '1'
+
+EIP712_DOMAIN_TYPE = 'EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)'
+EIP712_STAKE_TYPE = 'Stake(uint96 target,uint256 dipAmount,bytes32 signatureId)'
+EIP712_RESTAKE_TYPE = 'Restake(uint96 stakeId,uint96 newTarget,bytes32 signatureId)'
+
+EIP712_DOMAIN_TYPE_HASH = keccak(text=EIP712_DOMAIN_TYPE)
+EIP712_STAKE_TYPE_HASH = keccak(text=EIP712_STAKE_TYPE)
+EIP712_RESTAKE_TYPE_HASH = keccak(text=EIP712_RESTAKE_TYPE)
+
+EIP712_PREFIX = b'\x19\x01'
+
+# batches smaller than this are not worth the process pool overhead
+MIN_CHUNK_SIZE = 250
+
+BENCHMARK_PRIVATE_KEY = '0x{}'.format('11' * 32)
+BENCHMARK_CONTRACT = '0x{}'.format('22' * 20)
+BENCHMARK_CHAIN_ID = 1337
+
+
+@lru_cache(maxsize=None)
+def get_domain_separator(chain_id: int, verifying_contract: str) -> bytes:
+    return keccak(
+        EIP712_DOMAIN_TYPE_HASH
+        + keccak(text=EIP712_DOMAIN_NAME)
+        + keccak(text=EIP712_DOMAIN_VERSION)
+        + _uint_word(chain_id)
+        + _address_word(verifying_contract))
+
+
+def get_stake_digest(
+    target: int,
+    dip_amount: int,
+    signature_id,
+    chain_id: int,
+    verifying_contract: str
+) -> bytes:
+    struct_hash = keccak(
+        EIP712_STAKE_TYPE_HASH
+        + _uint_word(target)
+        + _uint_word(dip_amount)
+        + _bytes32_word(signature_id))
+
+    return _typed_data_digest(struct_hash, chain_id, verifying_contract)
+
+
+def get_restake_digest(
+    stake_id: int,
+    new_target: int,
+    signature_id,
+    chain_id: int,
+    verifying_contract: str
+) -> bytes:
+    struct_hash = keccak(
+        EIP712_RESTAKE_TYPE_HASH
+        + _uint_word(stake_id)
+        + _uint_word(new_target)
+        + _bytes32_word(signature_id))
+
+    return _typed_data_digest(struct_hash, chain_id, verifying_contract)
+
+
+def sign_digest(digest: bytes, private_key: str) -> str:
+    sig = _get_signing_key(private_key).sign_recoverable(digest, hasher=None)
+    v = sig[64] + 27
+
+    return '0x{}'.format((sig[:64] + v.to_bytes(1, 'big')).hex())
+
+
+def recover_signer(digest: bytes, signature) -> str:
+    signature_raw = _to_bytes(signature)
+    assert len(signature_raw) == 65, 'signature must be 65 bytes, got {}'.format(len(signature_raw))
+
+    # coincurve expects recovery id 0/1 instead of v 27/28
+    recoverable = signature_raw[:64] + bytes([signature_raw[64] - 27])
+    public_key = PublicKey.from_signature_and_message(recoverable, digest, hasher=None)
+
+    return _public_key_to_address(public_key)
+
+
+def get_signer_address(private_key: str) -> str:
+    return _public_key_to_address(_get_signing_key(private_key).public_key)
+
+
+def sign_stake(target, dip_amount, signature_id, private_key, chain_id, verifying_contract) -> str:
+    digest = get_stake_digest(target, dip_amount, signature_id, chain_id, verifying_contract)
+    return sign_digest(digest, private_key)
+
+
+def sign_restake(stake_id, new_target, signature_id, private_key, chain_id, verifying_contract) -> str:
+    digest = get_restake_digest(stake_id, new_target, signature_id, chain_id, verifying_contract)
+    return sign_digest(digest, private_key)
+
+
+def sign_stakes(
+    stakes,
+    private_key: str,
+    chain_id: int,
+    verifying_contract: str,
+    processes: int = 0
+) -> list:
+    # stakes: list of (target, dip_amount, signature_id) tuples
+    return _sign_batch(sign_stake, stakes, private_key, chain_id, verifying_contract, processes)
+
+
+def sign_restakes(
+    restakes,
+    private_key: str,
+    chain_id: int,
+    verifying_contract: str,
+    processes: int = 0
+) -> list:
+    # restakes: list of (stake_id, new_target, signature_id) tuples
+    return _sign_batch(sign_restake, restakes, private_key, chain_id, verifying_contract, processes)
+
+
+# drop in replacements for the eip712_structs based signing previously used in the tests
+def create_stake_signature(target, dipAmount, signatureId, contractAddress, owner, chainId=None):
+    return sign_stake(target, dipAmount, signatureId, owner.private_key, _chain_id(chainId), str(contractAddress))
+
+
+def create_restake_signature(stakeId, newTarget, signatureId, contractAddress, owner, chainId=None):
+    return sign_restake(stakeId, newTarget, signatureId, owner.private_key, _chain_id(chainId), str(contractAddress))
+
+
+def benchmark(count=10000, processes=0):
+    stakes = [(i + 1, 10**21, '0x{:064x}'.format(i)) for i in range(count)]
+
+    # warm up caches and pool so the timing only covers the signing itself
+    sign_stakes(stakes[:1], BENCHMARK_PRIVATE_KEY, BENCHMARK_CHAIN_ID, BENCHMARK_CONTRACT)
+
+    start = time.perf_counter()
+    signatures = sign_stakes(stakes, BENCHMARK_PRIVATE_KEY, BENCHMARK_CHAIN_ID, BENCHMARK_CONTRACT, processes)
+    elapsed = time.perf_counter() - start
+
+    # spot check last signature
+    (target, dip_amount, signature_id) = stakes[-1]
+    digest = get_stake_digest(target, dip_amount, signature_id, BENCHMARK_CHAIN_ID, BENCHMARK_CONTRACT)
+    assert recover_signer(digest, signatures[-1]) == get_signer_address(BENCHMARK_PRIVATE_KEY)
+
+    rate = count / elapsed if elapsed > 0 else 0
+    print('signatures: {} processes: {} elapsed: {:.3f}s rate: {:.0f} signatures/s'.format(
+        count, processes, elapsed, rate))
+
+    return rate
+
+
+def _sign_batch(sign_function, items, private_key, chain_id, verifying_contract, processes):
+    if processes <= 1 or len(items) < 2 * MIN_CHUNK_SIZE:
+        return [sign_function(*item, private_key, chain_id, verifying_contract) for item in items]
+
+    chunk_size = max(MIN_CHUNK_SIZE, -(-len(items) // processes))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    args = [(sign_function, chunk, private_key, chain_id, verifying_contract) for chunk in chunks]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(_sign_chunk, args)
+
+    return [signature for chunk_signatures in results for signature in chunk_signatures]
+
+
+def _sign_chunk(args):
+    (sign_function, items, private_key, chain_id, verifying_contract) = args
+    return [sign_function(*item, private_key, chain_id, verifying_contract) for item in items]
+
+
+def _typed_data_digest(struct_hash: bytes, chain_id: int, verifying_contract: str) -> bytes:
+    return keccak(EIP712_PREFIX + get_domain_separator(chain_id, verifying_contract) + struct_hash)
+
+
+@lru_cache(maxsize=64)
+def _get_signing_key(private_key: str) -> PrivateKey:
+    return PrivateKey(_to_bytes(private_key))
+
+
+def _public_key_to_address(public_key: PublicKey) -> str:
+    return to_checksum_address(keccak(public_key.format(compressed=False)[1:])[-20:])
+
+
+def _chain_id(chain_id):
+    if chain_id is not None:
+        return chain_id
+
+    from brownie import web3
+    return web3.chain_id
+
+
+def _uint_word(value: int) -> bytes:
+    return int(value).to_bytes(32, 'big')
+
+
+def _address_word(address: str) -> bytes:
+    return _to_bytes(address).rjust(32, b'\x00')
+
+
+def _bytes32_word(value) -> bytes:
+    value_raw = _to_bytes(value)
+    assert len(value_raw) <= 32, 'bytes32 value too long: {} bytes'.format(len(value_raw))
+    return value_raw.ljust(32, b'\x00')
+
+
+def _to_bytes(value) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+
+    value = str(value)
+    if value.startswith('0x'):
+        value = value[2:]
+
+    return bytes.fromhex(value)
+
+
+if __name__ == "__main__":
+
+    # prepare comand line arg parsing
+    parser = argparse.ArgumentParser(description="benchmark eip-712 stake signatures per second")
+    parser.add_argument('--count', type=int, default=10000, help="number of signatures to create")
+    parser.add_argument('--processes', type=int, default=0, help="size of process pool, 0 signs in the current process")
+    args = parser.parse_args()
+
+    benchmark(args.count, args.processes)
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+MODULE = 'scripts.deploy_registry'
+PACKAGE = 'OpenZeppelin'
+
+# runs in a fresh interpreter, loading the brownie project is not part of the measurement
+# eager mode loads the package right after the import, as the module did at import before
+MEASURE_IMPORT = '''
+import importlib, json, sys, time
+from brownie import project
+project.load(sys.argv[1], raise_if_loaded=False)
+
+from scripts.util import get_package
+
+start = time.perf_counter()
+importlib.import_module(sys.argv[2])
+packages_at_import = get_package.cache_info().currsize
+
+if sys.argv[4] == 'eager':
+    get_package(sys.argv[3])
+
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'packagesAtImport': packages_at_import}))
+'''
+
+
+def help():
+    print('from scripts.startup_benchmark import run_benchmark, help')
+    print('run_benchmark() # opt params module={}, package={}, project_path="."'.format(MODULE, PACKAGE))
+    print()
+    print('# from the command line')
+    print('brownie run scripts/startup_benchmark.py')
+
+
+def main():
+    run_benchmark()
+
+
+def run_benchmark(module=MODULE, package=PACKAGE, project_path='.') -> dict:
+    # startup time of the module with lazy package loading vs. eager loading at import (previous behaviour)
+    lazy = measure_import(module, package, project_path, eager=False)
+    eager = measure_import(module, package, project_path, eager=True)
+
+    results = {
+        'before': eager['seconds'],
+        'after': lazy['seconds'],
+        'packagesAtImport': lazy['packagesAtImport'],
+    }
+
+    print('--- startup benchmark {} ---'.format(module))
+    print('Measure;Seconds')
+    print("startup before (import and get_package('{}'));{:.3f}".format(package, results['before']))
+    print('startup after (import, lazy package load);{:.3f}'.format(results['after']))
+    print('packages loaded at import;{}'.format(results['packagesAtImport']))
+    print('--- end of startup benchmark ---')
+
+    return results
+
+
+def measure_import(module, package, project_path='.', eager=False) -> dict:
+    result = subprocess.run(
+        [sys.executable, '-c', MEASURE_IMPORT, os.path.abspath(project_path), module, package, 'eager' if eager else 'lazy'],
+        cwd=project_path,
+        capture_output=True,
+        text=True)
+
+    assert result.returncode == 0, 'ERROR measuring import of {}: {}'.format(module, result.stderr)
+
+    # package loading prints to stdout, the measurement is the last line
+    return json.loads(result.stdout.strip().split('\n')[-1])
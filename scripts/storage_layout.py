@@ -1,13 +1,20 @@
 import argparse
 import hashlib
 import json
+import os
 import re
 import subprocess
+import sys
 
-SOLC = '/home/vscode/.solcx/solc-v0.8.19'
-REMAPPINGS = '@openzeppelin-upgradeable=/home/vscode/.brownie/packages/OpenZeppelin/openzeppelin-contracts-upgradeable@4.8.2 @openzeppelin=/home/vscode/.brownie/packages/OpenZeppelin/openzeppelin-contracts@4.8.2'
+# solc and packages as installed by brownie (/home/vscode in the devcontainer)
+HOME = os.path.expanduser('~')
+SOLC = f'{HOME}/.solcx/solc-v0.8.19'
+REMAPPINGS = f'@openzeppelin-upgradeable={HOME}/.brownie/packages/OpenZeppelin/openzeppelin-contracts-upgradeable@4.8.2 @openzeppelin={HOME}/.brownie/packages/OpenZeppelin/openzeppelin-contracts@4.8.2'
 OPTIONS = '--storage-layout'
 
+# solc prints a header per contract of all compiled sources, sorted by path and contract name
+CONTRACT_HEADER = re.compile(r'^======= (.+):(\w+) =======$')
+
 
 def process_storage(storage_layout):
     storage_in = storage_layout['storage']
@@ -74,15 +81,62 @@ def process_type_element(element):
     return element
 
 
-def main(file_name, unify):
+def compare(layout_old, layout_new):
+    # upgrades may only append state variables and struct members
+    # both layouts need to be unified to get comparable type names
+    errors = []
+    storage_old = layout_old['storage']
+    storage_new = layout_new['storage']
+
+    if len(storage_new) < len(storage_old):
+        errors.append('storage: {} variables removed'.format(len(storage_old) - len(storage_new)))
+
+    for (old, new) in zip(storage_old, storage_new):
+        for key in ['label', 'slot', 'offset', 'type']:
+            if old[key] != new[key]:
+                errors.append('storage {}: {} changed from {} to {}'.format(old['label'], key, old[key], new[key]))
+
+    types_new = layout_new['types']
+
+    for type_name, old in layout_old['types'].items():
+        if type_name not in types_new:
+            continue
+
+        new = types_new[type_name]
+        if old['encoding'] != new['encoding']:
+            errors.append('type {}: encoding changed from {} to {}'.format(type_name, old['encoding'], new['encoding']))
+
+        # appending struct members is only safe for structs stored in mappings or dynamic arrays
+        if 'members' not in old:
+            if old['numberOfBytes'] != new['numberOfBytes']:
+                errors.append('type {}: size changed from {} to {}'.format(type_name, old['numberOfBytes'], new['numberOfBytes']))
+            continue
+
+        members_new = new.get('members', [])
+        if len(members_new) < len(old['members']):
+            errors.append('type {}: {} members removed'.format(type_name, len(old['members']) - len(members_new)))
+
+        for (member_old, member_new) in zip(old['members'], members_new):
+            for key in ['label', 'slot', 'offset', 'type']:
+                if member_old[key] != member_new[key]:
+                    errors.append('type {} member {}: {} changed from {} to {}'.format(
+                        type_name, member_old['label'], key, member_old[key], member_new[key]))
+
+    return errors
+
+
+def get_storage_layout(file_name, unify, contract_name=None):
 
     # run solc
     command = f"{SOLC} {REMAPPINGS} {OPTIONS} {file_name}"
     process = subprocess.run(command, shell=True, capture_output=True, text=True)
 
-    # parse the JSON from the last line of the output
-    last_line = process.stdout.strip().split('\n')[-1]
-    storage_layout = json.loads(last_line)
+    # the contract named like the file by default, imported sources may sort after it
+    contract_name = contract_name or os.path.splitext(os.path.basename(file_name))[0]
+    layouts = parse_solc_output(process.stdout)
+    assert contract_name in layouts, 'ERROR no storage layout for {} in {}: {}'.format(contract_name, file_name, process.stderr)
+
+    storage_layout = layouts[contract_name]
 
     # process the json
     if unify:
@@ -91,6 +145,45 @@ def main(file_name, unify):
             'types': process_types(storage_layout),
         }
 
+    return storage_layout
+
+
+def parse_solc_output(output) -> dict:
+    # contract name -> storage layout
+    layouts = {}
+    contract_name = None
+
+    for line in output.split('\n'):
+        header = CONTRACT_HEADER.match(line.strip())
+
+        if header:
+            contract_name = header.group(2)
+        elif contract_name and line.startswith('{'):
+            layouts[contract_name] = json.loads(line)
+
+    return layouts
+
+
+def main(file_name, unify, compare_file=None):
+    storage_layout = get_storage_layout(file_name, unify or compare_file)
+
+    if compare_file:
+        with open(compare_file, 'r') as f:
+            layout_old = json.load(f)
+
+        errors = compare(layout_old, storage_layout)
+        for error in errors:
+            print('ERROR {}'.format(error))
+
+        print('{}: {} storage variables, {} appended, {} incompatible changes ({})'.format(
+            file_name,
+            len(storage_layout['storage']),
+            max(0, len(storage_layout['storage']) - len(layout_old['storage'])),
+            len(errors),
+            compare_file))
+
+        sys.exit(1 if errors else 0)
+
     storage_layout['params'] = {
         'file_name': file_name,
         'unify': unify,
@@ -108,8 +201,9 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="get solidity storage layout in json format")
     parser.add_argument('solidity_file', type=str, help="the solidity file to check")
     parser.add_argument('--unify', action='store_true', help="process json to unify diffs")
+    parser.add_argument('--compare', type=str, help="unified json layout of the previous version to check the upgrade against")
 
     # get/process command line args
     args = parser.parse_args()
 
-    main(args.solidity_file, args.unify)
\ No newline at end of file
+    main(args.solidity_file, args.unify, args.compare)
\ No newline at end of file
@@ -0,0 +1,229 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+from contextlib import contextmanager
+
+from brownie import web3
+
+ENV_TELEMETRY_FILE = 'DEPLOY_TELEMETRY_FILE'
+
+MIDDLEWARE_NAME = 'deploy_telemetry'
+SEND_METHODS = ['eth_sendTransaction', 'eth_sendRawTransaction']
+WAIT_METHODS = ['eth_getTransactionReceipt'] # polled while brownie waits for a tx to be mined
+
+# active telemetry, steps are not recorded without
+_telemetry = None
+
+
+class Telemetry(object):
+    # records one json line per step: timing, rpc calls and gas of the transactions sent within the step
+
+    def __init__(self, file_name, run_id=None):
+        self.file_name = file_name
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.steps = []
+        self._local = threading.local() # rpc calls of a thread are not counted while paused is set
+        self._waiting = 0 # number of confirmation waits in progress
+        self._lock = threading.Lock() # steps and their counters are updated from reader threads too
+        self._install_middleware()
+
+    @contextmanager
+    def step(self, name, **attributes):
+        record = {
+            'run': self.run_id,
+            'step': name,
+            'parent': self.steps[-1]['step'] if self.steps else None,
+            'start': time.time(),
+            'duration': 0.0,
+            'waitTime': 0.0,
+            'rpcCalls': 0,
+            'rpcTime': 0.0,
+            'txHashes': [],
+        }
+        record.update(attributes)
+
+        with self._lock:
+            self.steps.append(record)
+
+        start = time.perf_counter()
+
+        try:
+            yield record
+        finally:
+            record['duration'] = time.perf_counter() - start
+
+            with self._lock:
+                self.steps.remove(record)
+
+            self._write(record)
+
+    @contextmanager
+    def waiting(self):
+        # the elapsed time is the wait time, receipt polls in between are not added again
+        with self._lock:
+            self._waiting += 1
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+
+            with self._lock:
+                self._waiting -= 1
+
+                for record in self.steps:
+                    record['waitTime'] += duration
+
+    @contextmanager
+    def _not_counted(self):
+        # only affects the current thread, calls of other threads are still counted
+        self._local.paused = True
+
+        try:
+            yield
+        finally:
+            self._local.paused = False
+
+    def _install_middleware(self):
+        if MIDDLEWARE_NAME in web3.middleware_onion:
+            web3.middleware_onion.remove(MIDDLEWARE_NAME)
+
+        web3.middleware_onion.add(self._middleware, name=MIDDLEWARE_NAME)
+
+    def _middleware(self, make_request, w3):
+        def middleware(method, params):
+            if getattr(self._local, 'paused', False):
+                return make_request(method, params)
+
+            start = time.perf_counter()
+            response = make_request(method, params)
+            duration = time.perf_counter() - start
+
+            with self._lock:
+                for record in self.steps:
+                    record['rpcCalls'] += 1
+                    record['rpcTime'] += duration
+
+                    if method in WAIT_METHODS:
+                        if not self._waiting:
+                            record['waitTime'] += duration
+                    elif method in SEND_METHODS and 'result' in response:
+                        record['txHashes'].append(response['result'])
+
+            return response
+
+        return middleware
+
+    def _write(self, record):
+        tx_hashes = record.pop('txHashes')
+        record['txs'] = len(tx_hashes)
+        record['gasUsed'] = 0
+        record['gasCost'] = 0
+
+        # rpc calls to fetch the receipts are not counted
+        with self._not_counted():
+            for tx_hash in tx_hashes:
+                receipt = web3.eth.get_transaction_receipt(tx_hash)
+                gas_price = receipt.get('effectiveGasPrice') or web3.eth.get_transaction(tx_hash)['gasPrice']
+
+                record['gasUsed'] += receipt['gasUsed']
+                record['gasCost'] += receipt['gasUsed'] * gas_price
+
+        record['gasPrice'] = record['gasCost'] // record['gasUsed'] if record['gasUsed'] > 0 else 0
+
+        with open(self.file_name, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+def start_telemetry(file_name, run_id=None) -> Telemetry:
+    global _telemetry
+    _telemetry = Telemetry(file_name, run_id)
+    return _telemetry
+
+
+def stop_telemetry():
+    global _telemetry
+
+    if _telemetry and MIDDLEWARE_NAME in web3.middleware_onion:
+        web3.middleware_onion.remove(MIDDLEWARE_NAME)
+
+    _telemetry = None
+
+
+def get_telemetry():
+    # telemetry is started implicitly when the env variable is set
+    if not _telemetry and os.getenv(ENV_TELEMETRY_FILE):
+        start_telemetry(os.getenv(ENV_TELEMETRY_FILE))
+
+    return _telemetry
+
+
+@contextmanager
+def step(name, **attributes):
+    telemetry = get_telemetry()
+
+    if not telemetry:
+        yield None
+        return
+
+    with telemetry.step(name, **attributes) as record:
+        yield record
+
+
+def timed_step(func):
+    # records a step for each call of the decorated function
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with step(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def waiting():
+    # records the time spent waiting for confirmations in all active steps
+    telemetry = get_telemetry()
+
+    if not telemetry:
+        yield
+        return
+
+    with telemetry.waiting():
+        yield
+
+
+def read_telemetry(file_name) -> list:
+    with open(file_name) as f:
+        return [json.loads(line) for line in f]
+
+
+def summarize(file_name, run_id=None) -> list:
+    # duration, wait time, rpc calls and gas per step of a run (default: last run in file)
+    records = read_telemetry(file_name)
+    run_id = run_id or records[-1]['run']
+    summary = [r for r in records if r['run'] == run_id]
+
+    print('--- telemetry run {} ---'.format(run_id))
+    print('Step;Parent;Duration;WaitTime;RpcCalls;Txs;GasUsed;GasPrice')
+
+    for record in summary:
+        print('{};{};{:.2f};{:.2f};{};{};{};{}'.format(
+            record['step'],
+            record['parent'],
+            record['duration'],
+            record['waitTime'],
+            record['rpcCalls'],
+            record['txs'],
+            record['gasUsed'],
+            record['gasPrice']))
+
+    print('--- end of telemetry ---')
+
+    return summary
@@ -0,0 +1,140 @@
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP, localcontext
+
+# mirrors contracts/shared/UFixedMath.sol, results are identical to the solidity library
+# operations that revert in solidity raise ValueError (require) or OverflowError (checked arithmetic)
+
+EXP = 18
+MULTIPLIER = 10 ** EXP
+MULTIPLIER_HALF = MULTIPLIER // 2
+
+MAX_UINT256 = 2**256 - 1
+
+# values of enum UFixedType.Rounding
+ROUNDING_DOWN = 0
+ROUNDING_UP = 1
+ROUNDING_HALF_UP = 2
+ROUNDING_DEFAULT = ROUNDING_HALF_UP
+
+
+class UFixed:
+    # value is the raw uint256 as stored/returned by the contracts
+
+    __slots__ = ('value',)
+
+    def __init__(self, value=0):
+        self.value = _uint256(int(value))
+
+    @classmethod
+    def from_decimal(cls, value, rounding=ROUNDING_DEFAULT) -> 'UFixed':
+        # exact conversion of decimal strings/floats, eg 0.125 or '1.001' (no float arithmetic involved)
+        with localcontext() as context:
+            # enough digits for any uint256
+            context.prec = 100
+            scaled = Decimal(str(value)) * MULTIPLIER
+
+        if rounding == ROUNDING_HALF_UP:
+            return cls(int(scaled.to_integral_value(ROUND_HALF_UP)))
+        elif rounding == ROUNDING_DOWN:
+            return cls(int(scaled.to_integral_value(ROUND_FLOOR)))
+
+        return cls(int(scaled.to_integral_value(ROUND_CEILING)))
+
+    def __add__(self, other):
+        return _new(_uint256(self.value + other.value))
+
+    def __sub__(self, other):
+        if self.value < other.value:
+            raise ValueError('ERROR:UFM-010:NEGATIVE_RESULT')
+
+        return _new(self.value - other.value)
+
+    def __mul__(self, other):
+        return _new(_uint256(self.value * other.value // MULTIPLIER))
+
+    def __truediv__(self, other):
+        if other.value == 0:
+            raise ValueError('ERROR:UFM-020:DIVISOR_ZERO')
+
+        return _new(_uint256(self.value * MULTIPLIER // other.value))
+
+    def __eq__(self, other):
+        return isinstance(other, UFixed) and self.value == other.value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __gt__(self, other):
+        return self.value > other.value
+
+    def __ge__(self, other):
+        return self.value >= other.value
+
+    def __lt__(self, other):
+        return self.value < other.value
+
+    def __le__(self, other):
+        return self.value <= other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __bool__(self):
+        return self.value > 0
+
+    def __float__(self):
+        return self.value / MULTIPLIER
+
+    def __str__(self):
+        (integer, fraction) = divmod(self.value, MULTIPLIER)
+        return '{}.{}'.format(integer, '{:018d}'.format(fraction).rstrip('0') or '0')
+
+    def __repr__(self):
+        return "UFixed('{}')".format(self)
+
+
+def itof(a, exp=0) -> UFixed:
+    if EXP + exp < 0:
+        raise ValueError('ERROR:FM-010:EXPONENT_TOO_SMALL')
+
+    if EXP + exp > 2 * EXP:
+        raise ValueError('ERROR:FM-011:EXPONENT_TOO_LARGE')
+
+    return _new(_uint256(_uint256(int(a)) * 10 ** (EXP + exp)))
+
+
+def ftoi(a, rounding=ROUNDING_DEFAULT) -> int:
+    if rounding == ROUNDING_HALF_UP:
+        return _uint256(a.value + MULTIPLIER_HALF) // MULTIPLIER
+    elif rounding == ROUNDING_DOWN:
+        return a.value // MULTIPLIER
+
+    return -(-a.value // MULTIPLIER)
+
+
+def gtz(a) -> bool:
+    return a.value > 0
+
+
+def eqz(a) -> bool:
+    return a.value == 0
+
+
+def delta(a, b) -> UFixed:
+    if a > b:
+        return a - b
+
+    return b - a
+
+
+def _new(value) -> UFixed:
+    # skips the range check of the constructor for results checked already
+    result = UFixed.__new__(UFixed)
+    result.value = value
+    return result
+
+
+def _uint256(value) -> int:
+    if value < 0 or value > MAX_UINT256:
+        raise OverflowError('uint256 overflow: {}'.format(value))
+
+    return value
@@ -0,0 +1,319 @@
+import json
+import os
+import time
+
+from brownie.network.account import Account
+
+from brownie import (
+    network,
+    project,
+    web3,
+    OwnableProxyAdmin,
+    Versionable,
+)
+
+from scripts.async_reads import read_dict
+from scripts.const import (
+    PROXY_ADMIN_OWNER,
+    ZERO_ADDRESS,
+)
+from scripts.deploy_registry import (
+    get_accounts,
+    get_stakeholder_accounts,
+)
+from scripts.storage_layout import (
+    compare,
+    get_storage_layout,
+)
+from scripts.util import (
+    REQUIRED_TX_CONFIRMATIONS_DEFAULT,
+    contract_from_address,
+    send_pipelined,
+    wait_for_all_confirmations,
+)
+
+ENV_MANIFEST = 'UPGRADE_MANIFEST'
+ENV_MNEMONIC = 'UPGRADE_MNEMONIC'
+
+
+def help():
+    print('from scripts.upgrade_proxies import read_manifest, run_upgrades, help')
+    print('manifest = read_manifest("upgrades.json")')
+    print('report = run_upgrades(manifest, proxy_admin_owner) # opt param confirmations=2')
+    print()
+    print('# manifest: list of upgrades, network, version, source and layout are optional')
+    print('# [{"network": "goerli", "proxyAdmin": "0x...", "contract": "StakingV04", "version": "1.2.0",')
+    print('#   "source": "contracts/staking/StakingV04.sol", "layout": "staking_v03.json"}]')
+    print()
+    print('# from the command line (settings via env variables {}, {})'.format(ENV_MANIFEST, ENV_MNEMONIC))
+    print('UPGRADE_MANIFEST=upgrades.json UPGRADE_MNEMONIC="..." brownie run scripts/upgrade_proxies.py')
+
+
+def main():
+    manifest_file = os.getenv(ENV_MANIFEST)
+    assert manifest_file, 'manifest missing, set env variable {}'.format(ENV_MANIFEST)
+
+    a = get_stakeholder_accounts(get_accounts(os.getenv(ENV_MNEMONIC)))
+    run_upgrades(read_manifest(manifest_file), a[PROXY_ADMIN_OWNER])
+
+
+def read_manifest(file_name) -> list:
+    with open(file_name) as f:
+        return json.load(f)
+
+
+def run_upgrades(
+    manifest,
+    owner: Account,
+    confirmations=REQUIRED_TX_CONFIRMATIONS_DEFAULT
+) -> dict:
+    # all upgrades are validated on all chains before the first transaction is sent
+    start = time.perf_counter()
+    chains = _group_by_network(manifest)
+
+    errors = validate_layouts(manifest)
+    states = {}
+
+    for network_name, entries in chains.items():
+        _connect(network_name)
+        (states[network_name], chain_errors) = validate_chain(entries, owner)
+        errors += chain_errors
+
+    for error in errors:
+        print('ERROR {}'.format(error))
+
+    assert not errors, 'upgrade validation failed with {} errors'.format(len(errors))
+
+    report = {'chains': []}
+
+    for network_name, entries in chains.items():
+        _connect(network_name)
+        report['chains'].append(
+            upgrade_chain(entries, states[network_name], owner, confirmations))
+
+    report['elapsed'] = time.perf_counter() - start
+    report['txs'] = sum(chain['txs'] for chain in report['chains'])
+    report['gasUsed'] = sum(chain['gasUsed'] for chain in report['chains'])
+
+    print_report(report)
+
+    return report
+
+
+def validate_layouts(manifest) -> list:
+    # compares the storage layout of the new implementation against the unified layout of the current one
+    errors = []
+
+    for entry in manifest:
+        if 'layout' not in entry:
+            continue
+
+        with open(entry['layout']) as f:
+            layout_old = json.load(f)
+
+        layout_new = get_storage_layout(entry['source'], True)
+        errors += ['{} {}'.format(entry['contract'], error) for error in compare(layout_old, layout_new)]
+
+    return errors
+
+
+def validate_chain(entries, owner) -> tuple:
+    # returns the current proxy and version per proxy admin and a list of errors
+    errors = []
+    states = {}
+    containers = project.get_loaded_projects()[0].dict()
+
+    for entry in entries:
+        admin_address = entry['proxyAdmin']
+        label = '{} {}'.format(network.show_active(), admin_address)
+
+        if admin_address in states:
+            errors.append('{}: proxy admin listed more than once'.format(label))
+            continue
+
+        if entry['contract'] not in containers:
+            errors.append('{}: contract {} unknown'.format(label, entry['contract']))
+            continue
+
+        admin = contract_from_address(OwnableProxyAdmin, admin_address)
+        admin_info = read_dict({
+            'owner': admin.owner,
+            'proxy': admin.getProxy,
+            'implementation': admin.getImplementation})
+
+        if admin_info['owner'] != owner:
+            errors.append('{}: owner is {}, not {}'.format(label, admin_info['owner'], owner))
+
+        if admin_info['proxy'] == ZERO_ADDRESS:
+            errors.append('{}: proxy not set'.format(label))
+            continue
+
+        proxy = contract_from_address(Versionable, admin_info['proxy'])
+        version_info = read_dict({
+            'version': proxy.version,
+            'versions': proxy.versions})
+
+        version = version_info['version']
+        last_version = proxy.getVersion(version_info['versions'] - 1)
+
+        if last_version != version:
+            errors.append('{}: version {} differs from last activated version {}'.format(
+                label, version_to_str(version), version_to_str(last_version)))
+
+        if 'version' in entry:
+            version_new = str_to_version(entry['version'])
+
+            if version_new <= version:
+                errors.append('{}: version {} not above current version {}'.format(
+                    label, entry['version'], version_to_str(version)))
+            elif proxy.isActivated(version_new):
+                errors.append('{}: version {} activated already'.format(label, entry['version']))
+
+        states[admin_address] = {
+            'proxy': admin_info['proxy'],
+            'implementation': admin_info['implementation'],
+            'version': version,
+            'versions': version_info['versions'],
+        }
+
+    return (states, errors)
+
+
+def upgrade_chain(entries, states, owner, confirmations) -> dict:
+    start = time.perf_counter()
+    containers = project.get_loaded_projects()[0].dict()
+
+    print('>>> {}: deploying {} implementations'.format(network.show_active(), len(entries)))
+    deploy_txs = send_pipelined(owner, [
+        (containers[entry['contract']].deploy, ())
+        for entry in entries])
+
+    deploy_receipts = wait_for_all_confirmations(deploy_txs, confirmations)
+    implementations = [receipt['contractAddress'] for receipt in deploy_receipts]
+
+    # versions of the deployed implementations are checked before any proxy is upgraded
+    for entry, implementation in zip(entries, implementations):
+        state = states[entry['proxyAdmin']]
+        version_new = contract_from_address(Versionable, implementation).version()
+
+        assert version_new > state['version'], 'ERROR {} {}: version {} not above current version {}'.format(
+            entry['contract'], implementation, version_to_str(version_new), version_to_str(state['version']))
+
+        if 'version' in entry:
+            assert version_new == str_to_version(entry['version']), 'ERROR {} {}: version {} instead of {}'.format(
+                entry['contract'], implementation, version_to_str(version_new), entry['version'])
+
+        state['implementationNew'] = implementation
+        state['versionNew'] = version_new
+
+    print('>>> {}: upgrading {} proxies'.format(network.show_active(), len(entries)))
+    upgrade_txs = send_pipelined(owner, [
+        (contract_from_address(OwnableProxyAdmin, entry['proxyAdmin']).upgrade, (states[entry['proxyAdmin']]['implementationNew'],))
+        for entry in entries])
+
+    upgrade_receipts = wait_for_all_confirmations(upgrade_txs, confirmations)
+
+    for receipt in upgrade_receipts:
+        assert receipt['status'] == 1, 'ERROR upgrade tx {} failed'.format(web3.toHex(receipt['transactionHash']))
+
+    upgrades = [verify_upgrade(entry, states[entry['proxyAdmin']]) for entry in entries]
+    receipts = deploy_receipts + upgrade_receipts
+
+    return {
+        'network': network.show_active(),
+        'chainId': web3.chain_id,
+        'elapsed': time.perf_counter() - start,
+        'txs': len(receipts),
+        'gasUsed': sum(receipt['gasUsed'] for receipt in receipts),
+        'gasCost': sum(receipt['gasUsed'] * _gas_price(receipt) for receipt in receipts),
+        'upgrades': upgrades,
+    }
+
+
+def verify_upgrade(entry, state) -> dict:
+    admin = contract_from_address(OwnableProxyAdmin, entry['proxyAdmin'])
+    proxy = contract_from_address(Versionable, state['proxy'])
+
+    info = read_dict({
+        'implementation': admin.getImplementation,
+        'version': proxy.version,
+        'versions': proxy.versions})
+
+    assert info['implementation'] == state['implementationNew'], 'ERROR {}: implementation {} instead of {}'.format(
+        entry['proxyAdmin'], info['implementation'], state['implementationNew'])
+    assert info['version'] == state['versionNew'], 'ERROR {}: version {} instead of {}'.format(
+        state['proxy'], version_to_str(info['version']), version_to_str(state['versionNew']))
+    assert info['versions'] == state['versions'] + 1, 'ERROR {}: {} versions instead of {}'.format(
+        state['proxy'], info['versions'], state['versions'] + 1)
+
+    return {
+        'proxyAdmin': entry['proxyAdmin'],
+        'proxy': state['proxy'],
+        'contract': entry['contract'],
+        'implementation': state['implementationNew'],
+        'versionBefore': version_to_str(state['version']),
+        'versionAfter': version_to_str(info['version']),
+    }
+
+
+def print_report(report):
+    print('--- upgrade report ---')
+    print('Network;ChainId;Contract;Proxy;Implementation;VersionBefore;VersionAfter')
+
+    for chain in report['chains']:
+        for upgrade in chain['upgrades']:
+            print('{};{};{};{};{};{};{}'.format(
+                chain['network'],
+                chain['chainId'],
+                upgrade['contract'],
+                upgrade['proxy'],
+                upgrade['implementation'],
+                upgrade['versionBefore'],
+                upgrade['versionAfter']))
+
+    print('Network;Elapsed;Txs;GasUsed;GasCost')
+
+    for chain in report['chains']:
+        print('{};{:.2f};{};{};{}'.format(
+            chain['network'],
+            chain['elapsed'],
+            chain['txs'],
+            chain['gasUsed'],
+            chain['gasCost']))
+
+    print('total;{:.2f};{};{};'.format(report['elapsed'], report['txs'], report['gasUsed']))
+    print('--- end of upgrade report ---')
+
+
+def version_to_str(version) -> str:
+    return '{}.{}.{}'.format(version >> 32, (version >> 16) & 0xffff, version & 0xffff)
+
+
+def str_to_version(version) -> int:
+    (major, minor, patch) = [int(part) for part in version.split('.')]
+    return (major << 32) + (minor << 16) + patch
+
+
+def _group_by_network(manifest) -> dict:
+    # entries without network run on the active network
+    chains = {}
+
+    for entry in manifest:
+        network_name = entry.get('network') or network.show_active()
+        chains.setdefault(network_name, []).append(entry)
+
+    return chains
+
+
+def _connect(network_name):
+    if network.show_active() == network_name:
+        return
+
+    if network.is_connected():
+        network.disconnect()
+
+    network.connect(network_name)
+
+
+def _gas_price(receipt) -> int:
+    return receipt.get('effectiveGasPrice') or web3.eth.get_transaction(receipt['transactionHash'])['gasPrice']
@@ -1,7 +1,7 @@
 import sys
-import io
-from contextlib import redirect_stdout
+import json
 from datetime import datetime
+from functools import lru_cache
 from web3 import Web3
 
 from brownie import (
@@ -9,15 +9,55 @@ from brownie import (
     Contract, 
 )
 
+CONTRACT_CACHE_SIZE = 256
+
+# abi per fingerprint, shared by all handles created from the same abi
+_abis = {}
+_abi_fingerprints = {} # id(abi) -> (abi, fingerprint), holding the abi keeps its id from being reused
+
 def unix_timestamp() -> int:
     return int(datetime.now().timestamp())
 
 def contract_from_address(contractClass, contractAddress):
-    return Contract.from_abi(contractClass._name, contractAddress, contractClass.abi)
+    # handles are cached per abi, address and chain, repeated lookups skip abi parsing and the contract code check
+    return _contract_from_abi(
+        contractClass._name,
+        _abi_fingerprint(contractClass.abi),
+        Web3.toChecksumAddress(str(contractAddress)),
+        web3.chain_id)
+
+def clear_contract_cache():
+    _contract_from_abi.cache_clear()
+    _abis.clear()
+    _abi_fingerprints.clear()
+
+@lru_cache(maxsize=CONTRACT_CACHE_SIZE)
+def _contract_from_abi(name, fingerprint, address, chain_id):
+    return Contract.from_abi(name, address, _abis[fingerprint])
+
+def _abi_fingerprint(abi) -> str:
+    entry = _abi_fingerprints.get(id(abi))
+
+    if not entry:
+        # abis passed as new objects on every call must not grow the tables
+        if len(_abi_fingerprints) >= CONTRACT_CACHE_SIZE:
+            clear_contract_cache()
+
+        fingerprint = Web3.keccak(text=json.dumps(abi, sort_keys=True)).hex()
+        _abis.setdefault(fingerprint, abi)
+        entry = (abi, fingerprint)
+        _abi_fingerprints[id(abi)] = entry
+
+    return entry[1]
 
 from brownie import accounts, config, project
 from brownie.convert import to_bytes
 from brownie.network.account import Account
+from brownie.network.transaction import TransactionReceipt
+
+from scripts.confirmations import get_tracker
+from scripts.hd_accounts import load_accounts, new_mnemonic
+from scripts.telemetry import waiting
 
 CONFIG_DEPENDENCIES = 'dependencies'
 
@@ -58,7 +98,9 @@ def get_account(mnemonic: str, account_offset: int) -> Account:
         count=1,
         offset=account_offset)
 
+@lru_cache(maxsize=None)
 def get_package(substring: str):
+    # loading a package compiles/loads a whole brownie project, each package is loaded once per process
     for dependency in config[CONFIG_DEPENDENCIES]:
         if substring in dependency:
             print("using package '{}' for '{}'".format(
@@ -72,21 +114,50 @@ def get_package(substring: str):
 
 
 def new_accounts(count=20):
-    buffer = io.StringIO()
+    mnemonic = new_mnemonic()
+    return load_accounts(mnemonic, count), mnemonic
+
 
-    with redirect_stdout(buffer):
-        account = accounts.add()
+def send_pipelined(sender, calls) -> list:
+    # sends all transactions without waiting for receipts, nonces are assigned locally
+    # calls: list of (function, args) tuples, eg (staking.createStake, (target, amount)) or (Contract.deploy, ())
+    nonce = sender.nonce
+    txs = []
 
-    output = buffer.getvalue()
-    mnemonic = output.split('\x1b')[1][8:]
+    for i, (function, args) in enumerate(calls):
+        tx = function(*args, {'from': sender, 'nonce': nonce + i, 'required_confs': 0})
 
-    return accounts.from_mnemonic(mnemonic, count=count), mnemonic
+        # deployments with required_confs=0 may return the pending receipt or the contract
+        txs.append(tx if isinstance(tx, TransactionReceipt) else tx.tx)
+
+    return txs
 
 
 def wait_for_confirmations(
     tx,
     confirmations=REQUIRED_TX_CONFIRMATIONS_DEFAULT
 ):
+    return wait_for_all_confirmations([tx], confirmations)[0]
+
+
+def wait_for_all_confirmations(
+    txs,
+    confirmations=REQUIRED_TX_CONFIRMATIONS_DEFAULT
+):
+    # mined transactions are final on chains with instant mining (ganache)
     if web3.chain_id in CHAIN_IDS_REQUIRING_CONFIRMATIONS:
-        print('waiting for confirmations ...')
-        tx.wait(confirmations)
+        print('waiting for confirmations ({} txs) ...'.format(len(txs)))
+    else:
+        confirmations = 1
+
+    with waiting():
+        return get_tracker().wait(txs, confirmations)
+
+
+def percentile(values, pct: float):
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
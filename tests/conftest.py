@@ -1,3 +1,4 @@
+import os
 import pytest
 
 from brownie import (
@@ -57,6 +58,15 @@ from scripts.util import (
 
 from scripts.deploy_registry import deploy_proxy
 
+from scripts.ganache_state import (
+    check_state,
+    load_stack,
+    start,
+    stop_ganache,
+    ENV_STATE_DIR,
+    STATE_DIR_DEFAULT,
+)
+
 
 INITIAL_ACCOUNT_FUNDING = '1 ether'
 
@@ -343,3 +353,31 @@ def mockRegistry(mockInstance):
     return contract_from_address(
         MockInstanceRegistry,
         mockInstance.getRegistry())
+
+
+#=== pre-built ganache state ==================================================#
+
+# process and manifest of the node restored from the ganache state dump
+ganache_state = {}
+
+def pytest_sessionstart(session):
+    # runs before brownie connects, brownie attaches to the restored node
+    state_dir = os.getenv(ENV_STATE_DIR, STATE_DIR_DEFAULT)
+
+    if check_state(state_dir) == []:
+        (ganache_state['proc'], ganache_state['manifest']) = start(state_dir)
+
+def pytest_sessionfinish(session):
+    if 'proc' in ganache_state:
+        stop_ganache(ganache_state.pop('proc'))
+
+@pytest.fixture(scope="session")
+def ganacheManifest() -> dict:
+    if 'manifest' not in ganache_state:
+        pytest.skip('no valid ganache state dump, see python -m scripts.ganache_state build')
+
+    return ganache_state['manifest']
+
+@pytest.fixture(scope="session")
+def ganacheStack(ganacheManifest) -> dict:
+    return load_stack(ganacheManifest)
@@ -0,0 +1,135 @@
+import csv
+import pytest
+
+from brownie import accounts
+
+from scripts.analytics_export import (
+    _object_row,
+    export_analytics,
+    FORMAT_ARROW,
+    FORMAT_CSV,
+    FORMAT_PARQUET,
+)
+
+from scripts.deploy_registry import (
+    all_in_1,
+    get_stakeholder_accounts,
+    NFT_BUNDLE,
+    NFT_STAKE,
+)
+
+from scripts.registry_data import BUNDLE, OBJECT_TYPES, STAKE
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_export_csv(tmp_path):
+    (registry, staking, nft_ids) = deploy_setup()
+
+    summary = export_analytics(registry, staking, str(tmp_path), file_format=FORMAT_CSV, batch_size=2)
+    assert summary['objects'] == count_objects(registry)
+    assert summary['stakes'] == 1
+    assert summary['skipped'] == 0
+
+    with open(summary['files'][0]) as f:
+        objects = list(csv.DictReader(f))
+
+    assert len(objects) == summary['objects']
+
+    bundle = find_row(objects, nft_ids[NFT_BUNDLE])
+    bundle_data = registry.decodeBundleData(nft_ids[NFT_BUNDLE]).dict()
+    assert int(bundle['objectType']) == BUNDLE
+    assert int(bundle['bundleId']) == bundle_data['bundleId']
+    assert bundle['displayName'] == bundle_data['displayName']
+
+    stake = find_row(objects, nft_ids[NFT_STAKE])
+    assert int(stake['objectType']) == STAKE
+    assert int(stake['target']) == nft_ids[NFT_BUNDLE]
+
+    with open(summary['files'][1]) as f:
+        stakes = list(csv.DictReader(f))
+
+    info = staking.getInfo(nft_ids[NFT_STAKE]).dict()
+    assert len(stakes) == 1
+    assert int(stakes[0]['id']) == nft_ids[NFT_STAKE]
+    assert int(stakes[0]['stakeBalance']) == info['stakeBalance']
+    assert int(stakes[0]['createdAt']) == info['createdAt']
+
+
+@pytest.mark.parametrize('file_format', [FORMAT_PARQUET, FORMAT_ARROW])
+def test_export_arrow(file_format, tmp_path):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    (registry, staking, nft_ids) = deploy_setup()
+    summary = export_analytics(registry, staking, str(tmp_path), file_format=file_format, batch_size=2)
+
+    if file_format == FORMAT_PARQUET:
+        objects = pyarrow.parquet.read_table(summary['files'][0])
+        stakes = pyarrow.parquet.read_table(summary['files'][1])
+    else:
+        objects = pyarrow.ipc.open_file(summary['files'][0]).read_all()
+        stakes = pyarrow.ipc.open_file(summary['files'][1]).read_all()
+
+    assert objects.num_rows == summary['objects']
+    assert nft_ids[NFT_STAKE] in objects.column('id').to_pylist()
+
+    info = staking.getInfo(nft_ids[NFT_STAKE]).dict()
+    assert stakes.column('id').to_pylist() == [nft_ids[NFT_STAKE]]
+    assert int(stakes.column('stakeBalance').to_pylist()[0]) == info['stakeBalance']
+
+
+def test_object_row_malformed_data():
+    info = {
+        'id': 42,
+        'chain': 1,
+        'objectType': BUNDLE,
+        'state': 1,
+        'uri': '',
+        'mintedIn': 1,
+        'updatedIn': 1,
+        'version': 0,
+        'data': b'\x01' * 40,
+    }
+
+    # data too short for a bundle, the row is exported without data columns
+    skipped = []
+    row = _object_row(info, accounts[0], skipped)
+
+    assert skipped == [42]
+    assert row['id'] == 42
+    assert 'bundleId' not in row
+
+
+def deploy_setup():
+    a = get_stakeholder_accounts(accounts)
+    (
+        registry,
+        staking,
+        nft,
+        nft_ids,
+        dip,
+        usdt,
+        instance_service,
+        instance_operator,
+        registry_owner,
+        staking_owner,
+        proxy_admin,
+    ) = all_in_1(a)
+
+    return (registry, staking, nft_ids)
+
+
+def count_objects(registry):
+    return sum(
+        registry.objects(registry.getChainId(idx), object_type)
+        for idx in range(registry.chains())
+        for object_type in OBJECT_TYPES)
+
+
+def find_row(rows, nft_id):
+    return [row for row in rows if int(row['id']) == nft_id][0]
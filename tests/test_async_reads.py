@@ -0,0 +1,44 @@
+import brownie
+import pytest
+
+from scripts.async_reads import (
+    AsyncReader,
+    is_error,
+    read_all,
+    read_dict,
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_read_all_concurrent(
+    chainRegistryV01,
+    stakingV01,
+    registryOwner,
+    stakingOwner
+):
+    chain_id = chainRegistryV01.toChain(brownie.web3.chain_id)
+    calls = [(chainRegistryV01.objects, chain_id, chainRegistryV01.CHAIN())] * 5
+
+    # results are returned in order of the calls
+    results = read_all([chainRegistryV01.owner, stakingV01.owner] + calls, max_concurrency=3)
+    assert results[0] == registryOwner
+    assert results[1] == stakingOwner
+    assert results[2:] == [chainRegistryV01.objects(chain_id, chainRegistryV01.CHAIN())] * 5
+
+    # reverting reads are returned as exceptions on request
+    r = read_dict({
+        'version': chainRegistryV01.version,
+        'missing': (chainRegistryV01.getInstanceNftId, '0x' + '00' * 32),
+    }, return_exceptions=True)
+
+    assert r['version'] == chainRegistryV01.version()
+    assert is_error(r['missing'])
+
+    # without return_exceptions reverting reads raise
+    with AsyncReader(max_concurrency=2) as reader:
+        with pytest.raises(Exception):
+            reader.read([(chainRegistryV01.getInstanceNftId, '0x' + '00' * 32)])
@@ -0,0 +1,57 @@
+import pytest
+
+from brownie.network.account import Account
+
+from brownie import (
+    chain,
+    web3,
+    USD1,
+)
+
+from scripts.confirmations import ConfirmationTracker
+from scripts.util import wait_for_all_confirmations
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_wait_for_many(
+    usd1: USD1,
+    instanceOperator: Account,
+    customer: Account
+):
+    txs = [usd1.transfer(customer, i + 1, {'from': instanceOperator}) for i in range(5)]
+
+    # instant mining, mined transactions are confirmed
+    receipts = wait_for_all_confirmations(txs)
+    assert [web3.toHex(r['transactionHash']) for r in receipts] == [tx.txid for tx in txs]
+    assert [r['blockNumber'] for r in receipts] == [tx.block_number for tx in txs]
+
+
+def test_tracker_confirmations(
+    usd1: USD1,
+    instanceOperator: Account,
+    customer: Account
+):
+    tracker = ConfirmationTracker(poll_interval=0.1)
+
+    try:
+        tx1 = usd1.transfer(customer, 1, {'from': instanceOperator})
+        tx2 = usd1.transfer(customer, 2, {'from': instanceOperator})
+
+        # tx1 has 2 confirmations, tx2 only 1
+        with pytest.raises(TimeoutError):
+            tracker.wait([tx1, tx2], confirmations=2, timeout=1)
+
+        assert tracker.pending() == 1
+
+        chain.mine(1)
+        receipts = tracker.wait([tx1.txid, tx2], confirmations=2, timeout=5)
+
+        assert len(receipts) == 2
+        assert receipts[1]['blockNumber'] == tx2.block_number
+        assert tracker.pending() == 0
+    finally:
+        tracker.close()
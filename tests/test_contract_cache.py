@@ -0,0 +1,62 @@
+import pytest
+
+from brownie import (
+    interface,
+    USD1,
+    USD2,
+)
+
+import scripts.util as util
+
+from scripts.util import (
+    clear_contract_cache,
+    contract_from_address,
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_handle_cached(
+    usd1: USD1,
+    usd2: USD2,
+):
+    clear_contract_cache()
+
+    token = contract_from_address(interface.IERC20Metadata, usd1)
+    assert contract_from_address(interface.IERC20Metadata, str(usd1).lower()) is token
+    assert token.symbol() == usd1.symbol()
+
+    # other address or abi gives a different handle, the abi is shared
+    token2 = contract_from_address(interface.IERC20Metadata, usd2)
+    assert token2 is not token
+    assert token2.abi is token.abi
+
+    usd = contract_from_address(USD1, usd1)
+    assert usd is not token
+    assert usd.address == token.address
+
+    info = util._contract_from_abi.cache_info()
+    assert info.hits == 1
+    assert info.currsize == 3
+
+
+def test_cache_bounded(usd1: USD1):
+    clear_contract_cache()
+
+    # a fresh abi object per call must not grow the tables beyond the cache size
+    for _ in range(util.CONTRACT_CACHE_SIZE + 10):
+        contract_from_address(FreshAbi(USD1), usd1)
+
+    assert len(util._abi_fingerprints) <= util.CONTRACT_CACHE_SIZE
+    assert len(util._abis) <= util.CONTRACT_CACHE_SIZE
+    assert util._contract_from_abi.cache_info().currsize <= util.CONTRACT_CACHE_SIZE
+
+
+class FreshAbi:
+
+    def __init__(self, container):
+        self._name = container._name
+        self.abi = list(container.abi)
@@ -0,0 +1,145 @@
+import pytest
+
+import scripts.deploy_registry as deploy_registry
+import scripts.fee_oracle as fee_oracle
+
+from brownie import (
+    accounts,
+    chain,
+    web3,
+)
+
+from scripts.fee_oracle import (
+    FeeOracle,
+    URGENCY_LOW,
+    URGENCY_MEDIUM,
+    URGENCY_HIGH,
+)
+from scripts.deploy_registry import (
+    all_in_1,
+    get_safe_gas_price,
+    get_stakeholder_accounts,
+    GAS_PRICE_SAFETY_FACTOR,
+)
+
+GWEI = 10**9
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_synthetic_fee_history():
+    calls = []
+    oracle = FeeOracle(block_count=4, fee_history=synthetic_fee_history(calls))
+
+    stats = oracle.get_stats(block=100)
+    assert stats['baseFee'] == 40 * GWEI
+    assert stats['priorityFee'] == {10: 1 * GWEI, 50: 2 * GWEI, 90: 5 * GWEI}
+    assert stats['gasUsedRatio'] == 0.5
+
+    low = oracle.suggest(URGENCY_LOW, block=100)
+    assert low['priority_fee'] == 1 * GWEI
+    assert low['max_fee'] == 45 * GWEI + 1 * GWEI
+
+    medium = oracle.suggest(URGENCY_MEDIUM, block=100)
+    high = oracle.suggest(URGENCY_HIGH, block=100)
+    assert low['max_fee'] < medium['max_fee'] < high['max_fee']
+    assert high['priority_fee'] == 5 * GWEI
+    assert oracle.get_max_fee(URGENCY_HIGH, block=100) == high['max_fee']
+
+    # fee history is fetched once per block
+    assert len(calls) == 1
+    oracle.suggest(URGENCY_LOW, block=101)
+    assert len(calls) == 2
+
+
+def test_legacy_fallback():
+    oracle = FeeOracle(fee_history=lambda block_count, percentiles: {'baseFeePerGas': []})
+    fees = oracle.suggest(URGENCY_HIGH)
+
+    assert fees == {'gas_price': web3.eth.gas_price}
+    assert oracle.get_max_fee() == web3.eth.gas_price
+
+
+def test_local_node_fee_history():
+    chain.mine(3)
+    oracle = FeeOracle(block_count=3)
+
+    stats = oracle.get_stats()
+    assert stats['block'] == web3.eth.block_number
+
+    fees = oracle.suggest(URGENCY_MEDIUM)
+
+    if stats['baseFee'] is None:
+        assert fees['gas_price'] > 0
+    else:
+        assert fees['max_fee'] >= stats['baseFee'] + fees['priority_fee']
+
+
+def test_safe_gas_price(monkeypatch):
+    oracle = FeeOracle(block_count=4, fee_history=synthetic_fee_history([]))
+    monkeypatch.setattr(fee_oracle, '_oracle', oracle)
+
+    # max fee of the oracle is used as is
+    max_fee = oracle.get_max_fee(URGENCY_HIGH)
+    assert get_safe_gas_price(urgency=URGENCY_HIGH) == (max_fee, 1.0, max_fee)
+
+    # legacy gas price keeps the safety factor
+    gas_price = 10 * GWEI
+    assert get_safe_gas_price(gas_price) == (gas_price, GAS_PRICE_SAFETY_FACTOR, int(GAS_PRICE_SAFETY_FACTOR * gas_price))
+
+    legacy = FeeOracle(fee_history=lambda block_count, percentiles: {'baseFeePerGas': []})
+    monkeypatch.setattr(fee_oracle, '_oracle', legacy)
+    (_, safety_factor, _) = get_safe_gas_price()
+    assert safety_factor == GAS_PRICE_SAFETY_FACTOR
+
+
+def test_all_in_1_funding(monkeypatch):
+    oracle = FeeOracle(block_count=4, fee_history=synthetic_fee_history([]))
+    monkeypatch.setattr(fee_oracle, '_oracle', oracle)
+
+    prices = []
+    def safe_gas_price(*args):
+        prices.append(get_safe_gas_price(*args))
+        return prices[-1]
+
+    # deployment is stopped right after the funding check
+    def stop(*args):
+        raise FundsChecked()
+
+    monkeypatch.setattr(deploy_registry, 'get_safe_gas_price', safe_gas_price)
+    monkeypatch.setattr(deploy_registry, 'connect_to_dip', stop)
+
+    with pytest.raises(FundsChecked):
+        all_in_1(get_stakeholder_accounts(accounts), urgency=URGENCY_HIGH)
+
+    # funding is based on the max fee of the oracle without safety factor
+    max_fee = oracle.get_max_fee(URGENCY_HIGH)
+    assert prices == [(max_fee, 1.0, max_fee)]
+
+
+class FundsChecked(Exception):
+    pass
+
+
+def synthetic_fee_history(calls):
+    # 4 blocks with rising base fee, one empty block without rewards
+    def fee_history(block_count, percentiles):
+        calls.append((block_count, percentiles))
+        assert percentiles == [10, 50, 90]
+
+        return {
+            'oldestBlock': hex(97),
+            'baseFeePerGas': [hex(b * GWEI) for b in [10, 20, 25, 30, 40]],
+            'gasUsedRatio': [0.2, 0.8, 0.0, 1.0],
+            'reward': [
+                [hex(1 * GWEI), hex(2 * GWEI), hex(3 * GWEI)],
+                [hex(1 * GWEI), hex(2 * GWEI), hex(5 * GWEI)],
+                [],
+                [hex(2 * GWEI), hex(4 * GWEI), hex(8 * GWEI)],
+            ],
+        }
+
+    return fee_history
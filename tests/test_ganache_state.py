@@ -0,0 +1,69 @@
+import json
+import os
+import time
+
+from scripts.ganache_state import (
+    bytecode_hashes,
+    check_state,
+    DUMP_DIR,
+    MANIFEST_FILE,
+    MANIFEST_FORMAT,
+    MAX_AGE,
+)
+
+
+def test_check_state(tmp_path):
+    build_dir = tmp_path / 'contracts'
+    state_dir = tmp_path / 'state'
+    build_dir.mkdir()
+    state_dir.mkdir()
+
+    write_artifact(build_dir, 'DIP', '0x6080')
+    write_artifact(build_dir, 'ChainNft', '0x6081')
+
+    assert check_state(str(state_dir), str(build_dir)) == ['manifest missing']
+
+    hashes = bytecode_hashes(['DIP', 'ChainNft'], str(build_dir))
+    assert len(hashes) == 2
+    assert hashes['DIP'] != hashes['ChainNft']
+
+    write_manifest(state_dir, hashes, int(time.time()))
+    assert check_state(str(state_dir), str(build_dir)) == ['database dump missing']
+
+    (state_dir / DUMP_DIR).mkdir()
+    assert check_state(str(state_dir), str(build_dir)) == []
+
+    # changed bytecode invalidates the dump
+    write_artifact(build_dir, 'ChainNft', '0x6082')
+    assert check_state(str(state_dir), str(build_dir)) == ['bytecode of ChainNft changed']
+
+    # outdated dump
+    write_manifest(state_dir, bytecode_hashes(['DIP', 'ChainNft'], str(build_dir)), int(time.time()) - MAX_AGE - 1)
+    assert check_state(str(state_dir), str(build_dir)) == ['dump older than 7 days']
+
+
+def test_restored_stack(ganacheManifest, ganacheStack):
+    # stack deployed by all_in_1 is available without deploying
+    registry = ganacheStack['ChainRegistryV01']
+    staking = ganacheStack['StakingV03']
+
+    assert registry.getStaking() == staking
+    assert staking.getRegistry() == registry
+
+    for nft_id in ganacheManifest['nftIds'].values():
+        assert registry.exists(nft_id)
+
+
+def write_artifact(build_dir, name, bytecode):
+    with open(os.path.join(build_dir, '{}.json'.format(name)), 'w') as f:
+        json.dump({'contractName': name, 'deployedBytecode': bytecode}, f)
+
+
+def write_manifest(state_dir, hashes, built_at):
+    with open(os.path.join(state_dir, MANIFEST_FILE), 'w') as f:
+        json.dump({
+            'format': MANIFEST_FORMAT,
+            'builtAt': built_at,
+            'contracts': {},
+            'bytecode': hashes,
+        }, f)
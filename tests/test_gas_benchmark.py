@@ -0,0 +1,27 @@
+import os
+import pytest
+
+from scripts.deploy_registry import get_stakeholder_accounts
+from scripts.gas_benchmark import (
+    compare_registry_versions,
+    ENV_COMPARE_REGISTRY,
+    REGISTER_OPERATIONS,
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+# deploys two registry setups, only runs with GAS_BENCH_COMPARE_REGISTRY=1 to keep 'brownie test' fast
+@pytest.mark.skipif(not os.getenv(ENV_COMPARE_REGISTRY), reason='slow, set {} to run'.format(ENV_COMPARE_REGISTRY))
+def test_compare_registry_versions(accounts):
+    results = compare_registry_versions(get_stakeholder_accounts(accounts))
+
+    assert sorted(results.keys()) == sorted(REGISTER_OPERATIONS)
+
+    # packed nft info and compact data save storage slots
+    # instances are left out, v03 additionally caches the instance service at registration
+    for operation in ['registerToken', 'registerComponent', 'registerBundle']:
+        assert results[operation]['v03'] < results[operation]['v01'], operation
@@ -0,0 +1,85 @@
+import pytest
+
+from brownie.network.account import Account
+
+from brownie import (
+    web3,
+    USD2,
+    ChainRegistryV01,
+)
+
+from scripts.gas_profile import (
+    aggregate,
+    profile_struct_logs,
+    profile_tx,
+    write_collapsed,
+    INTRINSIC_FRAME,
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_profile_struct_logs(tmp_path):
+    token = '0x' + '22' * 20
+    transfer = '0xa9059cbb'
+
+    logs = [
+        step(1, 'PUSH1', 1000, 3),
+        step(1, 'CALL', 997, 900, stack=['4', '0', '0', token[2:], 'ffff'], memory=[transfer[2:] + '0' * 56]),
+        step(2, 'PUSH1', 800, 3),
+        step(2, 'STOP', 797, 0),
+        step(1, 'STOP', 900, 0),
+    ]
+
+    labels = {token: 'USD2'}
+    selectors = {transfer: 'transfer'}
+    stacks = profile_struct_logs(logs, ('StakingV03', 'createStake'), labels, selectors)
+
+    assert stacks == {
+        ('StakingV03.createStake',): 97,
+        ('StakingV03.createStake', 'USD2.transfer'): 3,
+    }
+
+    profile = aggregate(stacks)
+    assert profile['total'] == 1000 - 900
+    assert list(profile['byContract'].keys()) == ['StakingV03', 'USD2']
+
+    file_name = str(tmp_path / 'profile.folded')
+    write_collapsed(stacks, file_name)
+
+    with open(file_name) as f:
+        lines = f.read().splitlines()
+
+    assert lines == ['StakingV03.createStake 97', 'StakingV03.createStake;USD2.transfer 3']
+
+
+def test_profile_register_token(
+    usd2: USD2,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    tmp_path
+):
+    chain_id = chainRegistryV01.toChain(web3.chain_id)
+    tx = chainRegistryV01.registerToken(chain_id, usd2, '', {'from': registryOwner})
+
+    profile = profile_tx(tx, contracts=[chainRegistryV01], file_name=str(tmp_path / 'register.folded'))
+
+    assert profile['gasUsed'] == tx.gas_used
+    assert profile['total'] == tx.gas_used
+    assert profile['byFunction'][INTRINSIC_FRAME] > 21000
+    assert profile['byFunction']['ChainNft.mint'] > 0
+    assert profile['byContract']['ChainRegistryV01'] > 0
+
+
+def step(depth, op, gas, gas_cost, stack=[], memory=[]):
+    return {
+        'depth': depth,
+        'op': op,
+        'gas': gas,
+        'gasCost': gas_cost,
+        'stack': stack,
+        'memory': memory,
+    }
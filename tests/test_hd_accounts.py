@@ -0,0 +1,46 @@
+import pytest
+
+from brownie import accounts
+
+from scripts.hd_accounts import (
+    derive_addresses,
+    derive_private_keys,
+    load_accounts,
+    new_mnemonic,
+)
+from scripts.util import new_accounts
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_derive_matches_brownie():
+    mnemonic = new_mnemonic()
+    expected = accounts.from_mnemonic(mnemonic, count=5)
+
+    assert derive_private_keys(mnemonic, 5) == [a.private_key for a in expected]
+    assert derive_private_keys(mnemonic, 2, offset=3) == [a.private_key for a in expected[3:]]
+
+    loaded = load_accounts(mnemonic, 5)
+    assert [a.address for a in loaded] == [a.address for a in expected]
+
+
+def test_derive_addresses_parallel():
+    mnemonic = new_mnemonic()
+    addresses = derive_addresses(mnemonic, 1200, processes=2)
+
+    assert len(addresses) == 1200
+    assert len(set(address for (address, _) in addresses)) == 1200
+
+    # chunks are reassembled in account order
+    for index in [0, 499, 500, 1199]:
+        assert addresses[index][0] == accounts.from_mnemonic(mnemonic, count=1, offset=index).address
+
+
+def test_new_accounts():
+    (new, mnemonic) = new_accounts(count=3)
+
+    assert len(new) == 3
+    assert [a.address for a in new] == [a.address for a in accounts.from_mnemonic(mnemonic, count=3)]
@@ -0,0 +1,52 @@
+import pytest
+
+from scripts.load_test import (
+    run_load_test,
+    _get_mix,
+    MIX_DEFAULT,
+    OPERATIONS,
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_load_test(accounts):
+    reports = run_load_test(
+        stakers=4,
+        bundles=2,
+        rounds=2,
+        ops_per_round=12,
+        concurrency=2)
+
+    assert len(reports) == 2
+
+    for report in reports:
+        operations = report['operations']
+        assert sorted(operations.keys()) == sorted(OPERATIONS)
+        assert sum(stats['count'] + stats['errors'] for stats in operations.values()) == 12
+        assert sum(stats['errors'] for stats in operations.values()) == 0
+        assert report['tps'] > 0
+
+        for stats in operations.values():
+            if stats['count'] > 0:
+                assert stats['p50'] <= stats['p95'] <= stats['p99']
+                assert stats['gasAvg'] <= stats['gasMax']
+
+    # stakes only grow, createStake and restake add stakes
+    assert reports[1]['stakes'] >= reports[0]['stakes'] > 0
+
+
+def test_load_mix():
+    assert _get_mix(None) == MIX_DEFAULT
+    assert _get_mix('stake=1,claimRewards=3') == {'stake': 1, 'claimRewards': 3}
+
+    # weights are integers, restake counts and funding amounts derive from them
+    mix = _get_mix('createStake=4,stake=3,restake=1,claimRewards=2')
+    assert mix == MIX_DEFAULT
+    assert all(isinstance(weight, int) for weight in mix.values())
+
+    with pytest.raises(AssertionError):
+        _get_mix('unstake=1')
@@ -0,0 +1,65 @@
+import pytest
+
+from brownie.network.account import Account
+from brownie.test import given, strategy
+from hypothesis import settings
+
+from brownie import (
+    web3,
+    ChainNft
+)
+
+from scripts.nft_id import (
+    decode,
+    decode_many,
+    encode,
+    next_id,
+    next_ids,
+    partition_by_chain,
+)
+
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+@given(mints=strategy('uint8', min_value=1, max_value=12))
+@settings(max_examples=10)
+def test_nft_id_codec_matches_mint(
+    chainNftStandalone: ChainNft,
+    registryOwner: Account,
+    customer: Account,
+    mints
+):
+    nft = chainNftStandalone
+    chain_id = web3.chain_id
+
+    # predict ids before minting
+    predicted = next_ids(chain_id, nft.totalMinted(), mints)
+    minted = []
+
+    for i in range(mints):
+        assert next_id(chain_id, nft.totalMinted()) == predicted[i]
+
+        tx = nft.mint(customer, '', {'from': registryOwner})
+        token_id = tx.events['Transfer']['tokenId']
+        minted.append(token_id)
+
+        (index, token_chain_id, digits) = decode(token_id)
+        assert token_chain_id == chain_id
+        assert digits == len(str(chain_id))
+        assert encode(index, chain_id) == token_id
+
+    assert minted == predicted
+    assert decode_many(minted) == [decode(token_id) for token_id in minted]
+    assert partition_by_chain(minted) == {chain_id: minted}
+
+
+@given(
+    index=strategy('uint64', min_value=1),
+    chain_id=strategy('uint64', min_value=1))
+def test_nft_id_codec_roundtrip(index, chain_id):
+    nft_id = encode(index, chain_id)
+    assert decode(nft_id) == (index, chain_id, len(str(chain_id)))
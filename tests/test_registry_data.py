@@ -0,0 +1,182 @@
+import pytest
+import brownie
+
+from brownie.network.account import Account
+
+from brownie import (
+    web3,
+    USD2,
+    MockInstance,
+    MockInstanceRegistry,
+    OwnableProxyAdmin,
+    ChainRegistryV01,
+    ChainRegistryV03
+)
+
+from scripts.registry_data import (
+    decode_data,
+    storage_slots,
+)
+
+from scripts.util import (
+    contract_from_address,
+    unix_timestamp
+)
+
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_compact_data_encoding(
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    theOutsider: Account
+):
+    instance_id = mockInstance.getInstanceId()
+    riskpool_id = 1
+    bundle_name = 'my test bundle'
+    bundle_expiry_at = unix_timestamp() + 14 * 24 * 3600
+
+    setup_mock_instance(mockInstance, usd2, riskpool_id, [1, 2])
+
+    # legacy objects registered with v1
+    chain_id = chainRegistryV01.toChain(mockInstance.getChainId())
+    chainRegistryV01.registerToken(chain_id, usd2, '', {'from': registryOwner})
+    chainRegistryV01.registerInstance(mockRegistry, 'mock instance', '', {'from': registryOwner})
+    chainRegistryV01.registerComponent(instance_id, riskpool_id, '', {'from': registryOwner})
+    chainRegistryV01.registerBundle(instance_id, riskpool_id, 1, bundle_name, bundle_expiry_at, {'from': theOutsider})
+    legacy_bundle_nft = chainRegistryV01.getBundleNftId(instance_id, 1)
+    legacy_bundle_data = chainRegistryV01.decodeBundleData(legacy_bundle_nft).dict()
+
+    chainRegistry = upgrade_chain_registry(chainRegistryV01, proxyAdmin, proxyAdminOwner)
+    mockInstance.setChainRegistry(chainRegistry)
+
+    # compact objects registered with v3
+    chainRegistry.registerBundle(instance_id, riskpool_id, 2, bundle_name, bundle_expiry_at, {'from': theOutsider})
+    bundle_nft = chainRegistry.getBundleNftId(instance_id, 2)
+
+    assert chainRegistry.decodeBundleData(legacy_bundle_nft).dict() == legacy_bundle_data
+
+    bundle_data = chainRegistry.decodeBundleData(bundle_nft).dict()
+    assert bundle_data['instanceId'] == instance_id
+    assert bundle_data['riskpoolId'] == riskpool_id
+    assert bundle_data['bundleId'] == 2
+    assert bundle_data['token'] == usd2
+    assert bundle_data['displayName'] == bundle_name
+    assert bundle_data['expiryAt'] == bundle_expiry_at
+
+    legacy_info = chainRegistry.getNftInfo(legacy_bundle_nft).dict()
+    info = chainRegistry.getNftInfo(bundle_nft).dict()
+    assert storage_slots(bytes(info['data'])) < storage_slots(bytes(legacy_info['data']))
+
+    # targeted getters work for both encodings
+    for nft_id in [legacy_bundle_nft, bundle_nft]:
+        data = chainRegistry.decodeBundleData(nft_id).dict()
+        assert chainRegistry.getBundleInstance(nft_id) == (data['instanceId'], data['riskpoolId'], data['bundleId'])
+        assert chainRegistry.getBundleToken(nft_id) == data['token']
+        assert chainRegistry.getBundleExpiryAt(nft_id) == data['expiryAt']
+
+    # python decoder matches on-chain decoding
+    for (nft_info, data) in [(legacy_info, legacy_bundle_data), (info, bundle_data)]:
+        decoded = decode_data(nft_info['objectType'], bytes(nft_info['data']), nft_info['version'])
+        assert '0x{}'.format(decoded['instanceId'].hex()) == data['instanceId']
+        assert decoded['riskpoolId'] == data['riskpoolId']
+        assert decoded['bundleId'] == data['bundleId']
+        assert decoded['token'] == data['token']
+        assert decoded['displayName'] == data['displayName']
+        assert decoded['expiryAt'] == data['expiryAt']
+
+    # lifetime extension keeps the encoding of the bundle
+    lifetime_extension = 42 * 24 * 3600
+    for nft_id in [legacy_bundle_nft, bundle_nft]:
+        data = chainRegistry.decodeBundleData(nft_id).dict()
+        mockInstance.extendBundleLifetime(nft_id, lifetime_extension, {'from': proxyAdminOwner})
+
+        data_extended = chainRegistry.decodeBundleData(nft_id).dict()
+        assert data_extended['expiryAt'] == data['expiryAt'] + lifetime_extension
+        assert data_extended['displayName'] == data['displayName']
+        assert chainRegistry.getBundleExpiryAt(nft_id) == data_extended['expiryAt']
+
+    with brownie.reverts('ERROR:CRG-451:CALLER_NOT_RISKPOOL'):
+        chainRegistry.extendBundleLifetime(bundle_nft, lifetime_extension, {'from': theOutsider})
+
+
+def test_compact_data_other_objects(
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    theOutsider: Account
+):
+    chainRegistry = upgrade_chain_registry(chainRegistryV01, proxyAdmin, proxyAdminOwner)
+
+    instance_id = mockInstance.getInstanceId()
+    riskpool_id = 1
+    setup_mock_instance(mockInstance, usd2, riskpool_id, [])
+
+    chain_id = chainRegistry.toChain(mockInstance.getChainId())
+    token_tx = chainRegistry.registerToken(chain_id, usd2, '', {'from': registryOwner})
+    instance_tx = chainRegistry.registerInstance(mockRegistry, 'mock instance', '', {'from': registryOwner})
+    component_tx = chainRegistry.registerComponent(instance_id, riskpool_id, '', {'from': registryOwner})
+
+    token_nft = token_tx.events['LogChainRegistryObjectRegistered']['id']
+    instance_nft = instance_tx.events['LogChainRegistryObjectRegistered']['id']
+    component_nft = component_tx.events['LogChainRegistryObjectRegistered']['id']
+
+    assert chainRegistry.decodeTokenData(token_nft) == usd2
+    assert chainRegistry.getTokenNftId(chain_id, usd2) == token_nft
+    assert chainRegistry.decodeInstanceData(instance_nft) == (instance_id, mockRegistry, 'mock instance')
+    assert chainRegistry.getInstanceNftId(instance_id) == instance_nft
+    assert chainRegistry.decodeComponentData(component_nft) == (instance_id, riskpool_id, usd2)
+    assert chainRegistry.getComponentNftId(instance_id, riskpool_id) == component_nft
+
+    # python decoder matches on-chain decoding
+    info = chainRegistry.getNftInfo(token_nft).dict()
+    assert decode_data(info['objectType'], bytes(info['data']), info['version'])['token'] == usd2
+
+    info = chainRegistry.getNftInfo(instance_nft).dict()
+    decoded = decode_data(info['objectType'], bytes(info['data']), info['version'])
+    assert decoded['registry'] == mockRegistry
+    assert decoded['displayName'] == 'mock instance'
+
+    info = chainRegistry.getNftInfo(component_nft).dict()
+    decoded = decode_data(info['objectType'], bytes(info['data']), info['version'])
+    assert decoded['componentId'] == riskpool_id
+    assert decoded['token'] == usd2
+
+
+def setup_mock_instance(mockInstance, usd2, riskpool_id, bundle_ids):
+    type_riskpool = 2
+    state_active = 3
+    bundle_state_active = 0 # enum BundleState { Active, Locked, Closed, Burned }
+
+    mockInstance.setComponentInfo(
+        riskpool_id,
+        type_riskpool,
+        state_active,
+        usd2)
+
+    for bundle_id in bundle_ids:
+        mockInstance.setBundleInfo(
+            bundle_id,
+            riskpool_id,
+            bundle_state_active,
+            10000)
+
+
+def upgrade_chain_registry(chainRegistryV01, proxyAdmin, proxyAdminOwner):
+    v3_implementation = ChainRegistryV03.deploy({'from': proxyAdminOwner})
+    proxyAdmin.upgrade(v3_implementation, {'from': proxyAdminOwner})
+
+    return contract_from_address(ChainRegistryV03, chainRegistryV01)
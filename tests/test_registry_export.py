@@ -0,0 +1,144 @@
+import pytest
+import brownie
+
+from brownie.network.account import Account
+
+from brownie import (
+    web3,
+    USD2,
+    ChainNft,
+    MockInstance,
+    MockInstanceRegistry,
+    ChainRegistryV01,
+)
+
+from scripts.registry_data import BUNDLE, CHAIN, REGISTRY
+from scripts.registry_export import (
+    deploy_import_registry,
+    export_registry,
+    import_registry,
+    read_export,
+)
+
+from scripts.util import (
+    contract_from_address,
+    unix_timestamp
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_export_import(
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    proxyAdminOwner: Account,
+    theOutsider: Account,
+    tmp_path
+):
+    bundle_nft = create_mock_bundle_setup(
+        mockInstance,
+        mockRegistry,
+        usd2,
+        chainRegistryV01,
+        registryOwner,
+        theOutsider)
+
+    file_name = str(tmp_path / 'registry_export.jsonl.gz')
+    objects = export_registry(chainRegistryV01, file_name, max_concurrency=4)
+
+    # chain, registry, token, instance, riskpool, bundle
+    assert objects == 6
+    assert objects == contract_from_address(ChainNft, chainRegistryV01.getNft()).totalMinted()
+
+    (header, exported) = read_export(file_name)
+    assert header['chainId'] == web3.chain_id
+    assert header['registry'] == str(chainRegistryV01)
+    assert [obj['id'] for obj in exported] == sorted(obj['id'] for obj in exported)
+
+    (registry, nft) = deploy_import_registry(registryOwner, proxyAdminOwner)
+    minted_before = nft.totalMinted()
+
+    id_map = import_registry(registry, file_name, registryOwner, batch_size=2)
+
+    # chain and registry of the target registry are reused
+    chain_id = registry.toChain(web3.chain_id)
+    assert id_map[chainRegistryV01.getChainNftId(chain_id)] == registry.getChainNftId(chain_id)
+    assert id_map[chainRegistryV01.getRegistryNftId(chain_id)] == registry.getRegistryNftId(chain_id)
+    assert nft.totalMinted() == minted_before + objects - 2
+
+    for obj in exported:
+        new_id = id_map[obj['id']]
+        info = registry.getNftInfo(new_id).dict()
+
+        assert info['objectType'] == obj['objectType']
+        assert info['state'] == obj['state']
+        assert registry.ownerOf(new_id) == obj['owner']
+
+    # bundle data is readable with the compact encoding
+    bundle_new = id_map[bundle_nft]
+    assert registry.getNftInfo(bundle_new).dict()['objectType'] == BUNDLE
+    assert registry.decodeBundleData(bundle_new) == chainRegistryV01.decodeBundleData(bundle_nft)
+
+    instance_id = mockInstance.getInstanceId()
+    assert registry.getBundleNftId(instance_id, 1) == bundle_new
+    assert registry.objects(chain_id, CHAIN) == 1
+    assert registry.objects(chain_id, REGISTRY) == 1
+
+
+def test_import_authz(
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    proxyAdminOwner: Account,
+    theOutsider: Account,
+):
+    (registry, nft) = deploy_import_registry(registryOwner, proxyAdminOwner)
+    chain_id = registry.toChain(web3.chain_id)
+    token = (theOutsider, chain_id, 4, 2, '', bytes(20))
+
+    with brownie.reverts('Ownable: caller is not the owner'):
+        registry.importObjects([token], {'from': theOutsider})
+
+    with brownie.reverts('ERROR:CRG-901:NO_OBJECTS'):
+        registry.importObjects([], {'from': registryOwner})
+
+
+def create_mock_bundle_setup(
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    theOutsider: Account,
+    bundle_lifetime = 14 * 24 * 3600,
+    bundle_id = 1
+) -> int:
+    chain_id = chainRegistryV01.toChain(mockInstance.getChainId())
+    instance_id = mockInstance.getInstanceId()
+    riskpool_id = 1
+    bundle_funding = 10000 * 10 ** usd2.decimals()
+
+    type_riskpool = 2
+    state_active = 3
+    mockInstance.setComponentInfo(riskpool_id, type_riskpool, state_active, usd2)
+
+    bundle_state_active = 0
+    mockInstance.setBundleInfo(bundle_id, riskpool_id, bundle_state_active, bundle_funding)
+
+    chainRegistryV01.registerToken(chain_id, usd2, '', {'from': registryOwner})
+    chainRegistryV01.registerInstance(mockRegistry, 'mockRegistry TEST', '', {'from': registryOwner})
+    chainRegistryV01.registerComponent(instance_id, riskpool_id, '', {'from': registryOwner})
+    chainRegistryV01.registerBundle(
+        instance_id,
+        riskpool_id,
+        bundle_id,
+        'my test bundle',
+        unix_timestamp() + bundle_lifetime,
+        {'from': theOutsider})
+
+    return chainRegistryV01.getBundleNftId(instance_id, bundle_id)
@@ -0,0 +1,169 @@
+import pytest
+import brownie
+
+from brownie.network.account import Account
+
+from brownie import (
+    web3,
+    USD1,
+    USD2,
+    MockInstance,
+    MockInstanceRegistry,
+    OwnableProxyAdmin,
+    ChainRegistryV01,
+    ChainRegistryV03
+)
+
+from scripts.registry_did import generate_dids
+from scripts.util import contract_from_address
+
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_token_did_cached(
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    theOutsider: Account
+):
+    chain_id = chainRegistryV01.toChain(web3.chain_id)
+    registry_nft_id = chainRegistryV01.getRegistryNftId(chain_id)
+    did_v1 = chainRegistryV01.tokenDID(registry_nft_id)
+
+    chainRegistry = upgrade_chain_registry(chainRegistryV01, proxyAdmin, proxyAdminOwner)
+    assert chainRegistry.version() > chainRegistryV01.version()
+
+    # did prefix of existing registry is cached on upgrade
+    did_prefix = chainRegistry.getDidPrefix(chain_id)
+    assert did_prefix == '{}{}_erc721:{}_'.format(chainRegistry.BASE_DID(), web3.chain_id, str(chainRegistry).lower())
+    assert chainRegistry.tokenDID(registry_nft_id) == did_v1
+
+    # objects registered after upgrade
+    tx = chainRegistry.registerToken(chain_id, usd2, '', {'from': registryOwner})
+    token_nft_id = tx.events['LogChainRegistryObjectRegistered']['id']
+    assert chainRegistry.tokenDID(token_nft_id) == '{}{}'.format(did_prefix, token_nft_id)
+
+    # off-chain generation matches on-chain dids
+    dids = generate_dids(chainRegistry)
+    assert len(dids) >= 3
+
+    for nft_id, did in dids.items():
+        assert chainRegistry.tokenDID(nft_id) == did
+
+    # updating prefix only for chains with registry
+    chainRegistry.updateDidPrefix(chain_id, {'from': theOutsider})
+    assert chainRegistry.getDidPrefix(chain_id) == did_prefix
+
+    other_chain = chainRegistry.toChain(web3.chain_id + 1)
+    with brownie.reverts('ERROR:CRG-410:REGISTRY_NOT_REGISTERED'):
+        chainRegistry.updateDidPrefix(other_chain, {'from': theOutsider})
+
+    with brownie.reverts('ERROR:CRG-412:TOKEN_ID_INVALID'):
+        chainRegistry.tokenDID(token_nft_id + 100)
+
+
+def test_packed_nft_info(
+    usd1: USD1,
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    theOutsider: Account
+):
+    chain_id = chainRegistryV01.toChain(web3.chain_id)
+    tx = chainRegistryV01.registerToken(chain_id, usd1, '', {'from': registryOwner})
+    legacy_nft_id = tx.events['LogChainRegistryObjectRegistered']['id']
+    legacy_info = chainRegistryV01.getNftInfo(legacy_nft_id).dict()
+
+    chainRegistry = upgrade_chain_registry(chainRegistryV01, proxyAdmin, proxyAdminOwner)
+
+    # objects registered with previous versions remain readable
+    assert chainRegistry.getNftInfo(legacy_nft_id).dict() == legacy_info
+    assert chainRegistry.getTokenNftId(chain_id, usd1) == legacy_nft_id
+
+    # objects registered with v3 use packed nft info
+    tx = chainRegistry.registerToken(chain_id, usd2, 'ipfs://usd2', {'from': registryOwner})
+    nft_id = tx.events['LogChainRegistryObjectRegistered']['id']
+
+    state_approved = 2 # ObjectState { Undefined, Proposed, Approved, Suspended, ...}
+    state_suspended = 3
+
+    info = chainRegistry.getNftInfo(nft_id).dict()
+    assert chainRegistry.exists(nft_id)
+    assert info['id'] == nft_id
+    assert info['chain'] == chain_id
+    assert info['objectType'] == chainRegistry.TOKEN()
+    assert info['state'] == state_approved
+    assert info['mintedIn'] == tx.block_number
+    assert info['updatedIn'] == tx.block_number
+    assert info['version'] == chainRegistry.version()
+    assert chainRegistry.decodeTokenData(nft_id) == usd2
+    assert chainRegistry.getTokenNftId(chain_id, usd2) == nft_id
+    assert chainRegistry.getObjectInfo(nft_id) == (chain_id, chainRegistry.TOKEN(), state_approved)
+
+    # state changes for packed and legacy objects
+    for object_id in [nft_id, legacy_nft_id]:
+        tx = chainRegistry.setObjectState(object_id, state_suspended, {'from': registryOwner})
+        info = chainRegistry.getNftInfo(object_id).dict()
+        assert info['state'] == state_suspended
+        assert info['updatedIn'] == tx.block_number
+
+    assert not chainRegistry.exists(nft_id + 100)
+    with brownie.reverts('ERROR:CRG-430:NFT_ID_INVALID'):
+        chainRegistry.getNftInfo(nft_id + 100)
+
+
+def test_instance_service_cached(
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    instanceOperator: Account,
+    theOutsider: Account
+):
+    chainRegistryV01.registerInstance(mockRegistry, 'mockRegistry TEST', '', {'from': registryOwner})
+    instance_id = mockInstance.getInstanceId()
+
+    chainRegistry = upgrade_chain_registry(chainRegistryV01, proxyAdmin, proxyAdminOwner)
+
+    # instance registered with previous version: resolved via instance registry
+    assert chainRegistry.getInstanceServiceFacade(instance_id) == mockInstance
+    gas_probing = chainRegistry.getInstanceServiceFacade.estimate_gas(instance_id)
+
+    # refresh is permissionless
+    tx = chainRegistry.refreshInstanceService(instance_id, {'from': theOutsider})
+    evt = tx.events['LogChainRegistryInstanceServiceUpdated']
+    assert evt['instanceId'] == instance_id
+    assert evt['instanceServiceOld'] == brownie.ZERO_ADDRESS
+    assert evt['instanceServiceNew'] == mockInstance
+
+    assert chainRegistry.getInstanceServiceFacade(instance_id) == mockInstance
+    gas_cached = chainRegistry.getInstanceServiceFacade.estimate_gas(instance_id)
+    assert gas_cached < gas_probing
+
+    # instance service of new instances is resolved at registration
+    instance2 = MockInstance.deploy({'from': instanceOperator})
+    registry2 = contract_from_address(MockInstanceRegistry, instance2.getRegistry())
+    tx = chainRegistry.registerInstance(registry2, 'instance 2', '', {'from': registryOwner})
+
+    assert tx.events['LogChainRegistryInstanceServiceUpdated']['instanceServiceNew'] == instance2
+    assert chainRegistry.getInstanceServiceFacade(instance2.getInstanceId()) == instance2
+
+    with brownie.reverts('ERROR:CRG-005:INSTANCE_NOT_REGISTERED'):
+        chainRegistry.refreshInstanceService(bytes(32), {'from': theOutsider})
+
+
+def upgrade_chain_registry(chainRegistryV01, proxyAdmin, proxyAdminOwner):
+    v3_implementation = ChainRegistryV03.deploy({'from': proxyAdminOwner})
+    proxyAdmin.upgrade(v3_implementation, {'from': proxyAdminOwner})
+
+    return contract_from_address(ChainRegistryV03, chainRegistryV01)
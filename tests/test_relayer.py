@@ -0,0 +1,187 @@
+import pytest
+import threading
+import time
+
+from brownie import StakingMessageHelper
+
+from scripts.relayer import (
+    Relayer,
+    RelayerError,
+    StakeRequest,
+    REQUEST_STAKE,
+    STATUS_FAILED,
+    STATUS_QUEUED,
+)
+from scripts.staking_signature import create_stake_signature
+from scripts.util import s2b32
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_relayer_prevalidation(
+    stakingV01,
+    stakingOwner,
+    staker,
+    staker2,
+    theOutsider
+):
+    messageHelper = StakingMessageHelper.deploy({'from': stakingOwner})
+    stakingV01.setMessageHelper(messageHelper, {'from': stakingOwner})
+
+    relayer = Relayer(stakingV01, theOutsider)
+
+    target = 1234
+    dipAmount = 1000 * 10**18
+    signatureId = s2b32('relayer-request-1')
+    signature = create_stake_signature(target, dipAmount, signatureId, messageHelper, staker)
+
+    request = StakeRequest(
+        owner=staker.address,
+        target=target,
+        dipAmount=dipAmount,
+        signatureId=signatureId,
+        signature=signature)
+
+    status = relayer.submit_stake(request)
+    assert status['status'] == STATUS_QUEUED
+    assert relayer.get_status(signatureId)['status'] == STATUS_QUEUED
+    assert relayer.get_metrics()['queueDepth'] == 1
+
+    # same signature id is only accepted once
+    with pytest.raises(RelayerError):
+        relayer.submit_stake(request)
+
+    # signer needs to match owner
+    signatureId2 = s2b32('relayer-request-2')
+    signature2 = create_stake_signature(target, dipAmount, signatureId2, messageHelper, staker)
+
+    with pytest.raises(RelayerError):
+        relayer.submit_stake(StakeRequest(
+            owner=staker2.address,
+            target=target,
+            dipAmount=dipAmount,
+            signatureId=signatureId2,
+            signature=signature2))
+
+    # any change in the message invalidates the signature
+    with pytest.raises(RelayerError):
+        relayer.submit_stake(StakeRequest(
+            owner=staker.address,
+            target=target + 1,
+            dipAmount=dipAmount,
+            signatureId=signatureId2,
+            signature=signature2))
+
+    metrics = relayer.get_metrics()
+    assert metrics['queueDepth'] == 1
+    assert metrics['received'] == 4
+    assert metrics['duplicates'] == 1
+    assert metrics['rejected'] == 2
+
+    # staking to a non-existing target fails on-chain and is reported as such
+    relayer._send_batch([relayer.queue.get_nowait()])
+    status = relayer.get_status(signatureId)
+    assert status['status'] == STATUS_FAILED
+    assert status['error'] is not None
+
+    metrics = relayer.get_metrics()
+    assert metrics['queueDepth'] == 0
+    assert metrics['batches'] == 1
+    assert metrics['failed'] == 1
+
+    # failed requests may be resubmitted
+    status = relayer.submit_stake(request)
+    assert status['status'] == STATUS_QUEUED
+    assert relayer.get_metrics()['duplicates'] == 1
+
+
+def test_relayer_prune(
+    stakingV01,
+    stakingOwner,
+    staker,
+    theOutsider
+):
+    messageHelper = StakingMessageHelper.deploy({'from': stakingOwner})
+    stakingV01.setMessageHelper(messageHelper, {'from': stakingOwner})
+
+    relayer = Relayer(stakingV01, theOutsider, finished_ttl=0)
+
+    target = 1234
+    dipAmount = 1000 * 10**18
+    signatureId = s2b32('relayer-request-1')
+    signature = create_stake_signature(target, dipAmount, signatureId, messageHelper, staker)
+
+    relayer.submit_stake(StakeRequest(
+        owner=staker.address,
+        target=target,
+        dipAmount=dipAmount,
+        signatureId=signatureId,
+        signature=signature))
+
+    relayer._send_batch([relayer.queue.get_nowait()])
+    assert relayer.get_status(signatureId)['status'] == STATUS_FAILED
+
+    # finished requests are dropped on the next submission after finished_ttl
+    relayer._prune()
+    assert len(relayer.requests) == 0
+    assert len(relayer.finished) == 0
+
+    with pytest.raises(RelayerError):
+        relayer.get_status(signatureId)
+
+
+def test_relayer_concurrent_state(theOutsider):
+    relayer = Relayer(MockStaking(), theOutsider, chain_id=1)
+    batch = []
+
+    for i in range(200):
+        request = {
+            'type': REQUEST_STAKE,
+            'signatureId': 'id-{}'.format(i),
+            'args': [],
+            'status': STATUS_QUEUED,
+            'receivedAt': time.monotonic(),
+            'submittedAt': None,
+            'tx': None,
+            'error': None,
+        }
+
+        relayer.requests[request['signatureId']] = request
+        batch.append(request)
+
+    # batch is sent from another thread as in run, metrics are read concurrently
+    sender = threading.Thread(target=relayer._send_batch, args=(batch,))
+    sender.start()
+
+    while sender.is_alive():
+        relayer.get_metrics()
+
+    sender.join()
+
+    metrics = relayer.get_metrics()
+    assert metrics['submitted'] == 200
+    assert metrics['mined'] == 200
+    assert metrics['pending'] == 0
+    assert len(relayer.latencies) == 200
+
+
+class MockTx:
+
+    def __init__(self, txid):
+        self.txid = txid
+        self.status = 1
+
+    def wait(self, confirmations):
+        time.sleep(0.0001)
+
+
+class MockStaking:
+
+    def getMessageHelperAddress(self):
+        return '0x0000000000000000000000000000000000000000'
+
+    def createStakeWithSignature(self, *args):
+        return MockTx('0x{:064x}'.format(len(args)))
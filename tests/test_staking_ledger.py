@@ -0,0 +1,214 @@
+import pytest
+
+from brownie.network.account import Account
+
+from brownie import (
+    chain,
+    web3,
+    USD2,
+    DIP,
+    MockInstance,
+    MockInstanceRegistry,
+    OwnableProxyAdmin,
+    ChainRegistryV01,
+    StakingV03,
+)
+
+from scripts.staking_ledger import (
+    load_checkpoint,
+    sync_ledger,
+    verify_ledger,
+)
+from scripts.util import unix_timestamp
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_ledger_mirrors_staking_balances(
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    dip: DIP,
+    instanceOperator: Account,
+    stakingV01: StakingV03,
+    stakingOwner: Account,
+    staker: Account,
+    theOutsider: Account,
+    tmp_path
+):
+    checkpoint_file = str(tmp_path / 'ledger.json')
+
+    # set default reward rate to 12.5%
+    apr_12_5 = stakingV01.toRate(125, -3)
+    stakingV01.setRewardRate(apr_12_5, {'from': stakingOwner})
+
+    # provide some reward reserves
+    reward_reserves_amount = 1000*10**dip.decimals()
+    dip.approve(stakingV01, reward_reserves_amount, {'from': instanceOperator})
+    stakingV01.refillRewardReserves(reward_reserves_amount, {'from': instanceOperator})
+
+    bundle_lifetime = 100 * 24 * 3600
+    bundle_nft = create_mock_bundle_setup(
+        mockInstance,
+        mockRegistry,
+        usd2,
+        proxyAdmin,
+        proxyAdminOwner,
+        chainRegistryV01,
+        registryOwner,
+        theOutsider,
+        bundle_lifetime = bundle_lifetime)
+
+    bundle_nft2 = create_mock_bundle_setup(
+        mockInstance,
+        mockRegistry,
+        usd2,
+        proxyAdmin,
+        proxyAdminOwner,
+        chainRegistryV01,
+        registryOwner,
+        theOutsider,
+        bundle_lifetime = 2*bundle_lifetime,
+        bundle_id = 2,
+        is_first_bundle = False)
+
+    # stake, add to stake and claim rewards
+    staking_amount = 5000 * 10 ** dip.decimals()
+    prepare_staker(staker, 3 * staking_amount, dip, instanceOperator, stakingV01)
+
+    tx = stakingV01.createStake(bundle_nft, staking_amount, {'from': staker})
+    stake_id = tx.events['LogStakingNewStakeCreated']['id']
+
+    tx = stakingV01.createStake(bundle_nft2, staking_amount, {'from': staker})
+    stake_id2 = tx.events['LogStakingNewStakeCreated']['id']
+
+    chain.sleep(10 * 24 * 3600)
+    chain.mine(1)
+
+    stakingV01.stake(stake_id2, staking_amount, {'from': staker})
+    stakingV01.claimRewards(stake_id2, {'from': staker})
+
+    # first sync writes checkpoint
+    ledger = sync_ledger(stakingV01, checkpoint_file=checkpoint_file)
+    assert ledger.block == web3.eth.block_number
+    assert ledger.stake_balance == stakingV01.stakeBalance()
+    assert ledger.targets[bundle_nft] == staking_amount
+    assert ledger.targets[bundle_nft2] == 2 * staking_amount
+
+    # restake after bundle expiry and reduce reward reserves
+    chain.sleep(bundle_lifetime + 1)
+    chain.mine(1)
+
+    tx = stakingV01.restake(stake_id, bundle_nft2, {'from': staker})
+    stake_id3 = tx.events['LogStakingRestaked']['stakeId']
+
+    stakingV01.withdrawRewardReserves(10 * 10 ** dip.decimals(), {'from': stakingOwner})
+
+    # second sync continues from checkpoint
+    ledger = load_checkpoint(stakingV01, checkpoint_file)
+    sync_ledger(stakingV01, ledger, checkpoint_file=checkpoint_file)
+
+    assert ledger.stakes[stake_id]['stakeBalance'] == 0
+    assert ledger.stakes[stake_id3]['stakeBalance'] == stakingV01.getInfo(stake_id3).dict()['stakeBalance']
+    assert ledger.targets[bundle_nft] == 0
+    assert ledger.targets[bundle_nft2] == stakingV01.stakes(bundle_nft2)
+
+    # all stakes and targets match on-chain state
+    assert verify_ledger(ledger, stakingV01, sample_size=10) == []
+
+
+def prepare_staker(
+    staker,
+    staking_amount,
+    dip,
+    instanceOperator,
+    stakingV01
+):
+    dip.transfer(staker, staking_amount, {'from': instanceOperator })
+    dip.approve(stakingV01.getStakingWallet(), staking_amount, {'from': staker })
+
+
+def create_mock_bundle_setup(
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    theOutsider: Account,
+    bundle_lifetime = 14 * 24 * 3600,
+    bundle_id = 1,
+    is_first_bundle = True
+) -> int:
+    # setup attributes
+    chain_id = chainRegistryV01.toChain(mockInstance.getChainId())
+    instance_id = mockInstance.getInstanceId()
+    riskpool_id = 1
+    bundle_name = 'my test bundle'
+    bundle_funding = 10000 * 10 ** usd2.decimals()
+    bundle_expiry_at = unix_timestamp() + bundle_lifetime
+
+    # setup mock instance
+    type_riskpool = 2
+
+    state_created = 0
+    state_active = 3
+    state_paused = 4
+
+    mockInstance.setComponentInfo(
+        riskpool_id,
+        type_riskpool,
+        state_active,
+        usd2)
+
+    bundle_state_active = 0 # enum BundleState { Active, Locked, Closed, Burned }
+    mockInstance.setBundleInfo(
+        bundle_id,
+        riskpool_id,
+        bundle_state_active,
+        bundle_funding)
+
+    # register token
+    if is_first_bundle:
+        tx_token = chainRegistryV01.registerToken(
+                chain_id,
+                usd2,
+                '',
+                {'from': registryOwner})
+
+    # register instance
+    if is_first_bundle:
+        tx_instance = chainRegistryV01.registerInstance(
+            mockRegistry,
+            'mockRegistry TEST',
+            '',
+            {'from': registryOwner})
+
+    # register riskpool
+    if is_first_bundle:
+        tx_riskpool = chainRegistryV01.registerComponent(
+            instance_id,
+            riskpool_id,
+            '',
+            {'from': registryOwner})
+
+    # register bundle
+    tx_bundle = chainRegistryV01.registerBundle(
+        instance_id,
+        riskpool_id,
+        bundle_id,
+        bundle_name,
+        bundle_expiry_at,
+        {'from': theOutsider})
+
+    nft_id = chainRegistryV01.getBundleNftId(instance_id, bundle_id)
+
+    return nft_id
@@ -1,11 +1,6 @@
 import pytest
 import brownie
 
-from eip712_structs import EIP712Struct, Address, Bytes, String, Uint
-from eip712_structs import make_domain
-from eth_utils import big_endian_to_int
-from coincurve import PrivateKey, PublicKey
-
 from brownie.network.account import Account
 
 from brownie import (
@@ -34,71 +29,14 @@ from scripts.util import (
     unix_timestamp
 )
 
-keccak_hash = lambda x : Web3.keccak(x)
-
-# https://medium.com/treum_io/introducing-eip-712-structs-in-python-27eac7f38281
-# https://gist.github.com/alexisrobert/9facb3d21d4f04946f3a41b5a3c0a9a1
-
-# EIP712_STAKE_TYPE = "Stake(uint96 target,uint256 dipAmount,bytes32 signatureId)"
-class Stake(EIP712Struct):
-    target = Uint(96)
-    dipAmount = Uint(256)
-    signatureId = Bytes(32)
-
-# EIP712_RESTAKE_TYPE = "Restake(uint96 oldTarget,uint96 newTarget,bytes32 signatureId)"
-class Restake(EIP712Struct):
-    stakeId = Uint(96)
-    newTarget = Uint(96)
-    signatureId = Bytes(32)
-
-
-def create_stake_signature(target, dipAmount, signatureId, contractAddress, owner):
-    # prepare messsage
-    message = Stake()
-    message['target'] = target
-    message['dipAmount'] = dipAmount
-    message['signatureId'] = signatureId
-
-    stake_domain = make_domain(
-        name='EtheriscStaking',
-        version='1',
-        chainId=web3.chain_id,
-        verifyingContract=contractAddress)
-
-    signable_bytes = message.signable_bytes(stake_domain)
-
-    return calculate_signature(signable_bytes, owner)
-
-
-def create_restake_signature(stakeId, newTarget, signatureId, contractAddress, owner):
-    # prepare messsage
-    message = Restake()
-    message['stakeId'] = stakeId
-    message['newTarget'] = newTarget
-    message['signatureId'] = signatureId
-
-    stake_domain = make_domain(
-        name='EtheriscStaking',
-        version='1',
-        chainId=web3.chain_id,
-        verifyingContract=contractAddress)
-
-    signable_bytes = message.signable_bytes(stake_domain)
-
-    return calculate_signature(signable_bytes, owner)
-
-
-def calculate_signature(signable_bytes, owner):
-    pk = PrivateKey.from_int(int(owner.private_key, 16))
-    sig = pk.sign_recoverable(signable_bytes, hasher=keccak_hash)
-    v = sig[64] + 27
-    r = big_endian_to_int(sig[0:32])
-    s = big_endian_to_int(sig[32:64])    
-
-    signature_raw = r.to_bytes(32, 'big') + s.to_bytes(32, 'big') + v.to_bytes(1, 'big')
-    signature = '0x{}'.format(signature_raw.hex())
-
-    return signature
+from scripts.staking_signature import (
+    create_stake_signature,
+    create_restake_signature,
+    get_stake_digest,
+    get_restake_digest,
+    recover_signer,
+    sign_stakes,
+)
 
 
 # enforce function isolation for tests below
@@ -191,6 +129,31 @@ def test_signature_and_signer_for_restaking(
     assert staker != messageHelper.getSigner(digest, signature)
 
 
+def test_signature_module_matches_message_helper(
+        messageHelper, 
+        staker
+):
+    chain_id = web3.chain_id
+    signatureId = s2b32('digest-cross-check')
+
+    # locally computed digests match the on-chain eip-712 digests
+    for (target, dipAmount) in [(0, 0), (1, 1), (2**96 - 1, 2**256 - 1), (1234501, 5000 * 10**18)]:
+        digest = get_stake_digest(target, dipAmount, signatureId, chain_id, messageHelper.address)
+        assert digest == bytes(messageHelper.getStakeDigest(target, dipAmount, signatureId))
+
+    digest = get_restake_digest(1234, 5678, signatureId, chain_id, messageHelper.address)
+    assert digest == bytes(messageHelper.getRestakeDigest(1234, 5678, signatureId))
+
+    # batch signatures are recovered to the staker both locally and on-chain
+    stakes = [(1000 + i, (i + 1) * 10**18, s2b32('batch-{}'.format(i))) for i in range(5)]
+    signatures = sign_stakes(stakes, staker.private_key, chain_id, messageHelper.address)
+
+    for ((target, dipAmount, signatureId), signature) in zip(stakes, signatures):
+        digest = messageHelper.getStakeDigest(target, dipAmount, signatureId)
+        assert recover_signer(bytes(digest), signature) == staker
+        assert messageHelper.getSigner(digest, signature) == staker
+
+
 def test_stake_bundle_gasless(
     mockInstance: MockInstance,
     mockRegistry: MockInstanceRegistry,
@@ -0,0 +1,308 @@
+import pytest
+import brownie
+
+from brownie.network.account import Account
+
+from brownie import (
+    web3,
+    USD2,
+    DIP,
+    MockInstance,
+    MockInstanceRegistry,
+    OwnableProxyAdmin,
+    ChainRegistryV01,
+    ChainRegistryV03,
+    StakingV03,
+    StakingV04,
+)
+
+from scripts.util import (
+    contract_from_address,
+    unix_timestamp
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_bundle_getters_v4(
+    stakingProxyAdmin: OwnableProxyAdmin,
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    dip: DIP,
+    instanceOperator: Account,
+    stakingV01: StakingV03,
+    stakingOwner: Account,
+    staker: Account,
+    theOutsider: Account
+):
+    bundle_nft = create_mock_bundle_setup(
+        mockInstance,
+        mockRegistry,
+        usd2,
+        proxyAdmin,
+        proxyAdminOwner,
+        chainRegistryV01,
+        registryOwner,
+        theOutsider)
+
+    chain_id = stakingV01.toChain(web3.chain_id)
+    stakingV01.setStakingRate(chain_id, usd2, stakingV01.toRate(5, -2), {'from': stakingOwner})
+
+    staking_amount = 5000 * 10 ** dip.decimals()
+    prepare_staker(staker, 2 * staking_amount, dip, instanceOperator, stakingV01)
+    stakingV01.createStake(bundle_nft, staking_amount, {'from': staker})
+
+    # record v3 results before upgrading
+    bundle_state_v3 = stakingV01.getBundleState(bundle_nft)
+    locking_until_v3 = stakingV01.calculateLockingUntil(bundle_nft)
+    capital_support_v3 = stakingV01.capitalSupport(bundle_nft)
+
+    (registry, staking) = upgrade_to_v4(
+        chainRegistryV01,
+        proxyAdmin,
+        stakingV01,
+        stakingProxyAdmin,
+        proxyAdminOwner)
+
+    assert staking.version() > stakingV01.version()
+
+    # check targeted getters against full bundle data decoding
+    bundle_data = registry.decodeBundleData(bundle_nft).dict()
+    info = registry.getNftInfo(bundle_nft).dict()
+
+    (chain, object_type, state) = registry.getObjectInfo(bundle_nft)
+    assert chain == info['chain']
+    assert object_type == registry.BUNDLE()
+    assert state == info['state']
+
+    (instance_id, riskpool_id, bundle_id) = registry.getBundleInstance(bundle_nft)
+    assert instance_id == bundle_data['instanceId']
+    assert riskpool_id == bundle_data['riskpoolId']
+    assert bundle_id == bundle_data['bundleId']
+
+    assert registry.getBundleToken(bundle_nft) == bundle_data['token']
+    assert registry.getBundleExpiryAt(bundle_nft) == bundle_data['expiryAt']
+
+    token_nft = registry.getTokenNftId(chain_id, usd2)
+    with brownie.reverts('ERROR:CRG-420:NOT_BUNDLE'):
+        registry.getBundleToken(token_nft)
+
+    # staking v4 results need to match v3 results
+    assert staking.getBundleState(bundle_nft) == bundle_state_v3
+    assert staking.calculateLockingUntil(bundle_nft) == locking_until_v3
+    assert staking.capitalSupport(bundle_nft) == capital_support_v3
+    assert staking.isStakingSupported(bundle_nft) is True
+    assert staking.isUnstakingSupported(bundle_nft) is False
+
+    with brownie.reverts('ERROR:STK-401:OBJECT_TYPE_NOT_BUNDLE'):
+        staking.getBundleState(token_nft)
+
+    # staking continues to work after upgrade
+    tx = staking.createStake(bundle_nft, staking_amount, {'from': staker})
+    stake_nft = tx.events['LogStakingNewStakeCreated']['id']
+
+    assert staking.stakes(bundle_nft) == 2 * staking_amount
+    assert staking.capitalSupport(bundle_nft) == 2 * capital_support_v3
+    assert staking.getInfo(stake_nft).dict()['lockedUntil'] == bundle_data['expiryAt']
+
+
+def test_bundle_info_v4(
+    stakingProxyAdmin: OwnableProxyAdmin,
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    dip: DIP,
+    instanceOperator: Account,
+    stakingV01: StakingV03,
+    stakingOwner: Account,
+    staker: Account,
+    theOutsider: Account
+):
+    bundle_nft = create_mock_bundle_setup(
+        mockInstance,
+        mockRegistry,
+        usd2,
+        proxyAdmin,
+        proxyAdminOwner,
+        chainRegistryV01,
+        registryOwner,
+        theOutsider)
+
+    bundle_nft2 = create_mock_bundle_setup(
+        mockInstance,
+        mockRegistry,
+        usd2,
+        proxyAdmin,
+        proxyAdminOwner,
+        chainRegistryV01,
+        registryOwner,
+        theOutsider,
+        bundle_id=2,
+        is_first_bundle=False)
+
+    chain_id = stakingV01.toChain(web3.chain_id)
+    stakingV01.setStakingRate(chain_id, usd2, stakingV01.toRate(5, -2), {'from': stakingOwner})
+
+    staking_amount = 5000 * 10 ** dip.decimals()
+    prepare_staker(staker, staking_amount, dip, instanceOperator, stakingV01)
+    stakingV01.createStake(bundle_nft, staking_amount, {'from': staker})
+
+    # close second bundle to get different flags
+    bundle_state_closed = 2
+    mockInstance.setBundleInfo(2, 1, bundle_state_closed, 10000 * 10 ** usd2.decimals())
+
+    # record v3 results before upgrading
+    info_v3 = stakingV01.getBundleInfo(bundle_nft)
+    info2_v3 = stakingV01.getBundleInfo(bundle_nft2)
+    gas_v3 = stakingV01.getBundleInfo.estimate_gas(bundle_nft)
+
+    (registry, staking) = upgrade_to_v4(
+        chainRegistryV01,
+        proxyAdmin,
+        stakingV01,
+        stakingProxyAdmin,
+        proxyAdminOwner)
+
+    # single pass results need to match v3 results
+    assert staking.getBundleInfo(bundle_nft) == info_v3
+    assert staking.getBundleInfo(bundle_nft2) == info2_v3
+    assert info_v3.dict()['stakingSupported'] is True
+    assert info2_v3.dict()['unstakingSupported'] is True
+
+    gas_v4 = staking.getBundleInfo.estimate_gas(bundle_nft)
+    print('getBundleInfo gas v3 {} v4 {} ({:+.1%})'.format(gas_v3, gas_v4, (gas_v4 - gas_v3) / gas_v3))
+    assert gas_v4 < gas_v3
+
+    # batched version
+    infos = staking.getBundleInfos([bundle_nft, bundle_nft2])
+    assert len(infos) == 2
+
+    for (info, info_v3, nft_id) in zip(infos, [info_v3, info2_v3], [bundle_nft, bundle_nft2]):
+        assert info[0] == nft_id
+        assert info[1:6] == info_v3[0:5]
+        assert info[7:] == info_v3[5:]
+
+    token_nft = registry.getTokenNftId(chain_id, usd2)
+    with brownie.reverts('ERROR:STK-401:OBJECT_TYPE_NOT_BUNDLE'):
+        staking.getBundleInfos([bundle_nft, token_nft])
+
+
+def upgrade_to_v4(
+    chainRegistryV01,
+    proxyAdmin,
+    stakingV01,
+    stakingProxyAdmin,
+    proxyAdminOwner
+):
+    # staking v4 relies on the bundle getters of registry v3
+    registry_implementation = ChainRegistryV03.deploy({'from': proxyAdminOwner})
+    proxyAdmin.upgrade(registry_implementation, {'from': proxyAdminOwner})
+
+    staking_implementation = StakingV04.deploy({'from': proxyAdminOwner})
+    stakingProxyAdmin.upgrade(staking_implementation, {'from': proxyAdminOwner})
+
+    return (
+        contract_from_address(ChainRegistryV03, chainRegistryV01),
+        contract_from_address(StakingV04, stakingV01))
+
+
+def prepare_staker(
+    staker,
+    staking_amount,
+    dip,
+    instanceOperator,
+    stakingV01
+):
+    dip.transfer(staker, staking_amount, {'from': instanceOperator })
+    dip.approve(stakingV01.getStakingWallet(), staking_amount, {'from': staker })
+
+
+def create_mock_bundle_setup(
+    mockInstance: MockInstance,
+    mockRegistry: MockInstanceRegistry,
+    usd2: USD2,
+    proxyAdmin: OwnableProxyAdmin,
+    proxyAdminOwner: Account,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    theOutsider: Account,
+    bundle_lifetime = 14 * 24 * 3600,
+    bundle_id = 1,
+    is_first_bundle = True
+) -> int:
+    # setup attributes
+    chain_id = chainRegistryV01.toChain(mockInstance.getChainId())
+    instance_id = mockInstance.getInstanceId()
+    riskpool_id = 1
+    bundle_name = 'my test bundle'
+    bundle_funding = 10000 * 10 ** usd2.decimals()
+    bundle_expiry_at = unix_timestamp() + bundle_lifetime
+
+    # setup mock instance
+    type_riskpool = 2
+
+    state_created = 0
+    state_active = 3
+    state_paused = 4
+
+    mockInstance.setComponentInfo(
+        riskpool_id,
+        type_riskpool,
+        state_active,
+        usd2)
+
+    bundle_state_active = 0 # enum BundleState { Active, Locked, Closed, Burned }
+    mockInstance.setBundleInfo(
+        bundle_id,
+        riskpool_id,
+        bundle_state_active,
+        bundle_funding)
+
+    # register token
+    if is_first_bundle:
+        tx_token = chainRegistryV01.registerToken(
+                chain_id,
+                usd2,
+                '',
+                {'from': registryOwner})
+
+    # register instance
+    if is_first_bundle:
+        tx_instance = chainRegistryV01.registerInstance(
+            mockRegistry,
+            'mockRegistry TEST',
+            '',
+            {'from': registryOwner})
+
+    # register riskpool
+    if is_first_bundle:
+        tx_riskpool = chainRegistryV01.registerComponent(
+            instance_id,
+            riskpool_id,
+            '',
+            {'from': registryOwner})
+
+    # register bundle
+    tx_bundle = chainRegistryV01.registerBundle(
+        instance_id,
+        riskpool_id,
+        bundle_id,
+        bundle_name,
+        bundle_expiry_at,
+        {'from': theOutsider})
+
+    nft_id = chainRegistryV01.getBundleNftId(instance_id, bundle_id)
+
+    return nft_id
@@ -0,0 +1,28 @@
+import importlib.util
+import pytest
+
+import scripts.deploy_registry as deploy_registry
+import scripts.util as util
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_lazy_package(monkeypatch):
+    calls = []
+    monkeypatch.setattr(util, 'get_package', lambda substring: calls.append(substring) or substring)
+
+    # fresh module object, deploy_registry in sys.modules is left untouched
+    spec = importlib.util.spec_from_file_location('deploy_registry_import', deploy_registry.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    # module import does not load packages
+    assert calls == []
+    assert not hasattr(module, 'oz')
+
+    assert module.get_oz() == 'OpenZeppelin'
+    assert calls == ['OpenZeppelin']
+
@@ -0,0 +1,52 @@
+import copy
+import json
+
+from scripts.storage_layout import (
+    compare,
+    get_storage_layout,
+)
+
+# unified layout of StakingV02 as created by solc (see README)
+STAKING_V02_LAYOUT = 'tmp2b.json'
+
+REGISTRY_V02_SOURCE = 'contracts/registry/ChainRegistryV02.sol'
+REGISTRY_V03_SOURCE = 'contracts/registry/ChainRegistryV03.sol'
+
+
+def test_registry_v03_upgrade_layout():
+    # both layouts are created by solc from the current sources
+    layout_v02 = get_storage_layout(REGISTRY_V02_SOURCE, True)
+    layout_v03 = get_storage_layout(REGISTRY_V03_SOURCE, True)
+
+    assert compare(layout_v02, layout_v03) == []
+
+    # v03 only appends mappings after the last slot of v02
+    last_slot = int(layout_v02['storage'][-1]['slot'])
+    appended = layout_v03['storage'][len(layout_v02['storage']):]
+    assert [s['label'] for s in appended] == ['_didPrefix', '_packedInfo', '_instanceService']
+    assert [int(s['slot']) for s in appended] == [last_slot + 1, last_slot + 2, last_slot + 3]
+
+
+def test_compare_detects_changes():
+    layout = read_layout(STAKING_V02_LAYOUT)
+
+    # inserting a variable shifts all later slots
+    inserted = copy.deepcopy(layout)
+    inserted['storage'].insert(7, {'label': '_new', 'offset': 0, 'slot': '103', 'type': 't_uint256'})
+    assert len(compare(layout, inserted)) > 0
+
+    # changing a struct member stored in a mapping
+    changed = copy.deepcopy(layout)
+    stake_info = changed['types']['t_struct(StakeInfo)8ac2b_storage']
+    stake_info['members'][1]['offset'] = 13
+    assert compare(layout, changed) == ['type t_struct(StakeInfo)8ac2b_storage member target: offset changed from 12 to 13']
+
+    # appending is accepted
+    appended = copy.deepcopy(layout)
+    appended['storage'].append({'label': '_new', 'offset': 0, 'slot': '116', 'type': 't_uint256'})
+    assert compare(layout, appended) == []
+
+
+def read_layout(file_name) -> dict:
+    with open(file_name) as f:
+        return json.load(f)
@@ -0,0 +1,138 @@
+import pytest
+import threading
+
+from brownie.network.account import Account
+
+from brownie import (
+    web3,
+    USD1,
+    USD2,
+    ChainRegistryV01,
+)
+
+from scripts.telemetry import (
+    WAIT_METHODS,
+    read_telemetry,
+    start_telemetry,
+    step,
+    stop_telemetry,
+)
+from scripts.util import wait_for_all_confirmations
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_telemetry_steps(
+    usd1: USD1,
+    usd2: USD2,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    tmp_path
+):
+    file_name = str(tmp_path / 'telemetry.jsonl')
+    chain_id = chainRegistryV01.toChain(web3.chain_id)
+
+    start_telemetry(file_name, run_id='test')
+
+    try:
+        with step('register'):
+            with step('registerToken', token=str(usd1)):
+                tx1 = chainRegistryV01.registerToken(chain_id, usd1, '', {'from': registryOwner})
+
+            with step('registerToken', token=str(usd2)):
+                tx2 = chainRegistryV01.registerToken(chain_id, usd2, '', {'from': registryOwner})
+
+            chainRegistryV01.objects(chain_id, 4)
+    finally:
+        stop_telemetry()
+
+    records = read_telemetry(file_name)
+    assert [r['step'] for r in records] == ['registerToken', 'registerToken', 'register']
+    assert [r['parent'] for r in records] == ['register', 'register', None]
+    assert all(r['run'] == 'test' for r in records)
+
+    (token1, token2, register) = records
+    assert token1['token'] == str(usd1)
+    assert token1['txs'] == 1
+    assert token1['gasUsed'] == tx1.gas_used
+    assert token2['gasUsed'] == tx2.gas_used
+    assert token1['gasPrice'] == tx1.gas_price
+    assert token1['rpcCalls'] > 0
+
+    # parent step includes its children plus the objects call
+    assert register['txs'] == 2
+    assert register['gasUsed'] == tx1.gas_used + tx2.gas_used
+    assert register['rpcCalls'] > token1['rpcCalls'] + token2['rpcCalls']
+    assert register['duration'] >= token1['duration'] + token2['duration']
+
+    # without active telemetry steps are not recorded
+    with step('notRecorded') as record:
+        assert record is None
+
+    assert len(read_telemetry(file_name)) == 3
+
+
+def test_telemetry_wait_time(
+    usd1: USD1,
+    chainRegistryV01: ChainRegistryV01,
+    registryOwner: Account,
+    tmp_path
+):
+    file_name = str(tmp_path / 'telemetry.jsonl')
+    chain_id = chainRegistryV01.toChain(web3.chain_id)
+
+    telemetry = start_telemetry(file_name, run_id='test')
+    receipt_calls = []
+
+    try:
+        with step('register'):
+            tx = chainRegistryV01.registerToken(chain_id, usd1, '', {'from': registryOwner, 'required_confs': 0})
+
+            with telemetry.waiting():
+                # receipt polls while waiting are part of the elapsed wait, not added on top
+                telemetry._middleware(lambda method, params: receipt_calls.append(method) or {}, web3)(WAIT_METHODS[0], [])
+                assert telemetry.steps[0]['waitTime'] == 0
+
+            wait_for_all_confirmations([tx])
+    finally:
+        stop_telemetry()
+
+    [register] = read_telemetry(file_name)
+    assert receipt_calls == WAIT_METHODS
+    assert register['txs'] == 1
+    assert 0 < register['waitTime'] <= register['duration']
+
+
+def test_telemetry_threads(tmp_path):
+    telemetry = start_telemetry(str(tmp_path / 'telemetry.jsonl'), run_id='test')
+    middleware = telemetry._middleware(lambda method, params: {}, web3)
+
+    def calls():
+        for _ in range(1000):
+            middleware('eth_call', [])
+
+    try:
+        with step('reads'):
+            # calls of concurrent reader threads are all counted
+            threads = [threading.Thread(target=calls) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert telemetry.steps[0]['rpcCalls'] == 8000
+
+            # uncounted calls of this thread do not hide calls of other threads
+            with telemetry._not_counted():
+                other = threading.Thread(target=middleware, args=('eth_call', []))
+                other.start()
+                other.join()
+
+                middleware('eth_call', [])
+
+            assert telemetry.steps[0]['rpcCalls'] == 8001
+    finally:
+        stop_telemetry()
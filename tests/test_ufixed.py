@@ -0,0 +1,115 @@
+import pytest
+import random
+import brownie
+
+from brownie import UFixedMathTest
+
+from scripts.ufixed import (
+    UFixed,
+    MAX_UINT256,
+    ROUNDING_DOWN,
+    ROUNDING_UP,
+    ROUNDING_HALF_UP,
+    delta,
+    eqz,
+    ftoi,
+    gtz,
+    itof,
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+SAMPLES = 40
+SEED = 4711
+
+
+def test_itof_ftoi(math: UFixedMathTest):
+    rnd = random.Random(SEED)
+
+    for a in [0, 1, 42, 10 ** 32 - 1] + [random_int(rnd) for _ in range(SAMPLES)]:
+        exp = rnd.randint(-18, 18)
+        assert itof(a).value == math.itof(a)
+        assert itof(a, exp).value == math.itof(a, exp)
+
+    for exp in [-19, 19]:
+        with pytest.raises(ValueError):
+            itof(1, exp)
+
+    for fa in [0, 1, 5 * 10**17 - 1, 5 * 10**17, 10**18, 15 * 10**17] + [random_raw(rnd) for _ in range(SAMPLES)]:
+        for rounding in [ROUNDING_DOWN, ROUNDING_UP, ROUNDING_HALF_UP]:
+            assert ftoi(UFixed(fa), rounding) == math.ftoi(fa, rounding)
+
+        assert ftoi(UFixed(fa)) == math.ftoi(fa)
+
+
+def test_operations(math: UFixedMathTest):
+    rnd = random.Random(SEED)
+    pairs = [(0, 0), (1, 3), (10**18, 3 * 10**18), (10**18, 1)]
+    pairs += [(random_raw(rnd), random_raw(rnd)) for _ in range(SAMPLES)]
+
+    for (a, b) in pairs:
+        (fa, fb) = (UFixed(a), UFixed(b))
+
+        assert (fa + fb).value == math.add(a, b)
+        assert (fa * fb).value == math.mul(a, b)
+        assert delta(fa, fb).value == math.dlt(a, b)
+        assert (fa == fb) == math.eq(a, b)
+        assert (fa > fb) == math.gt(a, b)
+        assert gtz(fa) == math.gtzUFixed(a)
+        assert eqz(fa) == math.eqzUFixed(a)
+
+        if a >= b:
+            assert (fa - fb).value == math.sub(a, b)
+        else:
+            with pytest.raises(ValueError, match='ERROR:UFM-010:NEGATIVE_RESULT'):
+                fa - fb
+
+            with brownie.reverts('ERROR:UFM-010:NEGATIVE_RESULT'):
+                math.sub(a, b)
+
+        if b > 0:
+            assert (fa / fb).value == math.div(a, b)
+        else:
+            with pytest.raises(ValueError, match='ERROR:UFM-020:DIVISOR_ZERO'):
+                fa / fb
+
+
+def test_overflow(math: UFixedMathTest):
+    big = UFixed(MAX_UINT256)
+
+    with pytest.raises(OverflowError):
+        big + UFixed(1)
+
+    with pytest.raises(OverflowError):
+        big * itof(2)
+
+    with pytest.raises(OverflowError):
+        ftoi(big)
+
+    with brownie.reverts():
+        math.add(MAX_UINT256, 1)
+
+
+def test_from_decimal():
+    assert UFixed.from_decimal(0.125) == itof(125, -3)
+    assert UFixed.from_decimal('1.001') == itof(1001, -3)
+    assert UFixed.from_decimal(0.29) == itof(29, -2)
+
+    assert UFixed.from_decimal('1e-19', ROUNDING_DOWN).value == 0
+    assert UFixed.from_decimal('1e-19', ROUNDING_UP).value == 1
+    assert UFixed.from_decimal('5e-19').value == 1
+
+    assert str(UFixed.from_decimal(0.125)) == '0.125'
+    assert float(itof(42, -1)) == 4.2
+
+
+def random_int(rnd):
+    return rnd.randint(0, 10 ** rnd.randint(0, 30))
+
+
+def random_raw(rnd):
+    # raw fixed point values from tiny fractions up to 10^18, products stay within uint256
+    return rnd.randint(0, 10 ** rnd.randint(0, 36))
@@ -0,0 +1,85 @@
+import pytest
+
+from brownie.network.account import Account
+
+from brownie import (
+    ChainRegistryV01,
+    ChainRegistryV02,
+    OwnableProxyAdmin,
+    StakingV01,
+    StakingV02,
+)
+
+from scripts.upgrade_proxies import (
+    run_upgrades,
+    str_to_version,
+    version_to_str,
+)
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_upgrade_registry_and_staking(
+    proxyAdmin: OwnableProxyAdmin,
+    chainRegistryV01: ChainRegistryV01,
+    stakingProxyAdmin: OwnableProxyAdmin,
+    stakingV01Beta: StakingV01,
+    proxyAdminOwner: Account,
+):
+    registry_version = chainRegistryV01.version()
+    staking_version = stakingV01Beta.version()
+
+    manifest = [
+        {'proxyAdmin': str(proxyAdmin), 'contract': ChainRegistryV02._name},
+        {'proxyAdmin': str(stakingProxyAdmin), 'contract': StakingV02._name, 'version': '1.0.1'},
+    ]
+
+    report = run_upgrades(manifest, proxyAdminOwner, confirmations=1)
+
+    assert len(report['chains']) == 1
+    assert report['txs'] == 4
+    assert report['gasUsed'] > 0
+
+    upgrades = report['chains'][0]['upgrades']
+    assert [u['versionBefore'] for u in upgrades] == [version_to_str(registry_version), version_to_str(staking_version)]
+    assert upgrades[1]['versionAfter'] == '1.0.1'
+
+    # proxies point to the new implementations
+    assert proxyAdmin.getImplementation() == upgrades[0]['implementation']
+    assert stakingProxyAdmin.getImplementation() == upgrades[1]['implementation']
+    assert chainRegistryV01.version() > registry_version
+    assert stakingV01Beta.version() == str_to_version('1.0.1')
+    assert stakingV01Beta.versions() == 2
+
+
+def test_upgrade_validation(
+    proxyAdmin: OwnableProxyAdmin,
+    chainRegistryV01: ChainRegistryV01,
+    stakingProxyAdmin: OwnableProxyAdmin,
+    stakingV01Beta: StakingV01,
+    proxyAdminOwner: Account,
+    theOutsider: Account,
+):
+    implementation = stakingProxyAdmin.getImplementation()
+
+    # version not increasing, nothing is sent for the valid registry entry either
+    manifest = [
+        {'proxyAdmin': str(proxyAdmin), 'contract': ChainRegistryV02._name},
+        {'proxyAdmin': str(stakingProxyAdmin), 'contract': StakingV02._name, 'version': '1.0.0'},
+    ]
+
+    with pytest.raises(AssertionError):
+        run_upgrades(manifest, proxyAdminOwner, confirmations=1)
+
+    # wrong owner
+    manifest[1]['version'] = '1.0.1'
+
+    with pytest.raises(AssertionError):
+        run_upgrades(manifest, theOutsider, confirmations=1)
+
+    assert stakingProxyAdmin.getImplementation() == implementation
+    assert chainRegistryV01.versions() == 1
+    assert stakingV01Beta.versions() == 1